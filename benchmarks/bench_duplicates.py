@@ -0,0 +1,125 @@
+"""Benchmark duplicate detection lookups on a large synthetic report index
+
+Run from the repository root:
+    python benchmarks/bench_duplicates.py [--reports 100000] [--queries 2000]
+
+Builds one guild's MinHashIndex from synthetic reports, then times
+find_duplicate_bug() for reworded copies of indexed reports (which should be
+found) and for unrelated reports (which should not). First checks that a
+report indexed twice and then evicted leaves nothing behind (exit status 1 if
+it does).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Folding is off by default; benchmark it at the suggested threshold
+os.environ.setdefault('DUPLICATE_THRESHOLD', '0.7')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bot  # noqa: E402
+
+WORDS = (
+    'player fell through floor wall door stuck clipping texture missing crash freeze '
+    'enemy spawn inside rock water lighting flicker shadow broken ladder cannot climb '
+    'invisible collision sound loops forever ui overlaps menu button does nothing after '
+    'loading save game checkpoint resets inventory item duplicates quest marker wrong '
+    'camera jitters when sprinting vehicle flips bridge physics explodes npc walks '
+    'through gate animation stutters frame drops near waterfall particles disappear'
+).split()
+MAPS = [f'Map_{i:02d}' for i in range(20)]
+
+def make_report(rng):
+    return {
+        'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))),
+        'map': rng.choice(MAPS),
+        'location': ' '.join(f'{rng.uniform(-50000, 50000):.2f}' for _ in range(3)) + ' 0.00 90.00 0.00',
+        'response_type': 'Error / Bug Report',
+    }
+
+def reword(report, rng):
+    """A near-duplicate: one word changed, same map, a few units away"""
+    words = report['description'].split()
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    x, y, z = bot.parse_location(report['location'])
+    return {
+        **report,
+        'description': ' '.join(words),
+        'location': f'{x + rng.uniform(-50, 50):.2f} {y + rng.uniform(-50, 50):.2f} {z:.2f}',
+    }
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def check_readd(rng):
+    """Index a report twice with different text, evict it; True if no stale entry is left"""
+    index = bot.MinHashIndex(3)
+    first, second = make_report(rng), make_report(rng)
+    for report in (first, second):
+        index.add(0, bot.report_fingerprint(report), report['map'], bot.parse_location(report['location']), 0)
+    for message_id in range(1, 4):
+        report = make_report(rng)
+        index.add(message_id, bot.report_fingerprint(report), report['map'], bot.parse_location(report['location']), message_id)
+    
+    stale = sum(0 in bucket for bucket in index.buckets.values())
+    try:
+        for report in (first, second):
+            index.query(bot.report_fingerprint(report), report['map'], bot.parse_location(report['location']))
+    except KeyError:
+        stale += 1
+    print(f'Re-add then evict: {len(index)} reports left, {stale} stale bucket entries: {"ok" if not stale else "FAIL"}')
+    return not stale
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    if not check_readd(rng):
+        return False
+    guild_id = 1
+    reports = [make_report(rng) for _ in range(args.reports)]
+    
+    start = time.perf_counter()
+    signatures = [bot.report_fingerprint(report) for report in reports]
+    fingerprint_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for message_id, (report, signature) in enumerate(zip(reports, signatures)):
+        bot.remember_report_fingerprint(guild_id, message_id, signature, report, message_id)
+    build_time = time.perf_counter() - start
+    
+    index = bot.duplicate_indexes[guild_id]
+    print(f'Indexed {len(index)} reports: fingerprints {fingerprint_time:.1f}s '
+          f'({fingerprint_time / args.reports * 1e6:.0f}us each), index {build_time:.1f}s, '
+          f'{len(index.buckets)} buckets')
+    
+    for label, make_query, expect_match in (
+        ('reworded copies', lambda: (lambda i: (reword(reports[i], rng), i))(rng.randrange(args.reports)), True),
+        ('unrelated reports', lambda: (make_report(rng), None), False),
+    ):
+        timings = []
+        correct = 0
+        for _ in range(args.queries):
+            report, original = make_query()
+            signature = bot.report_fingerprint(report)
+            start = time.perf_counter()
+            duplicate = bot.find_duplicate_bug(guild_id, signature, report)
+            timings.append(time.perf_counter() - start)
+            if expect_match:
+                correct += duplicate is not None and duplicate['message_id'] == original
+            else:
+                correct += duplicate is None
+        print(f'{label:>18}: lookup p50 {percentile(timings, 0.5) * 1e6:.0f}us '
+              f'p99 {percentile(timings, 0.99) * 1e6:.0f}us max {max(timings) * 1e6:.0f}us, '
+              f'{correct / args.queries:.1%} {"found" if expect_match else "left alone"}')
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
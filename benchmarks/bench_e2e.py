@@ -0,0 +1,323 @@
+"""End-to-end benchmark of bot.py against an in-process fake of Discord
+
+Run from the repository root:
+    python benchmarks/bench_e2e.py [--reports 500] [--latency 0.05] [--rate-limit 5 --rate-window 1]
+
+Drives the bot's real handlers (on_message, on_message_edit,
+on_raw_reaction_add, /bug_stats, /bug_my_bugs) with every REST call served by
+benchmarks/fake_discord.py, and reports:
+  - ingest: reports/sec, p50/p99 latency from on_message to a finished report,
+    REST calls per report (by route)
+  - worker scaling: a burst of reports at each --scaling worker count, failing
+    (exit status 1) unless throughput grows with INGEST_WORKERS
+  - reactions: renders and REST calls per reaction burst
+  - stats: /bug_stats and /bug_my_bugs time at each --sizes bug count,
+    answered from the warm index, plus a cold rebuild (channel scan) up to
+    --rebuild-max bugs
+
+Reports carry no screenshot or log file, so no CDN downloads are made.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Keep the benchmark from touching the bot's files and from waiting on log files
+os.environ.setdefault('BUG_STATE_FILE', '')
+os.environ.setdefault('LOG_WAIT_SECONDS', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bot as bugbot  # noqa: E402
+from fake_discord import FakeDiscord  # noqa: E402
+
+WORDS = (
+    'player fell through floor wall door stuck clipping texture missing crash freeze enemy spawn '
+    'inside rock water lighting flicker shadow broken ladder climb invisible collision sound loops '
+    'menu button loading save checkpoint inventory quest marker camera jitters sprinting vehicle '
+    'bridge physics npc gate animation frame drops waterfall particles disappear audio desync'
+).split()
+MAPS = ['Highlands', 'Docks', 'Caverns', 'Citadel', 'Marsh']
+STATUS_EMOJI = ['🧑‍💻', '✅', '❌', '⭐']
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def report_embed(rng, index):
+    """An embed as the Unreal plugin posts it"""
+    description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 25)))
+    location = ' '.join(f'{rng.uniform(-50000, 50000):.2f}' for _ in range(3))
+    return {
+        'type': 'rich',
+        'title': 'Bug Report',
+        'description': f'{description} #{index}',
+        'color': 0xe74c3c,
+        'fields': [
+            {'name': 'Response Type', 'value': 'Error / Bug Report', 'inline': True},
+            {'name': 'Map', 'value': rng.choice(MAPS), 'inline': True},
+            {'name': 'User ID', 'value': f'{rng.getrandbits(32):08X}-{index:08X}', 'inline': True},
+            {'name': 'BugItGo', 'value': f'{location} 0.00 90.00 0.00', 'inline': False},
+        ],
+    }
+
+def bug_embed(rng, status):
+    """A bug report embed as the bot itself renders it"""
+    return {
+        'type': 'rich',
+        'title': 'Bug Report',
+        'description': ' '.join(rng.choice(WORDS) for _ in range(12)),
+        'color': 0x95a5a6,
+        'fields': [
+            {'name': 'Type', 'value': 'Error / Bug Report', 'inline': True},
+            {'name': 'Map', 'value': rng.choice(MAPS), 'inline': True},
+            {'name': 'Status', 'value': status, 'inline': True},
+            {'name': 'Assigned to', 'value': 'Unassigned', 'inline': True},
+            {'name': 'Priority', 'value': 'Normal', 'inline': True},
+            {'name': 'Location', 'value': ' '.join(f'{rng.uniform(-50000, 50000):.2f}' for _ in range(3)), 'inline': False},
+        ],
+    }
+
+class FakeResponder:
+    """interaction.response / interaction.followup that record when the reply was sent"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def defer(self, **kwargs):
+        self.interaction.deferred = True
+
+    async def send_message(self, *args, **kwargs):
+        self.interaction.replied_at = time.perf_counter()
+
+    async def send(self, *args, **kwargs):
+        self.interaction.replied_at = time.perf_counter()
+
+class FakeInteraction:
+    """Just the parts of discord.Interaction the slash commands use"""
+
+    def __init__(self, guild, user_id):
+        self.guild = guild
+        self.user = guild.get_member(user_id) or discord_object(user_id)
+        self.response = FakeResponder(self)
+        self.followup = self.response
+        self.extras = {}
+        self.deferred = False
+        self.replied_at = None
+
+def discord_object(user_id):
+    user = bugbot.discord.Object(id=user_id)
+    user.guild_permissions = bugbot.discord.Permissions.all()
+    return user
+
+async def ingest_reports(fake, rng, reports, rate, edit_fraction):
+    """Feed webhook reports through on_message / on_message_edit, returning (elapsed, latencies)"""
+    arrivals = {}
+    latencies = []
+    done = asyncio.Event()
+    original = bugbot.process_webhook_bug_report
+
+    async def timed_process(message):
+        try:
+            return await original(message)
+        finally:
+            latencies.append(time.perf_counter() - arrivals.pop(message.id))
+            if len(latencies) == reports:
+                done.set()
+
+    bugbot.process_webhook_bug_report = timed_process
+    fake.reset_counters()
+    started_at = time.perf_counter()
+    try:
+        for index in range(reports):
+            embed = report_embed(rng, index)
+            if rng.random() < edit_fraction:
+                # The plugin posts first, then edits the embed in
+                payload = fake.webhook_message()
+                before = fake.build_message(payload)
+                arrivals[before.id] = time.perf_counter()
+                await bugbot.on_message(before)
+                payload['embeds'] = [embed]
+                await bugbot.on_message_edit(before, fake.build_message(payload))
+            else:
+                message = fake.build_message(fake.webhook_message(embeds=[embed]))
+                arrivals[message.id] = time.perf_counter()
+                await bugbot.on_message(message)
+            if rate:
+                await asyncio.sleep(1 / rate)
+        await done.wait()
+    finally:
+        bugbot.process_webhook_bug_report = original
+    return time.perf_counter() - started_at, latencies
+
+async def run_ingest(fake, rng, reports, rate, edit_fraction):
+    """Time webhook reports from arrival to a finished report"""
+    elapsed, latencies = await ingest_reports(fake, rng, reports, rate, edit_fraction)
+    print(f'\nIngest: {reports} reports in {elapsed:.2f}s = {reports / elapsed:.1f} reports/sec')
+    print(f'  latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms  p99 {percentile(latencies, 0.99) * 1000:.0f}ms  '
+          f'max {max(latencies) * 1000:.0f}ms')
+    print_calls(fake, reports, 'report')
+
+async def run_scaling(fake, rng, reports, worker_counts):
+    """Ingest the same burst at each worker count; True if throughput grew with the workers"""
+    print(f'\nWorker scaling ({reports} reports at once):')
+    configured = bugbot.INGEST_WORKERS
+    throughput = []
+    try:
+        for workers in worker_counts:
+            bugbot.stop_ingest_workers(fake.guild_id)
+            bugbot.INGEST_WORKERS = workers
+            elapsed, _ = await ingest_reports(fake, rng, reports, 0, 0)
+            throughput.append(reports / elapsed)
+            print(f'  {workers:>3} workers: {throughput[-1]:.1f} reports/sec')
+    finally:
+        bugbot.stop_ingest_workers(fake.guild_id)
+        bugbot.INGEST_WORKERS = configured
+    
+    # Players are spread over the workers, so more workers should mean clearly more throughput
+    scaled = throughput[-1] >= 1.5 * throughput[0]
+    print(f'  {throughput[-1] / throughput[0]:.1f}x from {worker_counts[0]} to {worker_counts[-1]} workers: '
+          f'{"ok" if scaled else "FAIL, ingest does not scale with INGEST_WORKERS"}')
+    return scaled
+
+async def run_reactions(fake, rng, reactions):
+    """Staff reacting to the new bug reports, then waiting for the re-renders"""
+    bugs = list(bugbot.bug_index.get(fake.guild_id, {}))
+    if not bugs:
+        return
+    renders_before = bugbot.reaction_stats['renders']
+    fake.reset_counters()
+    started_at = time.perf_counter()
+    for _ in range(reactions):
+        payload = fake.add_user_reaction(rng.choice(bugs), rng.choice(STATUS_EMOJI), rng.randint(1000, 1010))
+        await bugbot.on_raw_reaction_add(payload)
+    while bugbot.pending_embed_updates:
+        await asyncio.gather(*list(bugbot.pending_embed_updates.values()), return_exceptions=True)
+    elapsed = time.perf_counter() - started_at
+
+    renders = bugbot.reaction_stats['renders'] - renders_before
+    print(f'\nReactions: {reactions} reactions on {len(bugs)} bugs in {elapsed:.2f}s, {renders} renders')
+    print_calls(fake, reactions, 'reaction')
+
+def populate_channel(fake, rng, size):
+    """Fill the bug channel with already posted bug reports"""
+    fake.clear()
+    bugbot.drop_bug_index(fake.guild_id)
+    bugbot.message_cache.clear()
+    assignee_ids = list(range(2000, 2050))
+    for _ in range(size):
+        status = rng.choice(['New', 'New', 'In Progress', 'Fixed', "Won't Fix"])
+        payload = fake.bot_message(fake.channel_id, [bug_embed(rng, status)])
+        message_id = int(payload['id'])
+        for emoji in STATUS_EMOJI:
+            fake.reactions.setdefault(message_id, {})[emoji] = [fake.bot_user_id]
+        if status == 'In Progress':
+            fake.reactions[message_id][STATUS_EMOJI[0]].append(rng.choice(assignee_ids))
+        elif status == 'Fixed':
+            fake.reactions[message_id]['✅'].append(rng.choice(assignee_ids))
+        elif status == "Won't Fix":
+            fake.reactions[message_id]['❌'].append(rng.choice(assignee_ids))
+
+def populate_index(fake, rng, size):
+    """Fill the bug index directly (what a finished scan or snapshot leaves behind)"""
+    bugbot.drop_bug_index(fake.guild_id)
+    for message_id in range(1, size + 1):
+        status = rng.choice(['New', 'New', 'In Progress', 'Fixed', "Won't Fix"])
+        assignees = [rng.randint(2000, 2049)] if status == 'In Progress' else []
+        bugbot.index_bug_record(fake.guild_id, {
+            'message_id': message_id, 'channel_id': fake.channel_id, 'thread_id': message_id,
+            'title': 'Bug Report', 'status': status, 'high_priority': rng.random() < 0.1,
+            'type': 'Error / Bug Report', 'map': rng.choice(MAPS), 'assignee_id': assignees[0] if assignees else 0,
+            'assignees': assignees, 'location': None,
+        })
+    bugbot.bug_index_ready.add(fake.guild_id)
+
+async def time_command(command, fake, user_id=2000, repeat=1, **options):
+    timings = []
+    for _ in range(repeat):
+        interaction = FakeInteraction(fake.guild, user_id)
+        started_at = time.perf_counter()
+        await command.callback(interaction, **options)
+        timings.append((interaction.replied_at or time.perf_counter()) - started_at)
+    return timings
+
+async def run_stats(fake, rng, sizes, rebuild_max, repeat):
+    print('\nStats commands:')
+    for size in sizes:
+        line = f'  {size:>7} bugs:'
+        if size <= rebuild_max:
+            populate_channel(fake, rng, size)
+            fake.reset_counters()
+            (cold,) = await time_command(bugbot.bug_stats, fake, rebuild=True)
+            line += f'  /bug_stats rebuild {cold:.2f}s ({sum(fake.calls.values())} REST calls)'
+        else:
+            populate_index(fake, rng, size)
+        fake.reset_counters()
+        stats = await time_command(bugbot.bug_stats, fake, repeat=repeat)
+        my_bugs = await time_command(bugbot.bug_my_bugs, fake, repeat=repeat)
+        line += (f'  /bug_stats warm p50 {percentile(stats, 0.5) * 1000:.2f}ms'
+                 f'  /bug_my_bugs warm p50 {percentile(my_bugs, 0.5) * 1000:.2f}ms'
+                 f'  ({sum(fake.calls.values())} REST calls)')
+        print(line)
+
+def print_calls(fake, count, unit):
+    total = sum(fake.calls.values())
+    print(f'  {total / count:.2f} REST calls per {unit}', end='')
+    if fake.rate_limited:
+        print(f', {fake.rate_limited} rate limited ({fake.rate_limit_wait:.1f}s waiting)', end='')
+    print()
+    for route, calls in fake.calls.most_common():
+        print(f'    {calls / count:6.2f}  {route}')
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=500, help='Webhook reports to ingest')
+    parser.add_argument('--rate', type=float, default=0, help='Report arrivals per second (0 = all at once)')
+    parser.add_argument('--edit-fraction', type=float, default=0.1, help='Share of reports arriving via on_message_edit')
+    parser.add_argument('--scaling', default='1,4', help='Worker counts to compare ingest throughput at (empty = skip)')
+    parser.add_argument('--scaling-reports', type=int, default=100, help='Reports per worker scaling burst')
+    parser.add_argument('--reactions', type=int, default=1000, help='Raw reaction events after ingest')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Bug counts for the stats commands')
+    parser.add_argument('--rebuild-max', type=int, default=10000, help='Largest size to also time a cold rebuild at')
+    parser.add_argument('--repeat', type=int, default=20, help='Warm stats command runs per size')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per REST call')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Calls per window per route and channel (0 = none)')
+    parser.add_argument('--rate-window', type=float, default=1.0, help='Rate limit window in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fake = FakeDiscord(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window, seed=args.seed)
+    fake.install(bugbot.bot)
+    bugbot.install_rest_scheduler(bugbot.bot)
+    # Set directly so the benchmark doesn't write the guild config file
+    bugbot.guild_channels[fake.guild_id] = fake.channel_id
+    bugbot.bug_index_ready.add(fake.guild_id)
+
+    print(f'Simulated latency {args.latency * 1000:.0f}ms per call, '
+          f'rate limit {f"{args.rate_limit}/{args.rate_window:g}s" if args.rate_limit else "none"}, '
+          f'{bugbot.INGEST_WORKERS} ingest workers, REST concurrency {bugbot.REST_CONCURRENCY}')
+
+    if args.reports:
+        await run_ingest(fake, rng, args.reports, args.rate, args.edit_fraction)
+    worker_counts = [int(count) for count in args.scaling.split(',') if count]
+    scaled = True
+    if len(worker_counts) > 1:
+        scaled = await run_scaling(fake, rng, args.scaling_reports, worker_counts)
+    if args.reactions:
+        await run_reactions(fake, rng, args.reactions)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    if sizes:
+        await run_stats(fake, rng, sizes, args.rebuild_max, args.repeat)
+
+    for tasks in bugbot.ingest_workers.values():
+        for task in tasks:
+            task.cancel()
+    return scaled
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.run(main()) else 1)
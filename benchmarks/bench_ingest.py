@@ -0,0 +1,185 @@
+"""Benchmark the HTTP ingest endpoint against an in-process fake of Discord
+
+Run from the repository root:
+    python benchmarks/bench_ingest.py [--reports 200] [--concurrency 20] [--latency 0.05]
+
+Starts the bot's real ingest server on localhost (REST calls served by
+benchmarks/fake_discord.py) and reports:
+  - ingest: direct reports (screenshot + log file) posted by concurrent
+    clients, accepted/sec, time until all were posted to the channel, and
+    REST calls per report
+  - budget: a webhook report is left relaying its log file from a slow fake
+    CDN while direct reports are queued until the ingest budget is full.
+    Fails (exit status 1) unless the full budget is answered with a prompt
+    503 and the report in progress still completes
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import aiohttp
+from aiohttp import web
+
+# Keep the benchmark from touching the bot's files and from waiting on log files
+os.environ.setdefault('BUG_STATE_FILE', '')
+os.environ.setdefault('LOG_WAIT_SECONDS', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bot as bugbot  # noqa: E402
+from fake_discord import FakeDiscord  # noqa: E402
+from bench_e2e import print_calls, report_embed  # noqa: E402
+
+def report_form(rng, index, screenshot_bytes, log_bytes, player_id=None):
+    """A multipart request as the plugin would send it"""
+    embed = report_embed(rng, index)
+    if player_id:
+        embed['fields'][2]['value'] = player_id
+    embed['image'] = {'url': 'attachment://screenshot.png'}
+    form = aiohttp.FormData()
+    form.add_field('payload_json', json.dumps({'username': 'UE Plugin', 'embeds': [embed]}),
+                   content_type='application/json')
+    form.add_field('files[0]', b'\x89PNG' + bytes(screenshot_bytes), filename='screenshot.png')
+    form.add_field('files[1]', b'log line\n' * (log_bytes // 9), filename='Game.log')
+    return form
+
+async def post_report(session, url, token, form):
+    """POST one report, returning its HTTP status"""
+    async with session.post(url, data=form, headers={'Authorization': f'Bearer {token}'}) as resp:
+        await resp.read()
+        return resp.status
+
+async def wait_for_ingest(timeout):
+    """Wait for the ingest queues to drain and their workers to go idle; False on timeout"""
+    deadline = time.perf_counter() + timeout
+    while bugbot.ingest_stats['processed'] + bugbot.ingest_stats['failed'] < bugbot.ingest_stats['enqueued']:
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+async def run_ingest(fake, session, url, token, args):
+    """Concurrent clients posting direct reports"""
+    rng = random.Random(args.seed)
+    statuses = Counter()
+    next_index = iter(range(args.reports))
+
+    async def client():
+        for index in next_index:
+            statuses[await post_report(session, url, token, report_form(rng, index, args.screenshot, args.log))] += 1
+
+    fake.reset_counters()
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    accepted_in = time.perf_counter() - started_at
+    await wait_for_ingest(600)
+    elapsed = time.perf_counter() - started_at
+
+    print(f'\nIngest: {args.reports} reports from {args.concurrency} clients, accepted in {accepted_in:.2f}s '
+          f'({args.reports / accepted_in:.1f}/sec), all posted after {elapsed:.2f}s ({args.reports / elapsed:.1f}/sec)')
+    print(f'  responses: {", ".join(f"{count} x {status}" for status, count in sorted(statuses.items()))}')
+    if statuses[202]:
+        print_calls(fake, statuses[202], 'report')
+
+async def run_budget_check(fake, session, url, token, cdn_url, args):
+    """Fill the ingest budget behind a report that is still relaying; True if nothing got stuck"""
+    rng = random.Random(args.seed)
+    request_bytes = args.screenshot + args.log
+    # Small budgets, so a handful of queued reports fill them. Queued reports used
+    # to be charged to the relay budget, which deadlocked the relay below
+    bugbot.ingest_budget.limit = bugbot.relay_budget.limit = 4 * request_bytes
+
+    # A webhook report whose log file is slow to download. The direct reports come
+    # from the same player, so they queue on its worker
+    log_attachment = fake.attachment_payload('Game.log', request_bytes)
+    log_attachment['url'] = log_attachment['proxy_url'] = cdn_url
+    embed = report_embed(rng, 0)
+    player_id = embed['fields'][2]['value']
+    webhook_report = fake.build_message(fake.webhook_message(embeds=[embed], attachments=[log_attachment]))
+    await bugbot.on_message(webhook_report)
+
+    statuses = []
+    rejected_in = None
+    for index in range(1, 100):
+        form = report_form(rng, index, args.screenshot, args.log, player_id)
+        started_at = time.perf_counter()
+        statuses.append(await post_report(session, url, token, form))
+        if statuses[-1] == 503:
+            rejected_in = time.perf_counter() - started_at
+            break
+    queued = statuses.count(202)
+
+    completed = await wait_for_ingest(args.check_timeout)
+    # The webhook report's own attachment, relayed into its thread
+    log_posted = any(payload['content'].startswith('**Attachment:** Game.log') for payload in fake.messages.values())
+    leaked = bugbot.ingest_budget.in_use + bugbot.relay_budget.in_use
+
+    ok = rejected_in is not None and rejected_in < 1 and completed and log_posted and not leaked
+    print(f'\nBudget check (player {player_id}): {queued} reports queued before a '
+          f'{"503 after " + format(rejected_in * 1000, ".0f") + "ms" if rejected_in is not None else "full budget was never reported"}, '
+          f'report in progress {"completed" if completed and log_posted else "STUCK"}, '
+          f'{leaked} bytes left reserved: {"ok" if ok else "FAIL"}')
+    return ok
+
+async def serve_slow_file(request):
+    """The fake CDN: a log file that takes a while to arrive"""
+    await asyncio.sleep(request.app['delay'])
+    return web.Response(body=b'log line\n' * (request.app['size'] // 9))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=200, help='Direct reports to post (0 = only the budget check)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Clients posting at once')
+    parser.add_argument('--screenshot', type=int, default=200 * 1024, help='Screenshot bytes per report')
+    parser.add_argument('--log', type=int, default=50 * 1024, help='Log file bytes per report')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per REST call')
+    parser.add_argument('--cdn-delay', type=float, default=1.0, help='Seconds the fake CDN takes per download')
+    parser.add_argument('--check-timeout', type=float, default=30, help='Seconds before the budget check fails')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(latency=args.latency, seed=args.seed)
+    fake.install(bugbot.bot)
+    bugbot.install_rest_scheduler(bugbot.bot)
+    # Set directly so the benchmark doesn't write the guild config or token files
+    bugbot.guild_channels[fake.guild_id] = fake.channel_id
+    bugbot.bug_index_ready.add(fake.guild_id)
+    token = 'benchmark-token'
+    bugbot.ingest_tokens[fake.guild_id] = bugbot.hash_ingest_token(token)
+    bugbot.ingest_token_guilds[bugbot.hash_ingest_token(token)] = fake.guild_id
+
+    bugbot.INGEST_HOST, bugbot.INGEST_PORT = '127.0.0.1', args.port
+    ingest_runner = await bugbot.start_ingest_server()
+    cdn = web.Application()
+    cdn['delay'], cdn['size'] = args.cdn_delay, args.screenshot + args.log
+    cdn.router.add_get('/Game.log', serve_slow_file)
+    cdn_runner = web.AppRunner(cdn, access_log=None)
+    await cdn_runner.setup()
+    await web.TCPSite(cdn_runner, '127.0.0.1', args.port + 1).start()
+    bugbot.http_session = bugbot.create_http_session()
+
+    url = f'http://127.0.0.1:{args.port}/report'
+    print(f'Simulated latency {args.latency * 1000:.0f}ms per call, {bugbot.INGEST_WORKERS} ingest workers, '
+          f'{(args.screenshot + args.log) // 1024} KB per report')
+    try:
+        async with aiohttp.ClientSession() as session:
+            if args.reports:
+                await run_ingest(fake, session, url, token, args)
+            ok = await run_budget_check(fake, session, url, token, f'http://127.0.0.1:{args.port + 1}/Game.log', args)
+    finally:
+        for tasks in bugbot.ingest_workers.values():
+            for task in tasks:
+                task.cancel()
+        await bugbot.http_session.close()
+        await cdn_runner.cleanup()
+        await ingest_runner.cleanup()
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,344 @@
+"""In-process stand-in for Discord, for benchmarking bot.py without a real guild
+
+FakeDiscord replaces the bot's HTTP client request method, so every REST call
+bot.py makes goes through the real discord.py models and the bot's own REST
+scheduler, and lands here instead of on discord.com. Messages, threads and
+reactions are kept in memory and returned as real API payloads. Each call
+waits a simulated latency, and per-route buckets simulate Discord's rate
+limits by making over-limit calls wait for the next window, the way
+discord.py does after a 429.
+
+Gateway events are not simulated; benchmarks build discord.Message and raw
+event objects from stored payloads and call the bot's handlers directly.
+"""
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+import discord
+
+DISCORD_EPOCH = 1420070400000
+ALL_PERMISSIONS = str((1 << 53) - 1)
+
+class FakeResponse:
+    """Just enough of an aiohttp response for discord.HTTPException"""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+def user_payload(user_id, name, bot=False):
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': None, 'avatar': None, 'bot': bot}
+
+class FakeDiscord:
+    """In-memory guild with one bug channel, served through the bot's HTTP client"""
+
+    def __init__(self, latency=0.05, jitter=0.5, rate_limit=0, rate_window=1.0, seed=1):
+        self.latency = latency  # Seconds per REST call, before jitter
+        self.jitter = jitter  # Each call takes latency * (1 +/- jitter)
+        self.rate_limit = rate_limit  # Calls per rate_window per route and channel (0 = unlimited)
+        self.rate_window = rate_window
+        self.rng = random.Random(seed)
+        self._sequence = itertools.count()
+
+        self.bot_user_id = self.snowflake()
+        self.guild_id = self.snowflake()
+        self.channel_id = self.snowflake()
+        self.webhook_id = self.snowflake()
+
+        self.messages = {}  # message_id -> payload
+        self.channel_messages = {}  # channel_id -> sorted list of message_ids
+        self.reactions = {}  # message_id -> {emoji: list of user_ids, in reaction order}
+        self.channels = {}  # channel_id -> channel/thread payload
+
+        self.calls = Counter()  # route key -> calls
+        self.rate_limited = 0  # Calls that had to wait for a rate limit window
+        self.rate_limit_wait = 0.0
+        self._buckets = {}  # (route key, channel) -> [window end, calls left]
+        self._patterns = {}
+
+    # ---- ids and payloads ----
+
+    def snowflake(self, when=None):
+        ms = int((when if when is not None else time.time()) * 1000)
+        return ((ms - DISCORD_EPOCH) << 22) | (next(self._sequence) & 0x3FFFFF)
+
+    @staticmethod
+    def timestamp(snowflake_id):
+        ms = (snowflake_id >> 22) + DISCORD_EPOCH
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+    def guild_payload(self):
+        channel = {
+            'id': str(self.channel_id), 'type': 0, 'guild_id': str(self.guild_id), 'name': 'bug-reports',
+            'position': 0, 'permission_overwrites': [], 'nsfw': False, 'parent_id': None,
+            'topic': None, 'last_message_id': None, 'rate_limit_per_user': 0,
+        }
+        self.channels[self.channel_id] = channel
+        return {
+            'id': str(self.guild_id), 'name': 'Benchmark Guild', 'owner_id': str(self.bot_user_id),
+            'roles': [{
+                'id': str(self.guild_id), 'name': '@everyone', 'permissions': ALL_PERMISSIONS,
+                'position': 0, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False,
+            }],
+            'channels': [channel],
+            'members': [{
+                'user': user_payload(self.bot_user_id, 'BugBot', bot=True), 'roles': [],
+                'joined_at': self.timestamp(self.bot_user_id), 'deaf': False, 'mute': False, 'flags': 0,
+            }],
+            'emojis': [], 'stickers': [], 'features': [], 'member_count': 1,
+            'verification_level': 0, 'default_message_notifications': 0, 'explicit_content_filter': 0,
+            'mfa_level': 0, 'premium_tier': 0, 'nsfw_level': 0, 'preferred_locale': 'en-US',
+        }
+
+    def install(self, client):
+        """Point a discord.py client at this fake (call before the bot wraps http.request)"""
+        state = client._connection
+        state.user = discord.ClientUser(state=state, data={
+            **user_payload(self.bot_user_id, 'BugBot', bot=True), 'verified': True, 'mfa_enabled': False, 'flags': 0,
+        })
+        guild = discord.Guild(data=self.guild_payload(), state=state)
+        state._add_guild(guild)
+        client.http.request = self.request
+        self.client = client
+        self.guild = guild
+        self.channel = guild.get_channel(self.channel_id)
+        return guild
+
+    def store_message(self, payload):
+        message_id = int(payload['id'])
+        channel_id = int(payload['channel_id'])
+        self.messages[message_id] = payload
+        bisect.insort(self.channel_messages.setdefault(channel_id, []), message_id)
+        return payload
+
+    def message_payload(self, channel_id, author, content='', embeds=None, attachments=None, message_id=None, webhook=None):
+        message_id = message_id or self.snowflake()
+        payload = {
+            'id': str(message_id), 'channel_id': str(channel_id), 'guild_id': str(self.guild_id),
+            'author': author, 'content': content, 'timestamp': self.timestamp(message_id),
+            'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [],
+            'mention_roles': [], 'attachments': attachments or [], 'embeds': embeds or [],
+            'pinned': False, 'type': 0, 'flags': 0,
+        }
+        if webhook:
+            payload['webhook_id'] = str(webhook)
+        return payload
+
+    def webhook_message(self, embeds=None, attachments=None, webhook_id=None, name='Bug Reporter', when=None):
+        """A message as the game's webhook would post it in the bug channel
+
+        when sets the message's creation time (default now).
+        """
+        webhook_id = webhook_id or self.webhook_id
+        author = user_payload(webhook_id, name, bot=True)
+        payload = self.message_payload(self.channel_id, author, embeds=embeds, attachments=attachments,
+                                       message_id=self.snowflake(when), webhook=webhook_id)
+        return self.store_message(payload)
+
+    def attachment_payload(self, filename, size, content_type=None):
+        """A file attached to a message (its URL is not served)"""
+        attachment_id = self.snowflake()
+        url = f'https://cdn.invalid/attachments/{self.channel_id}/{attachment_id}/{filename}'
+        return {
+            'id': str(attachment_id), 'filename': filename, 'size': size,
+            'url': url, 'proxy_url': url, 'content_type': content_type,
+        }
+
+    def bot_message(self, channel_id, embeds, message_id=None):
+        """A message as if the bot had posted it earlier (for pre-populating a channel)"""
+        author = user_payload(self.bot_user_id, 'BugBot', bot=True)
+        return self.store_message(self.message_payload(channel_id, author, embeds=embeds, message_id=message_id))
+
+    def build_message(self, payload):
+        """A discord.Message for a stored payload, as the gateway would deliver it"""
+        channel = self.client.get_channel(int(payload['channel_id'])) or self.channel
+        return discord.Message(state=self.client._connection, channel=channel, data=self._with_reactions(payload))
+
+    def add_user_reaction(self, message_id, emoji, user_id):
+        """A user reacting, returning the raw gateway event for it"""
+        users = self.reactions.setdefault(message_id, {}).setdefault(emoji, [])
+        if user_id not in users:
+            users.append(user_id)
+        payload = self.messages[message_id]
+        return discord.RawReactionActionEvent({
+            'message_id': payload['id'], 'channel_id': payload['channel_id'], 'guild_id': str(self.guild_id),
+            'user_id': str(user_id), 'type': 0, 'burst': False,
+        }, discord.PartialEmoji(name=emoji), 'REACTION_ADD')
+
+    def _with_reactions(self, payload):
+        message_id = int(payload['id'])
+        reactions = []
+        for emoji, users in self.reactions.get(message_id, {}).items():
+            if users:
+                reactions.append({
+                    'emoji': {'id': None, 'name': emoji}, 'count': len(users), 'me': self.bot_user_id in users,
+                    'me_burst': False, 'count_details': {'burst': 0, 'normal': len(users)}, 'burst_colors': [],
+                })
+        thread = self.channels.get(message_id)
+        result = {**payload, 'reactions': reactions}
+        if thread is not None and thread.get('type') == 11:
+            result['thread'] = thread
+        return result
+
+    def clear(self):
+        """Forget all messages, threads and counters (keeps the guild and channel)"""
+        self.messages.clear()
+        self.channel_messages.clear()
+        self.reactions.clear()
+        for channel_id in [c for c in self.channels if c != self.channel_id]:
+            del self.channels[channel_id]
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0
+
+    # ---- HTTP layer ----
+
+    def _match(self, route):
+        pattern = self._patterns.get(route.path)
+        if pattern is None:
+            regex = re.sub(r'\\\{(\w+)\\\}', r'(?P<\1>[^/]+)', re.escape(route.path))
+            pattern = self._patterns[route.path] = re.compile(regex + '$')
+        match = pattern.search(route.url.split('?')[0])
+        return {k: unquote(v) for k, v in match.groupdict().items()} if match else {}
+
+    async def _wait_for_rate_limit(self, route):
+        if self.rate_limit <= 0:
+            return
+        key = (route.key, route.major_parameters)
+        while True:
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None or now >= bucket[0]:
+                bucket = self._buckets[key] = [now + self.rate_window, self.rate_limit]
+            if bucket[1] > 0:
+                bucket[1] -= 1
+                return
+            self.rate_limited += 1
+            self.rate_limit_wait += bucket[0] - now
+            await asyncio.sleep(bucket[0] - now)
+
+    @staticmethod
+    def _body(json_body, form):
+        if json_body is not None:
+            return json_body
+        for part in form or ():
+            if part.get('name') == 'payload_json':
+                return json.loads(part['value'])
+        return {}
+
+    def _not_found(self):
+        return discord.NotFound(FakeResponse(404, 'Not Found'), {'code': 10008, 'message': 'Unknown Message'})
+
+    async def request(self, route, *, files=None, form=None, json=None, params=None, reason=None, **kwargs):
+        self.calls[route.key] += 1
+        await self._wait_for_rate_limit(route)
+        if self.latency:
+            await asyncio.sleep(self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+        args = self._match(route)
+        channel_id = int(args['channel_id']) if 'channel_id' in args else None
+        message_id = int(args['message_id']) if 'message_id' in args else None
+        body = self._body(json, form)
+        key = route.key
+
+        if key == 'POST /channels/{channel_id}/messages':
+            author = user_payload(self.bot_user_id, 'BugBot', bot=True)
+            attachments = [
+                {'id': str(self.snowflake()), 'filename': f.filename, 'size': 0, 'url': f'https://cdn.invalid/{f.filename}',
+                 'proxy_url': f'https://cdn.invalid/{f.filename}'}
+                for f in files or ()
+            ]
+            payload = self.message_payload(channel_id, author, content=body.get('content') or '',
+                                           embeds=body.get('embeds'), attachments=attachments)
+            return self._with_reactions(self.store_message(payload))
+
+        if key == 'POST /channels/{channel_id}/messages/{message_id}/threads':
+            thread = {
+                'id': str(message_id), 'type': 11, 'guild_id': str(self.guild_id), 'parent_id': str(channel_id),
+                'owner_id': str(self.bot_user_id), 'name': body.get('name', 'thread'), 'message_count': 0,
+                'member_count': 1, 'rate_limit_per_user': 0, 'flags': 0,
+                'thread_metadata': {
+                    'archived': False, 'locked': False, 'auto_archive_duration': body.get('auto_archive_duration', 1440),
+                    'archive_timestamp': self.timestamp(message_id),
+                },
+            }
+            self.channels[message_id] = thread
+            return thread
+
+        if key == 'PUT /channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me':
+            users = self.reactions.setdefault(message_id, {}).setdefault(args['emoji'], [])
+            if self.bot_user_id not in users:
+                users.append(self.bot_user_id)
+            return None
+
+        if key == 'GET /channels/{channel_id}/messages/{message_id}/reactions/{emoji}':
+            users = self.reactions.get(message_id, {}).get(args['emoji'], [])
+            after = int((params or {}).get('after') or 0)
+            limit = int((params or {}).get('limit') or 100)
+            selected = sorted(u for u in users if u > after)[:limit]
+            return [user_payload(u, f'user{u}', bot=(u == self.bot_user_id)) for u in selected]
+
+        if key == 'GET /channels/{channel_id}/messages/{message_id}':
+            payload = self.messages.get(message_id)
+            if payload is None or int(payload['channel_id']) != channel_id:
+                raise self._not_found()
+            return self._with_reactions(payload)
+
+        if key == 'PATCH /channels/{channel_id}/messages/{message_id}':
+            payload = self.messages.get(message_id)
+            if payload is None:
+                raise self._not_found()
+            for field in ('content', 'embeds'):
+                if field in body:
+                    payload[field] = body[field]
+            payload['edited_timestamp'] = datetime.now(timezone.utc).isoformat()
+            return self._with_reactions(payload)
+
+        if key.startswith('DELETE /channels/{channel_id}/messages/{message_id}'):
+            payload = self.messages.pop(message_id, None)
+            if payload is None:
+                raise self._not_found()
+            self.reactions.pop(message_id, None)
+            ids = self.channel_messages.get(int(payload['channel_id']), [])
+            position = bisect.bisect_left(ids, message_id)
+            if position < len(ids) and ids[position] == message_id:
+                del ids[position]
+            return None
+
+        if key == 'GET /channels/{channel_id}/messages':
+            return self._history(channel_id, params or {})
+
+        if key == 'GET /channels/{channel_id}':
+            channel = self.channels.get(channel_id)
+            if channel is None:
+                raise discord.NotFound(FakeResponse(404, 'Not Found'), {'code': 10003, 'message': 'Unknown Channel'})
+            return channel
+
+        if key == 'DELETE /channels/{channel_id}':
+            return self.channels.pop(channel_id, None)
+
+        # Anything else (typing, thread members, ...) just succeeds
+        return None
+
+    def _history(self, channel_id, params):
+        ids = self.channel_messages.get(channel_id, [])
+        limit = int(params.get('limit') or 50)
+        if params.get('after') is not None:
+            start = bisect.bisect_right(ids, int(params['after']))
+            selected = ids[start:start + limit]
+        else:
+            end = bisect.bisect_left(ids, int(params['before'])) if params.get('before') is not None else len(ids)
+            selected = ids[max(0, end - limit):end]
+        # Discord always returns newest first
+        return [self._with_reactions(self.messages[i]) for i in reversed(selected)]
@@ -0,0 +1,227 @@
+"""Replay captured webhook traffic through bot.py against a fake Discord
+
+Capture traffic by running the bot with CAPTURE_FILE=captures.jsonl, then
+run from the repository root:
+    python benchmarks/replay_captures.py captures.jsonl [--speed 1] [--latency 0.05]
+
+Two passes over the capture:
+  - parser: every captured embed through parse_plugin_embed, reporting
+    embeds/sec and how many lacked each field (to spot parser regressions)
+  - pipeline: the messages replayed through on_message / on_message_edit in
+    their captured order and spacing (--speed 10 plays ten times faster,
+    0 as fast as possible), with REST calls served by
+    benchmarks/fake_discord.py. Reports ingest latency, how log files were
+    associated (with their report, late, or never) and REST calls per report.
+
+--speed compresses message creation times along with arrivals, the way a
+busier server would send the same reports closer together, so log files are
+matched under the tighter spacing. Screenshots and log files are not
+downloaded: embed images are dropped, and log files are counted where the bot
+would copy them into the thread.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+# Keep the replay from touching the bot's files
+os.environ.setdefault('BUG_STATE_FILE', '')
+os.environ['CAPTURE_FILE'] = ''
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bot as bugbot  # noqa: E402
+from fake_discord import FakeDiscord  # noqa: E402
+from bench_e2e import percentile, print_calls  # noqa: E402
+
+PARSED_FIELDS = ('response_type', 'map', 'user_id', 'location')
+
+def load_captures(path, guild_id=None):
+    """Captured entries in arrival order, optionally from one guild only"""
+    entries = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f'Skipping unreadable line {line_number}')
+                continue
+            if guild_id is None or entry['guild'] == guild_id:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry['received'])
+    return entries
+
+def run_parser(entries, repeat):
+    """Time parse_plugin_embed over every captured embed"""
+    embeds = [bugbot.discord.Embed.from_dict(data) for entry in entries for data in entry['embeds']]
+    if not embeds:
+        print('\nParser: no embeds in the capture')
+        return
+
+    missing = Counter()
+    for embed in embeds:
+        parsed = bugbot.parse_plugin_embed(embed)
+        missing.update(field for field in PARSED_FIELDS if not parsed[field])
+
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for embed in embeds:
+            bugbot.parse_plugin_embed(embed)
+    elapsed = time.perf_counter() - started_at
+    parsed_count = len(embeds) * repeat
+
+    print(f'\nParser: {len(embeds)} embeds x {repeat} = {parsed_count / elapsed:,.0f} embeds/sec '
+          f'({elapsed / parsed_count * 1e6:.1f}us each)')
+    for field in PARSED_FIELDS:
+        if missing[field]:
+            print(f'  {missing[field]} embeds without {field}')
+
+def replay_embeds(entry):
+    """Captured embeds, minus images (their CDN links have expired)"""
+    return [{key: value for key, value in data.items() if key != 'image'} for data in entry['embeds']]
+
+async def run_pipeline(fake, entries, speed):
+    """Replay the capture through the bot's handlers and report how it went"""
+    payloads = {}  # captured message ID -> fake payload
+    arrivals = {}
+    latencies = []
+    in_flight = [0]
+    log_files = Counter()  # 'moved' (all copied into threads) / 'late' (after their report finished)
+    captured_logs = sum(1 for entry in entries if entry['attachments'] and not entry['embeds'])
+    original_process = bugbot.process_webhook_bug_report
+    original_relay = bugbot.relay_attachments
+    original_late = bugbot.move_late_log_file
+
+    async def timed_process(message):
+        in_flight[0] += 1
+        try:
+            return await original_process(message)
+        finally:
+            in_flight[0] -= 1
+            # Throttled and blocked reports never get here, so their arrivals are left behind.
+            # A report queued twice (edited before it was processed) only has one arrival
+            arrived_at = arrivals.pop(message.id, None)
+            if arrived_at is not None:
+                latencies.append(time.perf_counter() - arrived_at)
+
+    async def counted_relay(thread, attachments, label):
+        if label == 'Log File':
+            log_files['moved'] += len(attachments)
+        return len(attachments)
+
+    async def counted_late(thread_id, log_message):
+        log_files['late'] += len(log_message.attachments)
+        return await original_late(thread_id, log_message)
+
+    bugbot.process_webhook_bug_report = timed_process
+    bugbot.relay_attachments = counted_relay
+    bugbot.move_late_log_file = counted_late
+    fake.reset_counters()
+    first = entries[0]['received']
+    span = entries[-1]['received'] - first
+    wall_start = time.time()
+    started_at = time.perf_counter()
+    try:
+        for entry in entries:
+            offset = (entry['received'] - first) / speed if speed else 0
+            delay = started_at + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            created = wall_start + (entry['created'] - first) / speed if speed else None
+            attachments = [
+                fake.attachment_payload(item['filename'], item['size'], item.get('content_type'))
+                for item in entry['attachments']
+            ]
+            if entry['event'] == 'edit':
+                payload = payloads.get(entry['message'])
+                if payload is None:
+                    # Posted before the capture started
+                    payload = fake.webhook_message(attachments=attachments, webhook_id=entry['webhook'],
+                                                   name=entry['author'], when=created)
+                before = fake.build_message(payload)
+                payload['embeds'] = replay_embeds(entry)
+                payload['attachments'] = attachments
+                after = fake.build_message(payload)
+                arrivals[after.id] = time.perf_counter()
+                await bugbot.on_message_edit(before, after)
+            else:
+                payload = fake.webhook_message(embeds=replay_embeds(entry), attachments=attachments,
+                                               webhook_id=entry['webhook'], name=entry['author'], when=created)
+                payloads[entry['message']] = payload
+                message = fake.build_message(payload)
+                if entry['embeds']:
+                    arrivals[message.id] = time.perf_counter()
+                await bugbot.on_message(message)
+
+        while in_flight[0] or bugbot.get_ingest_depth():
+            await asyncio.sleep(0.01)
+    finally:
+        bugbot.process_webhook_bug_report = original_process
+        bugbot.relay_attachments = original_relay
+        bugbot.move_late_log_file = original_late
+    elapsed = time.perf_counter() - started_at
+
+    reports = len(latencies)
+    unmatched = sum(len(pending) for pending in bugbot.pending_log_files.values())
+    throttled = sum(bucket.denied for _, _, bucket in bugbot.get_throttled(fake.guild_id))
+    print(f'\nPipeline: {len(entries)} messages spanning {span:.1f}s replayed in {elapsed:.2f}s '
+          f'({f"{speed:g}x" if speed else "unpaced"})')
+    print(f'  {reports} reports processed, {bugbot.duplicate_stats["folded"]} folded as duplicates, '
+          f'{throttled} throttled')
+    if latencies:
+        print(f'  latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms  p99 {percentile(latencies, 0.99) * 1000:.0f}ms  '
+              f'max {max(latencies) * 1000:.0f}ms  (includes up to LOG_WAIT_SECONDS={bugbot.LOG_WAIT_SECONDS:g} '
+              f'waiting for a log file)')
+    print(f'  log files: {captured_logs} captured, {log_files["moved"] - log_files["late"]} moved with their report, '
+          f'{log_files["late"]} moved late, {unmatched} unmatched')
+    if reports:
+        print_calls(fake, reports, 'report')
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture', help='JSONL file written with CAPTURE_FILE')
+    parser.add_argument('--guild', type=int, help='Only replay messages captured in this guild')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed (1 = as captured, 0 = unpaced)')
+    parser.add_argument('--parse-repeat', type=int, default=100, help='Passes over the embeds when timing the parser')
+    parser.add_argument('--parse-only', action='store_true', help='Skip the pipeline replay')
+    parser.add_argument('--log-wait', type=float, help='Override LOG_WAIT_SECONDS')
+    parser.add_argument('--no-throttle', action='store_true', help='Disable report throttling')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per REST call')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Calls per window per route and channel (0 = none)')
+    parser.add_argument('--rate-window', type=float, default=1.0, help='Rate limit window in seconds')
+    args = parser.parse_args()
+
+    entries = load_captures(args.capture, args.guild)
+    if not entries:
+        print('Nothing to replay')
+        return
+    run_parser(entries, args.parse_repeat)
+    if args.parse_only:
+        return
+
+    if args.log_wait is not None:
+        bugbot.LOG_WAIT_SECONDS = args.log_wait
+    if args.no_throttle:
+        bugbot.THROTTLE_PLAYER_BURST = bugbot.THROTTLE_WEBHOOK_BURST = 0
+
+    fake = FakeDiscord(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window)
+    fake.install(bugbot.bot)
+    bugbot.install_rest_scheduler(bugbot.bot)
+    # Set directly so the replay doesn't write the guild config file
+    bugbot.guild_channels[fake.guild_id] = fake.channel_id
+    bugbot.bug_index_ready.add(fake.guild_id)
+
+    await run_pipeline(fake, entries, args.speed)
+
+    for tasks in bugbot.ingest_workers.values():
+        for task in tasks:
+            task.cancel()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -4,13 +4,38 @@ import json
 import re
 import asyncio
 import aiohttp
+import functools
 import io
+import math
+import tempfile
+import time
+import bisect
+import heapq
+import itertools
+import contextlib
+import contextvars
+import hashlib
+import secrets
+import random
+import sys
+import atexit
+import logging
+import logging.handlers
+import queue
+import concurrent.futures
+import concurrent.futures.process
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque
 from discord.ext import commands
 from discord import app_commands
+from aiohttp import web
 from dotenv import load_dotenv
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # Pillow is optional, it is only needed when SCREENSHOT_MAX_SIZE is set
+
 load_dotenv()
 
 # ========================
@@ -23,6 +48,116 @@ GUILD_CONFIG_FILE = 'guild_config.json'
 # Blocked users file (minimal storage for bans)
 BLOCKED_USERS_FILE = 'blocked_ids.json'
 
+# Largest file /bug_block_import accepts
+MAX_BLOCKLIST_IMPORT_BYTES = int(os.getenv('MAX_BLOCKLIST_IMPORT_BYTES', str(1024 * 1024)))
+
+# Config and blocklist files are written in the background, this long after the last change
+PERSIST_FLUSH_DELAY = float(os.getenv('PERSIST_FLUSH_DELAY', '2'))
+# Keep an append-only journal of changes next to each file, so a crash before the
+# background write loses nothing. Each entry is fsynced before the command that
+# made it replies (set to 0 to disable)
+PERSIST_JOURNAL = os.getenv('PERSIST_JOURNAL', '1') == '1'
+
+# Bug state snapshot (append-only JSONL, lets the bug index survive restarts)
+# Set BUG_STATE_FILE to an empty string to disable it
+BUG_STATE_FILE = os.getenv('BUG_STATE_FILE', 'bug_state.jsonl')
+
+# How many forum thread starter messages are fetched at once when scanning a forum
+FORUM_FETCH_CONCURRENCY = max(1, int(os.getenv('FORUM_FETCH_CONCURRENCY', '8')))
+
+# Reactions on the same bug within this many seconds share one embed re-render
+REACTION_DEBOUNCE_SECONDS = float(os.getenv('REACTION_DEBOUNCE_SECONDS', '1.5'))
+
+# How many messages to remember as bug / not-a-bug (with their last rendered state)
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '5000'))
+
+# Screenshot/attachment downloads (one shared, pooled HTTP session)
+DOWNLOAD_POOL_SIZE = int(os.getenv('DOWNLOAD_POOL_SIZE', '20'))  # Open connections in total
+DOWNLOAD_PER_HOST = int(os.getenv('DOWNLOAD_PER_HOST', '8'))  # Open connections per CDN host
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv('DOWNLOAD_CONNECT_TIMEOUT', '5'))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv('DOWNLOAD_READ_TIMEOUT', '20'))
+DOWNLOAD_RETRIES = int(os.getenv('DOWNLOAD_RETRIES', '2'))
+MAX_DOWNLOAD_BYTES = int(os.getenv('MAX_DOWNLOAD_BYTES', str(25 * 1024 * 1024)))
+RELAY_SPOOL_THRESHOLD = int(os.getenv('RELAY_SPOOL_THRESHOLD', str(1024 * 1024)))  # Larger files go to a temp file
+RELAY_MEMORY_BUDGET = int(os.getenv('RELAY_MEMORY_BUDGET', str(64 * 1024 * 1024)))  # Bytes held by all relays at once
+
+# Oversized files with these extensions are cut down to their tail instead of refused
+TRUNCATABLE_EXTENSIONS = ('.log', '.txt')
+
+# Screenshots are downscaled to fit SCREENSHOT_MAX_SIZE pixels (longest side) and
+# re-encoded before they are re-posted. Needs Pillow (pip install Pillow); 0 disables
+SCREENSHOT_MAX_SIZE = int(os.getenv('SCREENSHOT_MAX_SIZE', '0'))
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'webp').lower()  # 'webp' or 'jpeg'
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '85'))
+SCREENSHOT_KEEP_ORIGINAL = os.getenv('SCREENSHOT_KEEP_ORIGINAL', '0') == '1'  # Also post the full size file in the thread
+SCREENSHOT_WORKERS = int(os.getenv('SCREENSHOT_WORKERS', '2'))  # Processes transcoding off the event loop
+
+# Log file association
+LOG_MATCH_WINDOW = float(os.getenv('LOG_MATCH_WINDOW', '3'))  # Max seconds between a report and its log file
+LOG_WAIT_SECONDS = float(os.getenv('LOG_WAIT_SECONDS', '0.5'))  # How long a report waits for a log that hasn't arrived
+LOG_PENDING_TTL = float(os.getenv('LOG_PENDING_TTL', '120'))  # Unmatched log files are forgotten after this long
+
+# Ingest queue (webhook reports are processed by a bounded pool of workers per guild)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))  # Workers per guild, each owns a subset of players
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '100'))  # Reports waiting per worker
+# What to do when a worker's queue is full:
+#   drop  - leave the webhook message unprocessed in the channel
+#   defer - wait for room (the report is picked up once the burst drains)
+#   mark  - like defer, but react ⏳ on the webhook message so staff can see it is queued
+INGEST_OVERFLOW = os.getenv('INGEST_OVERFLOW', 'mark')
+
+# REST scheduler (every outgoing Discord API call waits for one of these slots)
+REST_CONCURRENCY = int(os.getenv('REST_CONCURRENCY', '10'))
+# Slots only slash commands may use. A call keeps its slot while discord.py sleeps
+# out a 429, so without these a rate-limited route could hold every slot
+REST_RESERVED_SLOTS = int(os.getenv('REST_RESERVED_SLOTS', '1'))
+
+# Report throttling (token buckets per Player ID and per webhook, 0 disables a limit)
+# A bucket holds up to *_BURST reports and refills at *_PER_MINUTE. Both are off by
+# default; keep limits generous enough for QA players filing reports in a row
+THROTTLE_PLAYER_BURST = int(os.getenv('THROTTLE_PLAYER_BURST', '0'))
+THROTTLE_PLAYER_PER_MINUTE = float(os.getenv('THROTTLE_PLAYER_PER_MINUTE', '1'))
+THROTTLE_WEBHOOK_BURST = int(os.getenv('THROTTLE_WEBHOOK_BURST', '0'))
+THROTTLE_WEBHOOK_PER_MINUTE = float(os.getenv('THROTTLE_WEBHOOK_PER_MINUTE', '10'))
+THROTTLE_TRACK_SECONDS = 3600  # Idle buckets (and their counts for /bug_throttled) are forgotten after this
+
+# Grid cell size (Unreal units) of the per-map spatial index behind /bug_nearby
+NEARBY_CELL_SIZE = float(os.getenv('NEARBY_CELL_SIZE', '2000'))
+
+# Duplicate folding: reports this similar to an open bug on the same map are
+# posted into its thread as a short "+1" instead of getting a thread of their own
+# (MinHash estimate of word overlap, 0 to 1, e.g. 0.7; 0 disables)
+DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', '0'))
+# Reports more than this far apart (Unreal units, BugItGo) are never duplicates
+DUPLICATE_LOCATION_RADIUS = float(os.getenv('DUPLICATE_LOCATION_RADIUS', '1000'))
+DUPLICATE_MIN_WORDS = 3  # Descriptions shorter than this are too vague to compare
+DUPLICATE_INDEX_SIZE = int(os.getenv('DUPLICATE_INDEX_SIZE', '100000'))  # Per guild, oldest reports are forgotten beyond this
+
+# Bot logging (not to be confused with the game's log files above)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()  # DEBUG shows every parsed report and bug channel message
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # 'text' or 'json' (one object per line)
+# The same message is logged at most LOG_RATE_LIMIT times per LOG_RATE_WINDOW seconds,
+# the rest are counted and reported with the next one that gets through (0 disables)
+LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', '20'))
+LOG_RATE_WINDOW = float(os.getenv('LOG_RATE_WINDOW', '10'))
+
+# Prometheus-style metrics served over HTTP at /metrics (0 disables)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')  # Only reachable from this machine by default
+
+# Optional HTTP endpoint the plugin can post reports to directly, instead of
+# through a Discord webhook (POST /report with a token from /bug_ingest_token; 0 disables)
+INGEST_PORT = int(os.getenv('INGEST_PORT', '0'))
+INGEST_HOST = os.getenv('INGEST_HOST', '0.0.0.0')  # Game clients must reach it, usually behind an HTTPS proxy
+INGEST_MAX_BYTES = int(os.getenv('INGEST_MAX_BYTES', str(2 * MAX_DOWNLOAD_BYTES)))  # Whole request, files included
+# Bytes the uploads of queued HTTP reports may hold; requests beyond it get a 503
+INGEST_QUEUE_BUDGET = int(os.getenv('INGEST_QUEUE_BUDGET', str(4 * INGEST_MAX_BYTES)))
+INGEST_TOKENS_FILE = 'ingest_tokens.json'
+
+# Append every webhook message seen in a bug channel (embeds, attachment metadata,
+# timestamps) to this JSONL file, for benchmarks/replay_captures.py. Empty disables
+CAPTURE_FILE = os.getenv('CAPTURE_FILE', '')
+
 # Reaction emoji mappings
 REACTIONS = {
     '🧑‍💻': {'status': 'In Progress', 'color': 0xe67e22},  # Orange
@@ -39,6 +174,770 @@ THREAD_EMOJI = {
     'High Priority': '⭐',
 }
 
+# In-memory map limits
+BLOCKED_WEBHOOK_TTL = 60  # Seconds a blocked player's webhook stays blocked (catches follow-up log files)
+MAX_TRACKED_WEBHOOKS = int(os.getenv('MAX_TRACKED_WEBHOOKS', '10000'))  # Per map, oldest entries are evicted beyond this
+SWEEP_INTERVAL = 30  # Seconds between background sweeps of expired entries
+
+# ========================
+# LOGGING
+# ========================
+
+log = logging.getLogger('bug_tracker')
+
+# Attributes every LogRecord has; anything else came from extra= and goes into JSON output
+_STANDARD_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'suppressed'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields included"""
+    
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _STANDARD_RECORD_FIELDS})
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Plain text lines, noting how many similar messages were rate limited"""
+    
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            text += f' ({record.suppressed} similar messages suppressed)'
+        return text
+
+class RateLimitFilter(logging.Filter):
+    """Let each message template through at most LOG_RATE_LIMIT times per window
+    
+    Keyed by the unformatted message, so 'Error downloading %s' is one key
+    however many files fail. Runs in the calling thread, so it is kept cheap.
+    """
+    
+    def __init__(self, limit, window):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.windows = {}  # (logger, msg template) -> [window start, count, suppressed]
+    
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        state = self.windows.get(key)
+        if state is None or now - state[0] >= self.window:
+            if len(self.windows) > 10000:
+                self.windows.clear()
+            suppressed = state[2] if state else 0
+            self.windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.limit:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread
+    
+    The stock handler formats every record before queueing it, which is the
+    expensive part. Only exception info (which holds live frames) is rendered
+    here; log arguments should be plain values that won't change afterwards.
+    """
+    
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging():
+    """Send all logging (ours and discord.py's) through a queue to a writer thread"""
+    level = getattr(logging, LOG_LEVEL, logging.INFO)
+    if LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter('%(asctime)s %(levelname)-8s %(name)s: %(message)s')
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if LOG_RATE_LIMIT > 0:
+        queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    # discord.py's DEBUG output is every gateway event, only show it when asked for explicitly
+    logging.getLogger('discord').setLevel(max(level, logging.INFO))
+    
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Write out whatever is still queued on exit
+    atexit.register(listener.stop)
+    return listener
+
+# ========================
+# EXPIRING MAPS
+# ========================
+
+class ExpiringDict:
+    """Dict whose entries expire ttl seconds after they were last written
+    
+    Writes (including setdefault) refresh an entry and move it to the back,
+    so entries are always ordered by expiry and sweeping only looks at the
+    front. Beyond max_entries the oldest entries are evicted. Expired entries
+    are hidden on read and removed by sweep().
+    """
+    
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self.evictions = 0
+    
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+    
+    def __setitem__(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def __getitem__(self, key):
+        item = self._live(key)
+        if item is None:
+            raise KeyError(key)
+        return item[1]
+    
+    def __delitem__(self, key):
+        del self._data[key]
+    
+    def __contains__(self, key):
+        return self._live(key) is not None
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def get(self, key, default=None):
+        item = self._live(key)
+        return default if item is None else item[1]
+    
+    def setdefault(self, key, default):
+        """Return the value for key (inserting default if missing) and refresh its expiry"""
+        item = self._live(key)
+        value = default if item is None else item[1]
+        self[key] = value
+        return value
+    
+    def pop(self, key, *default):
+        item = self._live(key)
+        if item is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self._data[key]
+        return item[1]
+    
+    def keys(self):
+        return list(self._data.keys())
+    
+    def values(self):
+        return [item[1] for item in self._data.values()]
+    
+    def sweep(self):
+        """Remove expired entries, returning how many were dropped"""
+        now = time.monotonic()
+        removed = 0
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+            removed += 1
+        return removed
+
+class TokenBucket:
+    """Token bucket rate limit that also counts what it turned away"""
+    
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated', 'allowed', 'denied', 'last_denied')
+    
+    def __init__(self, capacity, per_minute):
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.allowed = 0
+        self.denied = 0
+        self.last_denied = None
+    
+    def available(self):
+        """Refill for the time that has passed and return the tokens on hand"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+    
+    def retry_after(self):
+        """Seconds until the next token"""
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+# ========================
+# METRICS
+# ========================
+
+# Histogram bucket upper bounds, in seconds
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# The handler whose work is currently running, so REST calls can be attributed to it
+metrics_handler = contextvars.ContextVar('metrics_handler', default=None)
+
+class Histogram:
+    """Latency histogram with fixed buckets"""
+    
+    __slots__ = ('counts', 'total', 'count')
+    
+    def __init__(self):
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(METRICS_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+class Metrics:
+    """Counters, histograms and scrape-time gauges in Prometheus text format
+    
+    Updates are a dict lookup and an add, cheap enough for every REST call.
+    Gauges are callbacks read only when /metrics is scraped.
+    """
+    
+    def __init__(self):
+        self.counters = {}  # name -> {label tuple: value}
+        self.histograms = {}  # name -> {label tuple: Histogram}
+        self.callbacks = {}  # name -> (type, callback returning a number or {label tuple: number})
+        self.help = {}  # name -> help text
+    
+    def inc(self, name, value=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+    
+    def observe(self, name, seconds, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(seconds)
+    
+    def register(self, name, metric_type, help_text, callback):
+        """Add a gauge (or externally kept counter) read at scrape time"""
+        self.callbacks[name] = (metric_type, callback)
+        self.help[name] = help_text
+    
+    def describe(self, name, help_text):
+        self.help[name] = help_text
+    
+    @staticmethod
+    def _labels(key, extra=()):
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+    
+    def _header(self, lines, name, metric_type):
+        if name in self.help:
+            lines.append(f'# HELP {name} {self.help[name]}')
+        lines.append(f'# TYPE {name} {metric_type}')
+    
+    def render(self):
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            self._header(lines, name, 'counter')
+            for key, value in series.items():
+                lines.append(f'{name}{self._labels(key)} {value}')
+        
+        for name, series in sorted(self.histograms.items()):
+            self._header(lines, name, 'histogram')
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(METRICS_BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{name}_bucket{self._labels(key, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{self._labels(key)} {histogram.total}')
+                lines.append(f'{name}_count{self._labels(key)} {histogram.count}')
+        
+        for name, (metric_type, callback) in sorted(self.callbacks.items()):
+            try:
+                value = callback()
+            except Exception as e:
+                log.warning('Error reading metric %s: %s', name, e)
+                continue
+            self._header(lines, name, metric_type)
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    lines.append(f'{name}{self._labels(key)} {item}')
+            else:
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.describe('bug_tracker_handler_seconds', 'Time spent in each handler and slash command')
+metrics.describe('bug_tracker_handler_calls_total', 'Handler and slash command runs by outcome')
+metrics.describe('bug_tracker_discord_request_seconds', 'Discord REST call latency by route, including scheduler wait')
+metrics.describe('bug_tracker_discord_requests_total', 'Discord REST calls by calling handler, route and result')
+metrics.describe('bug_tracker_ingest_wait_seconds', 'Time webhook reports waited in the ingest queue')
+metrics.describe('bug_tracker_rest_wait_seconds', 'Time REST calls waited for a scheduler slot, by priority class')
+
+@contextlib.contextmanager
+def track_handler(name):
+    """Time the enclosed work and attribute its REST calls to the named handler"""
+    token = metrics_handler.set(name)
+    started_at = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = 'cancelled'
+        raise
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        metrics.observe('bug_tracker_handler_seconds', time.perf_counter() - started_at, handler=name)
+        metrics.inc('bug_tracker_handler_calls_total', handler=name, outcome=outcome)
+        metrics_handler.reset(token)
+
+def timed_handler(name):
+    """Decorator form of track_handler for coroutine functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_handler(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def register_state_metrics():
+    """Expose the bot's in-memory state as gauges (read at scrape time)"""
+    def per_priority(values):
+        return {(('priority', PRIORITY_NAMES[p]),): v for p, v in values.items()}
+    
+    metrics.register('bug_tracker_pending_log_files', 'gauge', 'Log files waiting for their report',
+                     lambda: sum(len(entries) for entries in pending_log_files.values()))
+    metrics.register('bug_tracker_recent_reports', 'gauge', 'Reports remembered for late log files',
+                     lambda: sum(len(reports) for reports in recent_bug_reports.values()))
+    metrics.register('bug_tracker_blocked_webhooks', 'gauge', 'Webhooks currently marked as recently blocked',
+                     lambda: len(recently_blocked_webhooks))
+    metrics.register('bug_tracker_throttle_buckets', 'gauge', 'Players and webhooks with a live throttle bucket',
+                     lambda: len(report_throttles))
+    metrics.register('bug_tracker_message_cache_size', 'gauge', 'Messages in the bug / not-a-bug LRU',
+                     lambda: len(message_cache))
+    metrics.register('bug_tracker_message_cache_lookups_total', 'counter', 'Message cache lookups by result',
+                     lambda: {(('result', 'hit'),): message_cache_stats['hits'], (('result', 'miss'),): message_cache_stats['misses']})
+    metrics.register('bug_tracker_indexed_bugs', 'gauge', 'Bugs in the in-memory bug index',
+                     lambda: sum(len(bugs) for bugs in bug_index.values()))
+    metrics.register('bug_tracker_duplicate_fingerprints', 'gauge', 'Reports in the duplicate detection index',
+                     lambda: sum(len(index) for index in duplicate_indexes.values()))
+    metrics.register('bug_tracker_duplicates_folded_total', 'counter', 'Reports folded into an existing bug thread',
+                     lambda: duplicate_stats['folded'])
+    metrics.register('bug_tracker_screenshot_bytes_saved_total', 'counter', 'Upload bytes saved by transcoding screenshots',
+                     lambda: screenshot_stats['bytes_in'] - screenshot_stats['bytes_out'])
+    metrics.describe('bug_tracker_screenshot_transcode_seconds', 'Time to downscale and re-encode one screenshot')
+    metrics.register('bug_tracker_pending_embed_updates', 'gauge', 'Embed re-renders waiting or running',
+                     lambda: len(pending_embed_updates))
+    metrics.register('bug_tracker_ingest_queue_depth', 'gauge', 'Reports waiting in the ingest queues',
+                     get_ingest_depth)
+    metrics.register('bug_tracker_ingest_reports_total', 'counter', 'Ingested reports by result',
+                     lambda: {(('result', k),): v for k, v in ingest_stats.items()})
+    metrics.register('bug_tracker_rest_in_flight', 'gauge', 'Discord REST calls in flight',
+                     lambda: rest_scheduler.active)
+    metrics.register('bug_tracker_rest_queued', 'gauge', 'Discord REST calls waiting for a slot',
+                     lambda: rest_scheduler.queued())
+    metrics.register('bug_tracker_rest_superseded_total', 'counter', 'Queued REST calls dropped for a newer one',
+                     lambda: per_priority({p: stats['dropped'] for p, stats in rest_scheduler.stats.items()}))
+
+async def handle_metrics(request):
+    return web.Response(
+        body=metrics.render().encode('utf-8'),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+async def start_metrics_server():
+    """Serve /metrics on METRICS_HOST:METRICS_PORT, returning the runner to clean up"""
+    register_state_metrics()
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    log.info('Serving metrics on http://%s:%s/metrics', METRICS_HOST, METRICS_PORT)
+    return runner
+
+# ========================
+# REST SCHEDULER
+# ========================
+
+# Priority classes for outgoing Discord API calls (lower runs first)
+PRIORITY_INTERACTION = 0  # Slash command work, has a 3 second deadline
+PRIORITY_INGEST = 1  # Posting new bug reports
+PRIORITY_RENDER = 2  # Re-rendering embeds after reactions
+PRIORITY_TAGS = 3  # Forum tag edits, purely cosmetic
+PRIORITY_BACKGROUND = 4  # Bug index scans, which page through whole channels
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTION: 'interaction',
+    PRIORITY_INGEST: 'ingest',
+    PRIORITY_RENDER: 'render',
+    PRIORITY_TAGS: 'tags',
+    PRIORITY_BACKGROUND: 'background',
+}
+
+# The priority (and optional supersede key) of whatever code is currently running
+rest_priority = contextvars.ContextVar('rest_priority', default=PRIORITY_INGEST)
+rest_supersede_key = contextvars.ContextVar('rest_supersede_key', default=None)
+
+class RequestSuperseded(Exception):
+    """A queued call was dropped because a newer call with the same key replaced it"""
+
+@contextlib.contextmanager
+def rest_context(priority, supersede_key=None):
+    """Run the enclosed Discord API calls at the given priority"""
+    priority_token = rest_priority.set(priority)
+    key_token = rest_supersede_key.set(supersede_key)
+    try:
+        yield
+    finally:
+        rest_supersede_key.reset(key_token)
+        rest_priority.reset(priority_token)
+
+class RestScheduler:
+    """Priority gate in front of every Discord REST call
+    
+    At most `concurrency` calls are in flight, and `reserved` of those slots
+    are kept for interactions. When no slot is free, calls wait in a heap
+    ordered by (priority, arrival), and a finished call hands its slot straight
+    to the best waiter. A waiting call with a supersede key is dropped
+    (RequestSuperseded) when a newer call with the same key arrives.
+    
+    A slot is held for the whole call, including any 429 retry sleeps inside
+    discord.py, which is what the reserved slots are for.
+    """
+    
+    def __init__(self, concurrency, reserved=0):
+        self.concurrency = concurrency
+        self.reserved = reserved
+        self.active = 0
+        self._waiting = []  # Heap of [priority, seq, future, supersede_key]
+        self._seq = itertools.count()
+        self._by_key = {}  # supersede_key -> waiting heap entry
+        self.stats = {
+            priority: {'calls': 0, 'dropped': 0, 'waits': deque(maxlen=1000), 'durations': deque(maxlen=1000)}
+            for priority in PRIORITY_NAMES
+        }
+    
+    async def run(self, priority, make_call, supersede_key=None):
+        """Wait for a slot, then await make_call()"""
+        stats = self.stats[priority]
+        queued_at = time.monotonic()
+        
+        self._drop_finished()
+        if self._can_start(priority, self.active) and not (self._waiting and self._waiting[0][0] <= priority):
+            self.active += 1
+        else:
+            entry = [priority, next(self._seq), asyncio.get_running_loop().create_future(), supersede_key]
+            if supersede_key is not None:
+                previous = self._by_key.get(supersede_key)
+                if previous and not previous[2].done():
+                    previous[2].set_exception(RequestSuperseded())
+                    self.stats[previous[0]]['dropped'] += 1
+                self._by_key[supersede_key] = entry
+            heapq.heappush(self._waiting, entry)
+            try:
+                await entry[2]
+            except asyncio.CancelledError:
+                # The slot may have been handed over just as we were cancelled
+                if entry[2].done() and not entry[2].cancelled() and entry[2].exception() is None:
+                    self._release()
+                raise
+            finally:
+                if supersede_key is not None and self._by_key.get(supersede_key) is entry:
+                    del self._by_key[supersede_key]
+        
+        started_at = time.monotonic()
+        stats['waits'].append(started_at - queued_at)
+        metrics.observe('bug_tracker_rest_wait_seconds', started_at - queued_at, priority=PRIORITY_NAMES[priority])
+        try:
+            return await make_call()
+        finally:
+            stats['calls'] += 1
+            stats['durations'].append(time.monotonic() - started_at)
+            self._release()
+    
+    def _can_start(self, priority, active):
+        """Whether a call of this priority may take a slot with `active` in flight"""
+        if priority == PRIORITY_INTERACTION:
+            return active < self.concurrency
+        return active < max(1, self.concurrency - self.reserved)
+    
+    def _drop_finished(self):
+        # Superseded and cancelled waiters stay in the heap until they reach the top
+        while self._waiting and self._waiting[0][2].done():
+            heapq.heappop(self._waiting)
+    
+    def _release(self):
+        # Free the slot and hand it to the best caller still waiting, if it may use it
+        self.active -= 1
+        self._drop_finished()
+        while self._waiting and self._can_start(self._waiting[0][0], self.active):
+            entry = heapq.heappop(self._waiting)
+            self.active += 1
+            entry[2].set_result(None)
+            self._drop_finished()
+    
+    def queued(self):
+        """Number of calls waiting for a slot"""
+        return sum(1 for entry in self._waiting if not entry[2].done())
+
+rest_scheduler = RestScheduler(REST_CONCURRENCY, REST_RESERVED_SLOTS)
+
+def install_rest_scheduler(client):
+    """Route every REST call the client makes through the scheduler"""
+    original_request = client.http.request
+    
+    async def scheduled_request(route, **kwargs):
+        # Routes are templates (/channels/{channel_id}/messages), so labels stay few
+        route_name = f'{route.method} {route.path}'
+        started_at = time.perf_counter()
+        result = 'ok'
+        try:
+            return await rest_scheduler.run(
+                rest_priority.get(),
+                lambda: original_request(route, **kwargs),
+                rest_supersede_key.get()
+            )
+        except RequestSuperseded:
+            result = 'superseded'
+            raise
+        except discord.HTTPException as e:
+            result = str(e.status)
+            raise
+        except Exception:
+            result = 'error'
+            raise
+        finally:
+            metrics.observe('bug_tracker_discord_request_seconds', time.perf_counter() - started_at, route=route_name)
+            metrics.inc('bug_tracker_discord_requests_total', handler=metrics_handler.get() or 'other', route=route_name, result=result)
+    
+    client.http.request = scheduled_request
+
+class BugTrackerTree(app_commands.CommandTree):
+    """Command tree that runs slash commands at interaction priority"""
+    
+    async def interaction_check(self, interaction):
+        # Runs inside the command's task, so the priority sticks for the whole command
+        rest_priority.set(PRIORITY_INTERACTION)
+        if interaction.type is discord.InteractionType.application_command and interaction.command:
+            # Finished in on_app_command_completion / on_error
+            metrics_handler.set(f'/{interaction.command.qualified_name}')
+            interaction.extras['metrics_started_at'] = time.perf_counter()
+        return True
+    
+    async def on_error(self, interaction, error):
+        record_command_metrics(interaction, 'error')
+        await super().on_error(interaction, error)
+
+def record_command_metrics(interaction, outcome):
+    """Record how long a slash command took"""
+    started_at = interaction.extras.pop('metrics_started_at', None)
+    if started_at is None or not interaction.command:
+        return
+    name = f'/{interaction.command.qualified_name}'
+    metrics.observe('bug_tracker_handler_seconds', time.perf_counter() - started_at, handler=name)
+    metrics.inc('bug_tracker_handler_calls_total', handler=name, outcome=outcome)
+
+# ========================
+# PERSISTENCE
+# ========================
+
+def atomic_write_json(path, data):
+    """Write JSON so the file is always either the old or the new version"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+    
+    # Make the rename itself durable (not supported on every platform)
+    with contextlib.suppress(OSError, AttributeError):
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def append_journal_line(path, line):
+    """Append one line and make it durable before returning (blocking)"""
+    with open(path, 'a') as f:
+        f.write(line + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+class PersistentStore:
+    """Write-behind persistence for one JSON file
+    
+    Each change is appended to a journal (if PERSIST_JOURNAL) and the full
+    file is rewritten atomically off the event loop PERSIST_FLUSH_DELAY
+    seconds later, so bursts of changes cost one write. On load the journal
+    is replayed on top of the file, which recovers changes made after the
+    last successful write.
+    """
+    
+    def __init__(self, path, snapshot, apply_entry):
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self.snapshot = snapshot  # Returns the JSON data to write
+        self.apply_entry = apply_entry  # Applies one journal entry to the in-memory state
+        self.flushes = 0
+        self._flush_timer = None
+        self._flush_lock = None
+        self._journal_lock = None
+    
+    def journal_lock(self):
+        # Keeps journal appends in order, and out of the way of a rotation
+        if self._journal_lock is None:
+            self._journal_lock = asyncio.Lock()
+        return self._journal_lock
+    
+    async def record(self, entry):
+        """Journal one change and schedule a background write
+        
+        The journal line is fsynced off the event loop before this returns,
+        so await it before confirming the change: from then on it survives a
+        crash or power loss even if the background write never happens.
+        """
+        if PERSIST_JOURNAL:
+            line = json.dumps(entry)
+            try:
+                async with self.journal_lock():
+                    await asyncio.get_running_loop().run_in_executor(None, append_journal_line, self.journal_path, line)
+            except Exception as e:
+                log.error('Error writing journal %s: %s', self.journal_path, e)
+        self.schedule_flush()
+    
+    def schedule_flush(self):
+        if self._flush_timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not running inside the bot (e.g. a script), just write now
+            self.flush_now()
+            return
+        self._flush_timer = loop.call_later(PERSIST_FLUSH_DELAY, lambda: asyncio.ensure_future(self.flush()))
+    
+    def _rotate_journal(self):
+        """Set the journal aside; it is deleted once the file write that covers it succeeds"""
+        rotated_path = f'{self.journal_path}.old'
+        if not os.path.exists(self.journal_path):
+            return os.path.exists(rotated_path)
+        if os.path.exists(rotated_path):
+            # A previous write failed, keep its entries too
+            with open(self.journal_path, 'r') as src, open(rotated_path, 'a') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, rotated_path)
+        return True
+    
+    async def flush(self):
+        """Write the file off the event loop"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            try:
+                # Capture the data and the journal together, before anything else can change
+                async with self.journal_lock():
+                    data = self.snapshot()
+                    rotated = self._rotate_journal()
+                await asyncio.get_running_loop().run_in_executor(None, atomic_write_json, self.path, data)
+                if rotated:
+                    os.remove(f'{self.journal_path}.old')
+                self.flushes += 1
+            except Exception as e:
+                log.error('Error saving %s: %s', self.path, e)
+    
+    def flush_now(self):
+        """Write the file synchronously (startup scripts and shutdown)"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        try:
+            atomic_write_json(self.path, self.snapshot())
+            for journal in (self.journal_path, f'{self.journal_path}.old'):
+                if os.path.exists(journal):
+                    os.remove(journal)
+            self.flushes += 1
+        except Exception as e:
+            log.error('Error saving %s: %s', self.path, e)
+    
+    def pending(self):
+        return self._flush_timer is not None
+    
+    def replay_journal(self):
+        """Apply journaled changes on top of freshly loaded data, returning how many"""
+        replayed = 0
+        for journal in (f'{self.journal_path}.old', self.journal_path):
+            if not os.path.exists(journal):
+                continue
+            with open(journal, 'r') as f:
+                for line in f:
+                    try:
+                        self.apply_entry(json.loads(line))
+                    except ValueError:
+                        # A crash mid-append can leave a partial last line
+                        continue
+                    replayed += 1
+        if replayed:
+            log.info('Replayed %s journaled changes for %s', replayed, self.path)
+            self.schedule_flush()
+        return replayed
+
 # ========================
 # BOT SETUP
 # ========================
@@ -48,14 +947,91 @@ intents.message_content = True
 intents.reactions = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class BugTrackerBot(commands.Bot):
+    """Bot that owns the long-lived resources shared by all handlers"""
+    
+    async def setup_hook(self):
+        global http_session
+        http_session = create_http_session()
+        install_rest_scheduler(self)
+        self.sweeper_task = asyncio.create_task(sweep_expiring_maps())
+        self.metrics_runner = await start_metrics_server() if METRICS_PORT else None
+        self.ingest_runner = await start_ingest_server() if INGEST_PORT else None
+        if SCREENSHOT_MAX_SIZE and Image is None:
+            log.warning('SCREENSHOT_MAX_SIZE is set but Pillow is not installed, screenshots are posted as they are')
+    
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            if getattr(self, 'sweeper_task', None):
+                self.sweeper_task.cancel()
+            # Write out anything still waiting for its background flush
+            for store in (guild_config_store, blocked_users_store, ingest_tokens_store):
+                if store.pending():
+                    await store.flush()
+            if bug_state_flush_pending():
+                await flush_bug_state()
+            if http_session and not http_session.closed:
+                await http_session.close()
+            if getattr(self, 'metrics_runner', None):
+                await self.metrics_runner.cleanup()
+            if getattr(self, 'ingest_runner', None):
+                await self.ingest_runner.cleanup()
+            if image_pool:
+                image_pool.shutdown(wait=False)
+
+bot = BugTrackerBot(command_prefix='!', intents=intents, tree_cls=BugTrackerTree)
 
 # In-memory storage (resets on restart)
 blocked_users = {}  # Maps guild_id -> set of blocked user IDs
+blocked_id_index = {}  # Maps guild_id -> sorted (lowercase ID, ID) pairs for autocomplete
 guild_channels = {}  # Maps guild_id -> bug_report_channel_id
-recent_bug_reports = {}  # Maps (guild_id, message_id) -> (thread_id, timestamp) for log file association
-pending_log_files = {}  # Maps (guild_id, message_id) -> list of (message, timestamp) for delayed log files
-recently_blocked_webhooks = {}  # Maps (guild_id, webhook_id) -> timestamp for blocking follow-up messages
+ingest_tokens = {}  # Maps guild_id -> SHA-256 of its ingest endpoint token
+ingest_token_guilds = {}  # Maps token hash -> guild_id, for authenticating requests
+# Short-lived maps expire on their own so memory stays flat over long uptimes
+recent_bug_reports = ExpiringDict(LOG_PENDING_TTL, MAX_TRACKED_WEBHOOKS)  # Maps (guild_id, webhook_id) -> time-ordered list of (created_ts, thread_id) for late log files (0 = throttled)
+pending_log_files = ExpiringDict(LOG_PENDING_TTL, MAX_TRACKED_WEBHOOKS)  # Maps (guild_id, webhook_id) -> time-ordered list of (created_ts, message_id, message) waiting for a report
+log_file_waiters = {}  # Maps (guild_id, webhook_id) -> list of (created_ts, future) for reports waiting for a log file
+recently_blocked_webhooks = ExpiringDict(BLOCKED_WEBHOOK_TTL, MAX_TRACKED_WEBHOOKS)  # Maps (guild_id, webhook_id) -> timestamp for blocking follow-up messages
+
+# Bug index (rebuilt from Discord on demand, then kept current by events)
+bug_index = {}  # Maps guild_id -> {message_id: bug record dict}
+bug_index_counts = {}  # Maps guild_id -> status counters used by /bug_stats
+bug_index_ready = set()  # guild_ids whose index has been fully built from the channel
+bug_index_locks = {}  # Maps guild_id -> asyncio.Lock so only one rebuild runs at a time
+bug_assignees = {}  # Maps guild_id -> {user_id: set of bug message_ids they reacted 🧑‍💻 on}
+bug_locations = {}  # Maps guild_id -> {map name (lowercase): {grid cell: set of bug message_ids}}
+bug_state_loaded = False  # Snapshot is only loaded on the first on_ready
+bug_state_pending = []  # Snapshot lines waiting for the next background append
+bug_state_lines = 0  # Lines in BUG_STATE_FILE, to tell when compacting it is worth it
+bug_state_compact_due = False  # Rewrite the snapshot on the next flush instead of appending
+bug_state_flush_timer = None
+bug_state_flush_lock = None
+http_session = None  # Shared aiohttp.ClientSession, created in setup_hook
+image_pool = None  # ProcessPoolExecutor for screenshot transcoding, started on first use
+screenshot_stats = {'transcoded': 0, 'skipped': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+# Ingest queue
+ingest_queues = {}  # Maps guild_id -> list of asyncio.Queue, one per worker
+ingest_workers = {}  # Maps guild_id -> list of worker tasks
+ingest_stats = {'enqueued': 0, 'processed': 0, 'failed': 0, 'dropped': 0, 'overflowed': 0}
+direct_report_ids = itertools.count(1)  # Log IDs for reports posted to the HTTP endpoint
+ingest_wait_samples = deque(maxlen=1000)  # Recent queue wait times in seconds
+
+# Report throttling
+report_throttles = ExpiringDict(THROTTLE_TRACK_SECONDS, MAX_TRACKED_WEBHOOKS)  # Maps (guild_id, 'player'|'webhook', id) -> TokenBucket
+
+# Duplicate folding
+duplicate_indexes = {}  # Maps guild_id -> MinHashIndex of reports posted since startup
+duplicate_stats = {'checked': 0, 'folded': 0}
+
+# Reaction handling (bursts are coalesced into one re-render per message)
+pending_embed_updates = {}  # Maps message_id -> asyncio.Task re-rendering that bug
+dirty_embed_updates = set()  # message_ids that got more reactions while their render was running
+reaction_stats = {'events': 0, 'renders': 0, 'skipped': 0}  # Raw reaction events vs renders done / skipped as no-ops
+message_cache = OrderedDict()  # LRU: message_id -> {'is_bug': bool, 'state': last rendered state or None}
+message_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
 
 # ========================
 # UTILITY FUNCTIONS
@@ -74,29 +1050,37 @@ def load_guild_config():
                 else:
                     # Flat format - just channel IDs
                     guild_channels = {int(k): int(v) for k, v in data.items()}
-            print(f'Loaded configuration for {len(guild_channels)} guilds', flush=True)
+            log.info('Loaded configuration for %s guilds', len(guild_channels))
     except Exception as e:
-        print(f'Error loading guild config: {e}', flush=True)
+        log.error('Error loading guild config: %s', e)
         guild_channels = {}
+    guild_config_store.replay_journal()
 
-def save_guild_config():
-    """Save guild configurations to file"""
-    try:
-        with open(GUILD_CONFIG_FILE, 'w') as f:
-            # Convert int keys to strings for JSON
-            data = {str(k): str(v) for k, v in guild_channels.items()}
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f'Error saving guild config: {e}', flush=True)
+def guild_config_snapshot():
+    """Guild configuration as written to file"""
+    # Convert int keys to strings for JSON
+    return {str(k): str(v) for k, v in guild_channels.items()}
+
+def apply_guild_config_entry(entry):
+    """Apply one journaled guild configuration change"""
+    guild_id = int(entry['guild'])
+    if entry['op'] == 'set':
+        guild_channels[guild_id] = int(entry['channel'])
+    elif entry['op'] == 'remove':
+        guild_channels.pop(guild_id, None)
+
+guild_config_store = PersistentStore(GUILD_CONFIG_FILE, guild_config_snapshot, apply_guild_config_entry)
 
 def get_bug_channel(guild_id):
     """Get the bug report channel for a guild"""
     return guild_channels.get(guild_id)
 
-def set_bug_channel(guild_id, channel_id):
+async def set_bug_channel(guild_id, channel_id):
     """Set the bug report channel for a guild"""
     guild_channels[guild_id] = channel_id
-    save_guild_config()
+    await guild_config_store.record({'op': 'set', 'guild': str(guild_id), 'channel': str(channel_id)})
+    # The index describes the old channel, rebuild it on next use
+    drop_bug_index(guild_id)
 
 def load_blocked_users():
     """Load blocked user IDs from file (per-guild)"""
@@ -108,20 +1092,92 @@ def load_blocked_users():
                 # Convert string keys back to ints, values to sets
                 blocked_users = {int(k): set(v) for k, v in data.items()}
             total_blocked = sum(len(users) for users in blocked_users.values())
-            print(f'Loaded {total_blocked} blocked users across {len(blocked_users)} guilds', flush=True)
+            log.info('Loaded %s blocked users across %s guilds', total_blocked, len(blocked_users))
     except Exception as e:
-        print(f'Error loading blocked users: {e}', flush=True)
+        log.error('Error loading blocked users: %s', e)
         blocked_users = {}
+    blocked_users_store.replay_journal()
+    blocked_id_index.clear()
+
+def blocked_users_snapshot():
+    """Blocked user IDs as written to file"""
+    # Convert int keys to strings, sets to lists for JSON
+    return {str(k): list(v) for k, v in blocked_users.items()}
 
-def save_blocked_users():
-    """Save blocked user IDs to file (per-guild)"""
+def apply_blocked_users_entry(entry):
+    """Apply one journaled blocklist change"""
+    guild_id = int(entry['guild'])
+    if entry['op'] == 'block':
+        blocked_users.setdefault(guild_id, set()).add(entry['id'])
+    elif entry['op'] == 'block_many':
+        blocked_users.setdefault(guild_id, set()).update(entry['ids'])
+    elif entry['op'] == 'unblock':
+        blocked_users.get(guild_id, set()).discard(entry['id'])
+        if not blocked_users.get(guild_id, True):
+            del blocked_users[guild_id]
+    elif entry['op'] == 'remove':
+        blocked_users.pop(guild_id, None)
+
+blocked_users_store = PersistentStore(BLOCKED_USERS_FILE, blocked_users_snapshot, apply_blocked_users_entry)
+
+def load_ingest_tokens():
+    """Load the ingest endpoint token hashes from file"""
+    global ingest_tokens
     try:
-        with open(BLOCKED_USERS_FILE, 'w') as f:
-            # Convert int keys to strings, sets to lists for JSON
-            data = {str(k): list(v) for k, v in blocked_users.items()}
-            json.dump(data, f, indent=2)
+        if os.path.exists(INGEST_TOKENS_FILE):
+            with open(INGEST_TOKENS_FILE, 'r') as f:
+                ingest_tokens = {int(k): v for k, v in json.load(f).items()}
+            log.info('Loaded ingest tokens for %s guilds', len(ingest_tokens))
     except Exception as e:
-        print(f'Error saving blocked users: {e}', flush=True)
+        log.error('Error loading ingest tokens: %s', e)
+        ingest_tokens = {}
+    ingest_tokens_store.replay_journal()
+    ingest_token_guilds.clear()
+    ingest_token_guilds.update({token_hash: guild_id for guild_id, token_hash in ingest_tokens.items()})
+
+def ingest_tokens_snapshot():
+    """Ingest token hashes as written to file"""
+    return {str(k): v for k, v in ingest_tokens.items()}
+
+def apply_ingest_tokens_entry(entry):
+    """Apply one journaled ingest token change"""
+    guild_id = int(entry['guild'])
+    if entry['op'] == 'set':
+        ingest_tokens[guild_id] = entry['hash']
+    elif entry['op'] == 'remove':
+        ingest_tokens.pop(guild_id, None)
+
+ingest_tokens_store = PersistentStore(INGEST_TOKENS_FILE, ingest_tokens_snapshot, apply_ingest_tokens_entry)
+
+def hash_ingest_token(token):
+    """Tokens are only stored hashed, so the file alone can't be used to post reports"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+async def create_ingest_token(guild_id):
+    """Issue a new ingest token for a guild, revoking its previous one"""
+    token = secrets.token_urlsafe(32)
+    token_hash = hash_ingest_token(token)
+    await revoke_ingest_token(guild_id)
+    ingest_tokens[guild_id] = token_hash
+    ingest_token_guilds[token_hash] = guild_id
+    await ingest_tokens_store.record({'op': 'set', 'guild': str(guild_id), 'hash': token_hash})
+    return token
+
+async def revoke_ingest_token(guild_id):
+    """Forget a guild's ingest token, returning whether it had one"""
+    token_hash = ingest_tokens.pop(guild_id, None)
+    if token_hash is None:
+        return False
+    ingest_token_guilds.pop(token_hash, None)
+    await ingest_tokens_store.record({'op': 'remove', 'guild': str(guild_id)})
+    return True
+
+def get_ingest_token_guild(authorization):
+    """The guild a request's "Authorization: Bearer <token>" header belongs to, or None"""
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return ingest_token_guilds.get(hash_ingest_token(token.strip()))
 
 def is_user_blocked(guild_id, user_id):
     """Check if a Discord user or Player ID is blocked in a specific guild"""
@@ -129,28 +1185,320 @@ def is_user_blocked(guild_id, user_id):
         return False
     return str(user_id) in blocked_users[guild_id]
 
-def block_user(guild_id, user_id):
+def get_blocked_id_index(guild_id):
+    """Sorted (lowercase ID, ID) pairs for a guild's blocked IDs, built on first use"""
+    index = blocked_id_index.get(guild_id)
+    if index is None:
+        index = sorted((bid.lower(), bid) for bid in blocked_users.get(guild_id, ()))
+        blocked_id_index[guild_id] = index
+    return index
+
+def search_blocked_ids(guild_id, prefix, limit=25):
+    """Blocked IDs starting with prefix (case-insensitive), in sorted order"""
+    index = get_blocked_id_index(guild_id)
+    prefix = prefix.lower()
+    start = bisect.bisect_left(index, (prefix,))
+    matches = []
+    for key, bid in index[start:start + limit]:
+        if not key.startswith(prefix):
+            break
+        matches.append(bid)
+    return matches
+
+async def block_user(guild_id, user_id):
     """Block a Discord user or Player ID in a specific guild"""
     if guild_id not in blocked_users:
         blocked_users[guild_id] = set()
-    blocked_users[guild_id].add(str(user_id))
-    save_blocked_users()
+    user_id = str(user_id)
+    if user_id not in blocked_users[guild_id] and guild_id in blocked_id_index:
+        bisect.insort(blocked_id_index[guild_id], (user_id.lower(), user_id))
+    blocked_users[guild_id].add(user_id)
+    await blocked_users_store.record({'op': 'block', 'guild': str(guild_id), 'id': user_id})
+
+async def block_users(guild_id, user_ids):
+    """Block many IDs in a specific guild as one change, returning how many were new"""
+    blocked = blocked_users.setdefault(guild_id, set())
+    new_ids = {str(uid) for uid in user_ids} - blocked
+    if not new_ids:
+        return 0
+    blocked.update(new_ids)
+    # Cheaper to re-sort once on next use than to insert one by one
+    blocked_id_index.pop(guild_id, None)
+    await blocked_users_store.record({'op': 'block_many', 'guild': str(guild_id), 'ids': sorted(new_ids)})
+    return len(new_ids)
 
-def unblock_user(guild_id, user_id):
+async def unblock_user(guild_id, user_id):
     """Unblock a Discord user or Player ID in a specific guild"""
     if guild_id in blocked_users and str(user_id) in blocked_users[guild_id]:
         blocked_users[guild_id].remove(str(user_id))
+        index = blocked_id_index.get(guild_id)
+        if index is not None:
+            entry = (str(user_id).lower(), str(user_id))
+            position = bisect.bisect_left(index, entry)
+            if position < len(index) and index[position] == entry:
+                del index[position]
         # Clean up empty sets
         if not blocked_users[guild_id]:
             del blocked_users[guild_id]
-        save_blocked_users()
+        await blocked_users_store.record({'op': 'unblock', 'guild': str(guild_id), 'id': str(user_id)})
         
         # Also clear any recently blocked webhooks cache
         # (webhooks don't have player IDs, so we clear all for this guild)
         keys_to_remove = [k for k in recently_blocked_webhooks.keys() if k[0] == guild_id]
         for key in keys_to_remove:
             del recently_blocked_webhooks[key]
-        print(f'Cleared {len(keys_to_remove)} webhook caches for guild {guild_id}', flush=True)
+        log.info('Cleared %s webhook caches for guild %s', len(keys_to_remove), guild_id)
+
+def create_http_session():
+    """Create the shared HTTP session used for all CDN downloads"""
+    connector = aiohttp.TCPConnector(
+        limit=DOWNLOAD_POOL_SIZE,
+        limit_per_host=DOWNLOAD_PER_HOST,
+        keepalive_timeout=60,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(
+        connect=DOWNLOAD_CONNECT_TIMEOUT,
+        sock_read=DOWNLOAD_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+class RelayBudget:
+    """Global cap on the bytes held by in-flight file relays"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = []
+    
+    async def acquire(self, nbytes):
+        """Wait until nbytes fit in the budget and reserve them (returns the amount reserved)"""
+        # A single file bigger than the whole budget just has to wait until it is alone
+        nbytes = min(nbytes, self.limit)
+        while self.in_use + nbytes > self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_use += nbytes
+        return nbytes
+    
+    def try_acquire(self, nbytes):
+        """Reserve nbytes if they fit right now, returning the amount reserved or None"""
+        nbytes = min(nbytes, self.limit)
+        if self.in_use + nbytes > self.limit:
+            return None
+        self.in_use += nbytes
+        return nbytes
+    
+    def release(self, nbytes):
+        """Give reserved bytes back and let waiting relays re-check"""
+        self.in_use -= nbytes
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+relay_budget = RelayBudget(RELAY_MEMORY_BUDGET)
+# Uploads waiting in the ingest queue are charged here instead. They can sit
+# there for a while, and holding relay_budget would starve the workers
+# relaying the reports ahead of them
+ingest_budget = RelayBudget(INGEST_QUEUE_BUDGET)
+
+class RelayedFile:
+    """A downloaded file, kept in RAM while small and in a temp file once large"""
+    
+    def __init__(self, filename, reserved):
+        self.filename = filename
+        self.size = 0
+        self.reserved = reserved
+        self.fp = io.BytesIO()
+    
+    def write(self, chunk):
+        self.size += len(chunk)
+        # Spill to disk once the file outgrows the in-memory threshold
+        if isinstance(self.fp, io.BytesIO) and self.size > RELAY_SPOOL_THRESHOLD:
+            spooled = tempfile.TemporaryFile()
+            spooled.write(self.fp.getbuffer())
+            self.fp = spooled
+        self.fp.write(chunk)
+    
+    def to_discord_file(self, tail_bytes=None):
+        """Rewind and wrap for upload (the RelayedFile still owns the data)
+        
+        With tail_bytes only the end of the file is uploaded.
+        """
+        self.fp.seek(max(0, self.size - tail_bytes) if tail_bytes else 0)
+        return discord.File(self.fp, filename=self.filename)
+    
+    def read_all(self):
+        """The whole file as bytes (blocking once spooled to disk, so run it in an executor)"""
+        self.fp.seek(0)
+        return self.fp.read()
+    
+    def close(self):
+        self.fp.close()
+        if self.reserved:
+            relay_budget.release(self.reserved)
+            self.reserved = 0
+
+def format_bytes(nbytes):
+    """Human readable file size"""
+    if nbytes >= 1024 * 1024:
+        return f'{nbytes / (1024 * 1024):.1f} MB'
+    return f'{nbytes / 1024:.0f} KB'
+
+async def download_to_relay(url, filename, max_bytes=MAX_DOWNLOAD_BYTES, expected_size=None, tail_bytes=None, reserve=True):
+    """Stream a download into a RelayedFile with the shared session
+    
+    Retries transient failures. With tail_bytes only the end of the file is
+    requested. Returns None if the download failed or the file is larger than
+    max_bytes. The caller must close() the result to free its relay budget
+    (reserve=False means the caller already reserved it).
+    """
+    headers = {'Range': f'bytes=-{tail_bytes}'} if tail_bytes else None
+    error = None
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        relayed = None
+        try:
+            async with http_session.get(url, headers=headers) as resp:
+                if resp.status in (200, 206):
+                    # Without a length the file may grow up to max_bytes, so reserve all of it
+                    size = resp.content_length or expected_size or max_bytes
+                    if size > max_bytes:
+                        log.warning('Not downloading %s: %s bytes is over the %s byte limit', filename, size, max_bytes)
+                        return None
+                    
+                    relayed = RelayedFile(filename, await relay_budget.acquire(size) if reserve else 0)
+                    async for chunk in resp.content.iter_chunked(64 * 1024):
+                        relayed.write(chunk)
+                        if relayed.size > max_bytes:
+                            log.warning('Not downloading %s: over the %s byte limit', filename, max_bytes)
+                            relayed.close()
+                            return None
+                    return relayed
+                
+                # Only rate limits and server errors are worth retrying
+                if resp.status != 429 and resp.status < 500:
+                    log.error('Error downloading %s: HTTP %s', filename, resp.status)
+                    return None
+                error = f'HTTP {resp.status}'
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if relayed:
+                relayed.close()
+            error = str(e) or type(e).__name__
+        except BaseException:
+            # Cancelled mid-download: give the reservation back before unwinding
+            if relayed:
+                relayed.close()
+            raise
+        
+        if attempt < DOWNLOAD_RETRIES:
+            await asyncio.sleep(0.5 * 2 ** attempt)
+    
+    log.error('Error downloading %s after %s attempts: %s', filename, DOWNLOAD_RETRIES + 1, error)
+    return None
+
+def plan_file_bundles(files, limit, label):
+    """Group files (anything with filename and size) into upload-sized messages
+    
+    Bundles hold up to 10 files and no more than limit bytes in total. Files
+    over the limit are refused, except text logs which keep only their last
+    part. Returns (bundles of (file, bytes to send, tail_bytes, note), notes
+    for the refused files).
+    """
+    notes = []
+    bundles = []
+    for item in files:
+        size = min(item.size, limit)
+        tail_bytes = None
+        note = ''
+        if item.size > limit:
+            if not item.filename.lower().endswith(TRUNCATABLE_EXTENSIONS):
+                notes.append(
+                    f"**{label}:** {item.filename}\n"
+                    f"⚠️ File is {format_bytes(item.size)}, over the {format_bytes(limit)} limit, and was not copied."
+                )
+                continue
+            tail_bytes = limit
+            note = f' ⚠️ (file is {format_bytes(item.size)}, only the last {format_bytes(limit)} was kept)'
+        
+        if not bundles or len(bundles[-1]) == 10 or sum(entry[1] for entry in bundles[-1]) + size > limit:
+            bundles.append([])
+        bundles[-1].append((item, size, tail_bytes, note))
+    return bundles, notes
+
+async def relay_attachments(thread, attachments, label):
+    """Copy Discord attachments into a thread without holding them all in RAM
+    
+    Files are bundled by plan_file_bundles. Each bundle reserves its relay
+    budget up front and downloads its files concurrently. A note is left in
+    the thread for files that were refused or truncated.
+    Returns how many files were copied.
+    """
+    limit = min(MAX_DOWNLOAD_BYTES, thread.guild.filesize_limit)
+    bundles, notes = plan_file_bundles(attachments, limit, label)
+    
+    copied = 0
+    for bundle in bundles:
+        # Reserve the whole bundle at once so concurrent bundles can't deadlock on the budget
+        reserved = await relay_budget.acquire(sum(item[1] for item in bundle))
+        relayed_files = []
+        try:
+            results = await asyncio.gather(*(
+                download_to_relay(attachment.url, attachment.filename, max_bytes=limit,
+                                  expected_size=size, tail_bytes=tail_bytes, reserve=False)
+                for attachment, size, tail_bytes, note in bundle
+            ))
+            
+            lines = notes
+            notes = []
+            for (attachment, size, tail_bytes, note), relayed in zip(bundle, results):
+                if relayed is None:
+                    lines.append(f"**{label}:** {attachment.filename}\n⚠️ File could not be copied.")
+                else:
+                    relayed_files.append(relayed)
+                    lines.append(f"**{label}:** {attachment.filename}{note}")
+            
+            if relayed_files:
+                await thread.send('\n'.join(lines)[:2000], files=[relayed.to_discord_file() for relayed in relayed_files])
+            else:
+                await thread.send('\n'.join(lines)[:2000])
+            copied += len(relayed_files)
+        finally:
+            for relayed in relayed_files:
+                relayed.close()
+            relay_budget.release(reserved)
+    
+    if notes:
+        await thread.send('\n'.join(notes)[:2000])
+    return copied
+
+async def upload_relayed_files(thread, relayed_files, label):
+    """Post files the bot already holds into a thread, bundled like relay_attachments
+    
+    The caller still owns (and closes) the files. Returns how many were posted.
+    """
+    bundles, notes = plan_file_bundles(relayed_files, thread.guild.filesize_limit, label)
+    for bundle in bundles:
+        lines = notes + [f"**{label}:** {relayed.filename}{note}" for relayed, size, tail_bytes, note in bundle]
+        notes = []
+        await thread.send('\n'.join(lines)[:2000], files=[
+            relayed.to_discord_file(tail_bytes) for relayed, size, tail_bytes, note in bundle
+        ])
+    if notes:
+        await thread.send('\n'.join(notes)[:2000])
+    return sum(len(bundle) for bundle in bundles)
+
+async def sweep_expiring_maps():
+    """Periodically drop expired entries from the short-lived maps"""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        for expiring in (recent_bug_reports, pending_log_files, recently_blocked_webhooks, report_throttles):
+            expiring.sweep()
 
 def parse_plugin_embed(embed):
     """Parse embed from Unreal Engine plugin webhook"""
@@ -165,7 +1513,7 @@ def parse_plugin_embed(embed):
         'description': embed.description or 'No description provided'
     }
     
-    print(f'Parsing embed with {len(embed.fields)} fields', flush=True)
+    log.debug('Parsing embed with %s fields', len(embed.fields))
     
     for field in embed.fields:
         field_name = field.name.strip()
@@ -179,7 +1527,7 @@ def parse_plugin_embed(embed):
             data['user_id'] = field_value
         elif 'BugIt' in field_name or 'Location' in field_name:
             data['location'] = field_value
-            print(f'  -> Captured location!', flush=True)
+            log.debug('  -> Captured location!')
         elif 'Session Duration' in field_name or field_name == 'Session Duration':
             data['session_duration'] = field_value
         elif 'System' in field_name or field_name == 'System':
@@ -195,9 +1543,9 @@ def parse_plugin_embed(embed):
             data['response_type'] = response_match.group(1).strip()
             # Remove the Response Type line from description since we extracted it
             data['description'] = re.sub(r'\n*Response Type:\s*.+?(?:\n|$)', '', data['description']).strip()
-            print(f'  -> Extracted response_type from description: {data["response_type"]}', flush=True)
+            log.debug('  -> Extracted response_type from description: %s', data["response_type"])
     
-    print(f'Parsed data: {data}', flush=True)
+    log.debug('Parsed data: %s', data)
     return data
 
 def extract_player_id(embed):
@@ -237,10 +1585,44 @@ async def get_assignee_from_reactions(message):
                 return users[0]
     return None
 
+def get_bug_details_id(message):
+    """Get the recorded "Bug Report Details" message ID of a bug
+    
+    Returns None if unknown, 0 if the bug has no details message yet.
+    """
+    record = bug_index.get(message.guild.id, {}).get(message.id) if message.guild else None
+    return record.get('details_message_id') if record else None
+
+def set_bug_details_id(message, details_id):
+    """Record the "Bug Report Details" message ID of an indexed bug"""
+    record = bug_index.get(message.guild.id, {}).get(message.id) if message.guild else None
+    if record:
+        index_bug_record(message.guild.id, {**record, 'details_message_id': details_id})
+
+async def find_details_message(thread, message):
+    """Find the "Bug Report Details" message for a bug in its thread"""
+    details_id = get_bug_details_id(message)
+    if details_id:
+        try:
+            return await thread.fetch_message(details_id)
+        except Exception as e:
+            log.warning('Could not fetch details message %s, scanning thread: %s', details_id, e)
+    
+    # Fallback for bugs the index doesn't know about (or a deleted details message)
+    try:
+        async for msg in thread.history(limit=50):
+            if msg.author == bot.user and msg.embeds and msg.embeds[0].title == "Bug Report Details":
+                set_bug_details_id(message, msg.id)
+                return msg
+    except Exception as e:
+        log.error('Error checking thread history: %s', e)
+    return None
+
+@timed_handler('update_embed_from_reactions')
 async def update_embed_from_reactions(message):
-    """Update embed based on current reactions"""
+    """Update embed based on current reactions, returning the latest copy of the message"""
     if not message.embeds:
-        return
+        return message
     
     embed = message.embeds[0]
     status_emoji = get_current_status_from_reactions(message)
@@ -275,14 +1657,12 @@ async def update_embed_from_reactions(message):
     if is_resolved and thread and not is_compacted and not is_forum_post:
         # Only compact once - move detailed info to thread and compact the main embed
         # First check if details already exist in thread to avoid duplicates
-        details_exist = False
-        try:
-            async for msg in thread.history(limit=50):
-                if msg.author == bot.user and msg.embeds and msg.embeds[0].title == "Bug Report Details":
-                    details_exist = True
-                    break
-        except Exception as e:
-            print(f'Error checking thread history: {e}', flush=True)
+        # (the bug index knows for reports it saw being created, older ones need a scan)
+        details_id = get_bug_details_id(message)
+        if details_id is None:
+            details_exist = await find_details_message(thread, message) is not None
+        else:
+            details_exist = details_id != 0
         
         # Only send details if they don't already exist
         if not details_exist:
@@ -308,9 +1688,10 @@ async def update_embed_from_reactions(message):
                 detail_embed.set_image(url=original_image)
             
             try:
-                await thread.send(embed=detail_embed)
+                details_message = await thread.send(embed=detail_embed)
+                set_bug_details_id(message, details_message.id)
             except Exception as e:
-                print(f'Error sending details to thread: {e}', flush=True)
+                log.error('Error sending details to thread: %s', e)
         
         # Create compact embed with just title and status
         compact_embed = discord.Embed(
@@ -321,16 +1702,12 @@ async def update_embed_from_reactions(message):
         compact_embed.add_field(name='Status', value=status_text, inline=True)
         compact_embed.set_footer(text=embed.footer.text if embed.footer else '')
         
-        await message.edit(embed=compact_embed)
+        message = await message.edit(embed=compact_embed)
     elif is_compacted and not is_resolved and thread and not is_forum_post:
         # Bug was reopened - restore full embed from thread details (not for forum posts)
         try:
             # Find the details message in the thread
-            details_message = None
-            async for msg in thread.history(limit=50):
-                if msg.author == bot.user and msg.embeds and msg.embeds[0].title == "Bug Report Details":
-                    details_message = msg
-                    break
+            details_message = await find_details_message(thread, message)
             
             if details_message and details_message.embeds:
                 details_embed = details_message.embeds[0]
@@ -366,20 +1743,20 @@ async def update_embed_from_reactions(message):
                 
                 full_embed.set_footer(text=embed.footer.text if embed.footer else '')
                 
-                await message.edit(embed=full_embed)
+                message = await message.edit(embed=full_embed)
             else:
                 # Fallback: just update status in compact view
                 embed.color = 0x95a5a6 if status_text == 'New' else (0xffa500 if status_text == 'In Progress' else embed.color)
                 embed.set_field_at(0, name='Status', value=status_text, inline=True)
                 embed.timestamp = datetime.now()
-                await message.edit(embed=embed)
+                message = await message.edit(embed=embed)
         except Exception as e:
-            print(f'Error restoring full embed: {e}', flush=True)
+            log.error('Error restoring full embed: %s', e)
             # Fallback: just update status
             embed.color = 0x95a5a6 if status_text == 'New' else (0xffa500 if status_text == 'In Progress' else embed.color)
             embed.set_field_at(0, name='Status', value=status_text, inline=True)
             embed.timestamp = datetime.now()
-            await message.edit(embed=embed)
+            message = await message.edit(embed=embed)
     elif not is_compacted:
         # Normal embed update for non-resolved statuses
         # Update status field
@@ -415,15 +1792,23 @@ async def update_embed_from_reactions(message):
         # Update timestamp
         embed.timestamp = datetime.now()
         
-        await message.edit(embed=embed)
+        message = await message.edit(embed=embed)
     
     # Update forum tags based on status (for forum posts only)
     is_forum_post = isinstance(message.channel, discord.Thread) and isinstance(message.channel.parent, discord.ForumChannel)
     if is_forum_post:
         await update_forum_tags(message.channel, status_text, is_high_priority(message), message)
+    
+    return message
 
+@timed_handler('update_forum_tags')
 async def update_forum_tags(thread, status, high_priority=False, message=None):
-    """Update forum post tags based on status and priority"""
+    """Update forum post tags based on status and priority (lowest REST priority)"""
+    with rest_context(PRIORITY_TAGS):
+        await apply_forum_tags(thread, status, high_priority, message)
+
+async def apply_forum_tags(thread, status, high_priority=False, message=None):
+    """Work out and apply the forum tags for a bug post"""
     forum_channel = thread.parent
     if not isinstance(forum_channel, discord.ForumChannel):
         return
@@ -466,7 +1851,7 @@ async def update_forum_tags(thread, status, high_priority=False, message=None):
                     if tag.name.lower() == tag_name.lower():
                         return tag
         except Exception as e:
-            print(f'Error creating tag "{tag_name}": {e}', flush=True)
+            log.error('Error creating tag "%s": %s', tag_name, e)
         return None
     
     # Get response type from embed if available
@@ -515,63 +1900,1328 @@ async def update_forum_tags(thread, status, high_priority=False, message=None):
     new_tags = new_tags[:5]
     if set(t.id for t in new_tags) != set(t.id for t in current_tags):
         try:
-            await thread.edit(applied_tags=new_tags)
-            print(f'Updated forum tags to: {[t.name for t in new_tags]}', flush=True)
+            # A newer tag edit for this thread replaces this one if it is still queued
+            with rest_context(PRIORITY_TAGS, supersede_key=('tags', thread.id)):
+                await thread.edit(applied_tags=new_tags)
+            log.debug('Updated forum tags to: %s', [t.name for t in new_tags])
+        except RequestSuperseded:
+            pass
         except Exception as e:
-            print(f'Error updating forum tags: {e}', flush=True)
+            log.error('Error updating forum tags: %s', e)
 
 # ========================
-# EVENT HANDLERS
+# BUG INDEX
 # ========================
 
-@bot.event
-async def on_ready():
-    print(f'Logged in as {bot.user} (ID: {bot.user.id})', flush=True)
-    load_guild_config()
-    load_blocked_users()
-    
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} slash commands', flush=True)
-    except Exception as e:
-        print(f'Error syncing commands: {e}', flush=True)
+# Maps status text -> counter key in bug_index_counts
+STATUS_COUNTER_KEYS = {
+    'New': 'new',
+    'In Progress': 'in_progress',
+    'Fixed': 'fixed',
+    "Won't Fix": 'wont_fix',
+}
+
+def new_bug_counts():
+    """Empty status counters for one guild"""
+    return {
+        'total': 0,
+        'new': 0,
+        'in_progress': 0,
+        'fixed': 0,
+        'wont_fix': 0,
+        'blocked': 0,
+        'high_priority': 0
+    }
+
+def is_bug_report_message(message):
+    """Check if a message is a bug report embed posted by this bot"""
+    if message.author != bot.user or not message.embeds:
+        return False
+    # Bug reports (full or compacted) always carry a Status field
+    return any(field.name == 'Status' for field in message.embeds[0].fields)
+
+def parse_assignee_field(value):
+    """Get the assignee user ID from an "Assigned to" field value"""
+    if value is None:
+        return None
+    match = re.match(r'<@!?(\d+)>', value)
+    # 0 means explicitly unassigned (None would keep the previous assignee)
+    return int(match.group(1)) if match else 0
+
+def build_bug_record(message):
+    """Build an index record from a bug report message"""
+    embed = message.embeds[0]
+    fields = {field.name: field.value for field in embed.fields}
+    status_emoji = get_current_status_from_reactions(message)
     
-    print('------', flush=True)
-    print('Bug tracker bot is ready!', flush=True)
-    print(f'Configured in {len(guild_channels)} guilds', flush=True)
+    # Forum posts live in their own thread, text channel threads share the message ID
+    is_forum_post = isinstance(message.channel, discord.Thread)
+    
+    return {
+        'message_id': message.id,
+        'channel_id': message.channel.id,
+        'thread_id': message.channel.id if is_forum_post else message.id,
+        'title': embed.title,
+        'status': REACTIONS[status_emoji]['status'] if status_emoji else 'New',
+        'high_priority': is_high_priority(message),
+        # Compacted embeds drop these, so None means "keep what we had"
+        'type': fields.get('Type'),
+        'map': fields.get('Map'),
+        'assignee_id': parse_assignee_field(fields.get('Assigned to')),
+        'location': parse_location(fields.get('Location')),
+    }
 
-@bot.event
-async def on_guild_remove(guild):
-    """Clean up data when bot is removed from a guild"""
-    print(f'Bot removed from guild: {guild.name} (ID: {guild.id})', flush=True)
+def _count_bug(counts, record, delta):
+    """Add (delta=1) or remove (delta=-1) a record's contribution to the counters"""
+    counts['total'] += delta
+    counts[STATUS_COUNTER_KEYS.get(record['status'], 'new')] += delta
+    if record['high_priority']:
+        counts['high_priority'] += delta
+
+def _link_assignees(guild_id, message_id, old_ids, new_ids):
+    """Move a bug between users in the assignee reverse index"""
+    by_user = bug_assignees.setdefault(guild_id, {})
+    for user_id in set(old_ids) - set(new_ids):
+        bugs = by_user.get(user_id)
+        if bugs:
+            bugs.discard(message_id)
+            if not bugs:
+                del by_user[user_id]
+    for user_id in set(new_ids) - set(old_ids):
+        by_user.setdefault(user_id, set()).add(message_id)
+
+def _location_cell(location):
+    """Grid cell of an (x, y, z) location in the spatial index"""
+    return tuple(math.floor(coordinate / NEARBY_CELL_SIZE) for coordinate in location)
+
+def _link_location(guild_id, message_id, old_record, new_record):
+    """Move a bug between grid cells in the spatial index"""
+    old_key = (old_record['map'] or '').lower() if old_record and old_record.get('location') else None
+    new_key = (new_record['map'] or '').lower() if new_record.get('location') else None
+    old_cell = _location_cell(old_record['location']) if old_key is not None else None
+    new_cell = _location_cell(new_record['location']) if new_key is not None else None
+    if (old_key, old_cell) == (new_key, new_cell):
+        return
     
-    # Remove guild configuration
-    if guild.id in guild_channels:
-        del guild_channels[guild.id]
-        save_guild_config()
-        print(f'Removed guild config for {guild.id}', flush=True)
+    maps = bug_locations.setdefault(guild_id, {})
+    if old_key is not None:
+        cells = maps.get(old_key, {})
+        bugs = cells.get(old_cell)
+        if bugs:
+            bugs.discard(message_id)
+            if not bugs:
+                del cells[old_cell]
+            if not cells:
+                maps.pop(old_key, None)
+    if new_key is not None:
+        maps.setdefault(new_key, {}).setdefault(new_cell, set()).add(message_id)
+
+def rebuild_location_index(guild_id):
+    """Recreate a guild's spatial index from its bug records"""
+    bug_locations[guild_id] = {}
+    for record in bug_index.get(guild_id, {}).values():
+        _link_location(guild_id, record['message_id'], None, record)
+
+def find_nearby_bugs(guild_id, map_name, point, radius):
+    """Open bugs on a map within radius of point, as (distance, record), closest first"""
+    cells = bug_locations.get(guild_id, {}).get((map_name or '').lower())
+    if not cells:
+        return []
     
-    # Remove blocked users for this guild
-    if guild.id in blocked_users:
-        del blocked_users[guild.id]
-        save_blocked_users()
-        print(f'Removed blocked users for {guild.id}', flush=True)
+    low = _location_cell([c - radius for c in point])
+    high = _location_cell([c + radius for c in point])
+    span = [h - l + 1 for l, h in zip(low, high)]
+    if span[0] * span[1] * span[2] <= len(cells):
+        candidates = (
+            cells.get((x, y, z), ())
+            for x in range(low[0], high[0] + 1)
+            for y in range(low[1], high[1] + 1)
+            for z in range(low[2], high[2] + 1)
+        )
+    else:
+        # Radius covers more cells than the map has in use, just check those
+        candidates = cells.values()
+    
+    records = bug_index.get(guild_id, {})
+    nearby = []
+    for bugs in candidates:
+        for message_id in bugs:
+            record = records.get(message_id)
+            if not record or record['status'] in ('Fixed', "Won't Fix"):
+                continue
+            distance = math.dist(point, record['location'])
+            if distance <= radius:
+                nearby.append((distance, record))
+    nearby.sort(key=lambda entry: entry[0])
+    return nearby
+
+def rebuild_assignee_index(guild_id):
+    """Recreate a guild's assignee reverse index from its bug records"""
+    bug_assignees[guild_id] = {}
+    for record in bug_index.get(guild_id, {}).values():
+        _link_assignees(guild_id, record['message_id'], (), record.get('assignees') or ())
+
+def index_bug_record(guild_id, record):
+    """Insert or update a bug record, keeping the guild counters in sync"""
+    bugs = bug_index.setdefault(guild_id, {})
+    counts = bug_index_counts.setdefault(guild_id, new_bug_counts())
+    
+    old_record = bugs.get(record['message_id'])
+    if old_record:
+        _count_bug(counts, old_record, -1)
+        record = {**old_record, **{k: v for k, v in record.items() if v is not None}}
+    
+    bugs[record['message_id']] = record
+    _count_bug(counts, record, 1)
+    _link_assignees(
+        guild_id,
+        record['message_id'],
+        (old_record or {}).get('assignees') or (),
+        record.get('assignees') or ()
+    )
+    _link_location(guild_id, record['message_id'], old_record, record)
     
-    # Clean up in-memory data
-    keys_to_remove = [k for k in recently_blocked_webhooks.keys() if k[0] == guild.id]
-    for key in keys_to_remove:
-        del recently_blocked_webhooks[key]
+    if record != old_record:
+        append_bug_state({'guild_id': guild_id, 'bug': record})
+    return record
+
+def set_bug_assignee(guild_id, message_id, user_id, assigned):
+    """Add or remove a 🧑‍💻 reactor on an indexed bug (from a raw reaction payload)"""
+    record = bug_index.get(guild_id, {}).get(message_id)
+    if not record:
+        return
     
-    keys_to_remove = [k for k in pending_log_files.keys() if k[0] == guild.id]
-    for key in keys_to_remove:
-        del pending_log_files[key]
+    assignees = set(record.get('assignees') or ())
+    if assigned:
+        assignees.add(user_id)
+    else:
+        assignees.discard(user_id)
+    
+    if assignees != set(record.get('assignees') or ()):
+        index_bug_record(guild_id, {**record, 'assignees': sorted(assignees)})
+
+def index_bug_message(message):
+    """Index a bug report message if it belongs to its guild's bug channel"""
+    if not is_bug_report_message(message) or not is_in_bug_channel(message):
+        return None
+    # A message can become known as a bug after being cached as unknown
+    if message.id in message_cache:
+        message_cache[message.id]['is_bug'] = True
+    return index_bug_record(message.guild.id, build_bug_record(message))
+
+def drop_bug_index(guild_id):
+    """Forget everything indexed for a guild (next use triggers a rebuild)"""
+    bug_index.pop(guild_id, None)
+    bug_index_counts.pop(guild_id, None)
+    bug_assignees.pop(guild_id, None)
+    bug_locations.pop(guild_id, None)
+    bug_index_ready.discard(guild_id)
+    append_bug_state({'guild_id': guild_id, 'drop': True})
+
+async def fetch_thread_starters(channel, include_archived=True, after_id=0):
+    """Yield (thread, starter message) pairs for the threads of a forum channel
+    
+    Starter messages already in discord.py's message cache are used without a
+    REST call. The rest are fetched by FORUM_FETCH_CONCURRENCY workers while
+    archived threads are still being paged in, so results stream out as soon
+    as they arrive. discord.py's HTTP client keeps the calls inside Discord's
+    rate limit buckets; the worker count just bounds how many are in flight.
+    """
+    threads = asyncio.Queue(maxsize=FORUM_FETCH_CONCURRENCY * 2)
+    results = asyncio.Queue()
+    
+    async def list_threads():
+        try:
+            for thread in channel.threads:
+                if thread.id > after_id:
+                    await threads.put(thread)
+            if include_archived:
+                async for thread in channel.archived_threads(limit=None):
+                    if thread.id > after_id:
+                        await threads.put(thread)
+        except Exception as e:
+            log.error('Error listing forum threads: %s', e)
+        finally:
+            # One stop marker per worker
+            for _ in range(FORUM_FETCH_CONCURRENCY):
+                await threads.put(None)
+    
+    async def fetch_worker():
+        try:
+            while True:
+                thread = await threads.get()
+                if thread is None:
+                    break
+                starter_message = thread.starter_message
+                if starter_message is None:
+                    try:
+                        starter_message = await thread.fetch_message(thread.id)
+                    except Exception as e:
+                        log.error('Error fetching thread starter: %s', e)
+                        continue
+                await results.put((thread, starter_message))
+        finally:
+            await results.put(None)
+    
+    tasks = [asyncio.create_task(list_threads())]
+    tasks += [asyncio.create_task(fetch_worker()) for _ in range(FORUM_FETCH_CONCURRENCY)]
+    
+    finished_workers = 0
+    try:
+        while finished_workers < FORUM_FETCH_CONCURRENCY:
+            result = await results.get()
+            if result is None:
+                finished_workers += 1
+                continue
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def iter_bug_messages(channel):
+    """Yield every bug report message in a text or forum bug channel"""
+    if isinstance(channel, discord.ForumChannel):
+        # For forum channels, the bug is the starter message of each thread
+        async for thread, starter_message in fetch_thread_starters(channel):
+            if is_bug_report_message(starter_message):
+                yield starter_message
+    else:
+        # For text channels, scan channel history
+        async for message in channel.history(limit=None):
+            if is_bug_report_message(message):
+                yield message
+
+async def rebuild_bug_index(guild_id, channel):
+    """Rebuild a guild's bug index with a full scan of the bug channel"""
+    bugs = {}
+    counts = new_bug_counts()
+    
+    async for message in iter_bug_messages(channel):
+        record = build_bug_record(message)
+        record['assignees'] = []
+        
+        # Only bugs someone actually picked up need their reactors paged in
+        for reaction in message.reactions:
+            if str(reaction.emoji) == '🧑‍💻' and reaction.count > (1 if reaction.me else 0):
+                record['assignees'] = sorted([user.id async for user in reaction.users() if not user.bot])
+        
+        # Keep what the message can't tell us: the details message ID, and the
+        # fields a compacted embed no longer shows
+        old_record = bug_index.get(guild_id, {}).get(record['message_id'])
+        if old_record:
+            record = {**old_record, **{k: v for k, v in record.items() if v is not None}}
+        
+        bugs[record['message_id']] = record
+        _count_bug(counts, record, 1)
+    
+    bug_index[guild_id] = bugs
+    bug_index_counts[guild_id] = counts
+    rebuild_assignee_index(guild_id)
+    rebuild_location_index(guild_id)
+    bug_index_ready.add(guild_id)
+    log.info('Rebuilt bug index for guild %s: %s bugs', guild_id, counts["total"])
+    
+    # Rewrite the snapshot so it matches the fresh scan
+    schedule_bug_state_flush(compact=True)
+
+async def ensure_bug_index(guild_id, channel, rebuild=False):
+    """Return the guild counters, scanning the channel only if the index is cold"""
+    # A warm index is answered without the lock: a rebuild scan may hold it for
+    # minutes, and the counters are updated in place so they are always consistent
+    if not rebuild and guild_id in bug_index_ready:
+        return bug_index_counts[guild_id]
+    lock = bug_index_locks.setdefault(guild_id, asyncio.Lock())
+    async with lock:
+        if rebuild or guild_id not in bug_index_ready:
+            # A full scan is hundreds of calls, keep it behind everything else
+            with rest_context(PRIORITY_BACKGROUND):
+                await rebuild_bug_index(guild_id, channel)
+    return bug_index_counts[guild_id]
+
+# The snapshot is written behind, like PersistentStore: changes are buffered
+# and appended off the event loop PERSIST_FLUSH_DELAY seconds later, so a burst
+# of reactions costs one write. Once superseded lines outnumber the live
+# records, a flush rewrites the file with one line per bug instead.
+
+def append_bug_state(entry):
+    """Queue one change for the bug state snapshot"""
+    if not BUG_STATE_FILE:
+        return
+    bug_state_pending.append(json.dumps(entry))
+    schedule_bug_state_flush()
+
+def schedule_bug_state_flush(compact=False):
+    """Write pending changes (or, with compact, the whole snapshot) in the background"""
+    global bug_state_flush_timer, bug_state_compact_due
+    if not BUG_STATE_FILE:
+        return
+    bug_state_compact_due = bug_state_compact_due or compact
+    if bug_state_flush_timer is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Not running inside the bot (e.g. a script), just write now
+        flush_bug_state_now()
+        return
+    bug_state_flush_timer = loop.call_later(PERSIST_FLUSH_DELAY, lambda: asyncio.ensure_future(flush_bug_state()))
+
+def take_bug_state_writes():
+    """Capture what the next write needs on the event loop: (lines to append, snapshot or None)"""
+    global bug_state_compact_due, bug_state_flush_timer
+    if bug_state_flush_timer is not None:
+        bug_state_flush_timer.cancel()
+        bug_state_flush_timer = None
+    lines = bug_state_pending[:]
+    bug_state_pending.clear()
+    
+    live_lines = sum(len(bugs) for bugs in bug_index.values()) + len(bug_index)
+    if bug_state_compact_due or bug_state_lines + len(lines) > 2 * live_lines + 100:
+        bug_state_compact_due = False
+        # Records are replaced, never changed in place, so the lists can be serialized later
+        snapshot = [(guild_id, list(bugs.values()), guild_id in bug_index_ready) for guild_id, bugs in bug_index.items()]
+        return lines, snapshot
+    return lines, None
+
+def write_bug_state(path, lines, snapshot):
+    """Append lines to the snapshot file, or rewrite it from snapshot (blocking)
+    
+    Returns how many lines were written.
+    """
+    if snapshot is None:
+        with open(path, 'a') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        return len(lines)
+    
+    temp_file = f'{path}.tmp'
+    written = 0
+    with open(temp_file, 'w') as f:
+        for guild_id, records, ready in snapshot:
+            for record in records:
+                f.write(json.dumps({'guild_id': guild_id, 'bug': record}) + '\n')
+            written += len(records)
+            if ready:
+                f.write(json.dumps({'guild_id': guild_id, 'ready': True}) + '\n')
+                written += 1
+    os.replace(temp_file, path)
+    return written
+
+def finish_bug_state_write(lines, snapshot, written):
+    """Track the file's length after a write, or keep the changes for the next one if it failed"""
+    global bug_state_lines, bug_state_compact_due
+    if written is None:
+        bug_state_pending[:0] = lines
+        bug_state_compact_due = bug_state_compact_due or snapshot is not None
+    elif snapshot is None:
+        bug_state_lines += written
+    else:
+        bug_state_lines = written
+
+async def flush_bug_state():
+    """Write pending snapshot changes off the event loop"""
+    global bug_state_flush_lock
+    if bug_state_flush_lock is None:
+        bug_state_flush_lock = asyncio.Lock()
+    async with bug_state_flush_lock:
+        lines, snapshot = take_bug_state_writes()
+        if not lines and snapshot is None:
+            return
+        written = None
+        try:
+            written = await asyncio.get_running_loop().run_in_executor(None, write_bug_state, BUG_STATE_FILE, lines, snapshot)
+        except Exception as e:
+            log.error('Error saving bug state: %s', e)
+        finish_bug_state_write(lines, snapshot, written)
+
+def flush_bug_state_now():
+    """Write pending snapshot changes synchronously (scripts without an event loop)"""
+    lines, snapshot = take_bug_state_writes()
+    if not lines and snapshot is None:
+        return
+    written = None
+    try:
+        written = write_bug_state(BUG_STATE_FILE, lines, snapshot)
+    except Exception as e:
+        log.error('Error saving bug state: %s', e)
+    finish_bug_state_write(lines, snapshot, written)
+
+def bug_state_flush_pending():
+    return bug_state_flush_timer is not None
+
+def load_bug_state():
+    """Load the bug index from the snapshot, replaying it line by line"""
+    global bug_state_lines
+    if not BUG_STATE_FILE or not os.path.exists(BUG_STATE_FILE):
+        return
+    
+    line_count = 0
+    try:
+        with open(BUG_STATE_FILE, 'r') as f:
+            for line in f:
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a partial last line
+                    continue
+                
+                guild_id = entry['guild_id']
+                if 'bug' in entry:
+                    record = entry['bug']
+                    # JSON turns the location tuple into a list
+                    if record.get('location') is not None:
+                        record['location'] = tuple(record['location'])
+                    bugs = bug_index.setdefault(guild_id, {})
+                    counts = bug_index_counts.setdefault(guild_id, new_bug_counts())
+                    if record['message_id'] in bugs:
+                        _count_bug(counts, bugs[record['message_id']], -1)
+                    bugs[record['message_id']] = record
+                    _count_bug(counts, record, 1)
+                elif entry.get('ready'):
+                    bug_index_ready.add(guild_id)
+                elif entry.get('drop'):
+                    bug_index.pop(guild_id, None)
+                    bug_index_counts.pop(guild_id, None)
+                    bug_index_ready.discard(guild_id)
+    except Exception as e:
+        log.error('Error loading bug state: %s', e)
+        return
+    
+    for guild_id in bug_index:
+        rebuild_assignee_index(guild_id)
+        rebuild_location_index(guild_id)
+    
+    total_bugs = sum(len(bugs) for bugs in bug_index.values())
+    log.info('Loaded %s bugs from snapshot (%s guilds warm)', total_bugs, len(bug_index_ready))
+    
+    # The next flush compacts the snapshot if it is mostly superseded updates
+    bug_state_lines = line_count
+    if line_count > 2 * (total_bugs + len(bug_index)) + 100:
+        schedule_bug_state_flush(compact=True)
+
+async def reconcile_bug_index(guild_id):
+    """Index bug reports newer than the last snapshotted one
+    
+    Reactions changed on older bugs while the bot was offline are not picked
+    up here (Discord can't list them without refetching every bug); a
+    /bug_stats rebuild does.
+    """
+    channel = bot.get_channel(get_bug_channel(guild_id) or 0)
+    if not channel:
+        return
+    
+    checkpoint = max(bug_index.get(guild_id, {}).keys(), default=0)
+    found = 0
+    # Background catch-up, so it yields to everything user facing
+    rest_priority.set(PRIORITY_BACKGROUND)
+    try:
+        if isinstance(channel, discord.ForumChannel):
+            # New posts are active threads, which are already in the gateway cache
+            async for thread, starter_message in fetch_thread_starters(channel, include_archived=False, after_id=checkpoint):
+                if index_bug_message(starter_message):
+                    found += 1
+        else:
+            after = discord.Object(id=checkpoint) if checkpoint else None
+            async for message in channel.history(limit=None, after=after, oldest_first=True):
+                if index_bug_message(message):
+                    found += 1
+    except Exception as e:
+        log.error('Error reconciling bug index for guild %s: %s', guild_id, e)
+        return
+    
+    log.info('Reconciled bug index for guild %s: %s new bugs since snapshot', guild_id, found)
+
+# ========================
+# SCREENSHOT TRANSCODING
+# ========================
+
+# Raw engine screenshots are often multi-megabyte PNGs. Decoding and
+# re-encoding them is CPU bound, so it runs in a small process pool and the
+# event loop only waits on the result.
+
+SCREENSHOT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+def transcode_image(data, max_size, image_format, quality):
+    """Downscale an image to fit max_size and re-encode it (runs in the image pool)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)  # Only ever shrinks
+        if image_format == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, format=image_format.upper(), quality=quality)
+        return output.getvalue()
+
+def get_image_pool():
+    """The process pool for transcoding, started on first use"""
+    global image_pool
+    if image_pool is None:
+        image_pool = concurrent.futures.ProcessPoolExecutor(max_workers=SCREENSHOT_WORKERS)
+    return image_pool
+
+def reset_image_pool(broken):
+    """Drop a broken image pool so the next transcode starts a new one"""
+    global image_pool
+    broken.shutdown(wait=False, cancel_futures=True)
+    # Other transcodes on the same pool fail too; only the first one replaces it
+    if image_pool is broken:
+        image_pool = None
+
+async def transcode_screenshot(screenshot):
+    """Downscale and re-encode a screenshot in the image pool
+    
+    Returns a new RelayedFile, or None when transcoding is off, fails or would
+    not make the file any smaller.
+    """
+    if not SCREENSHOT_MAX_SIZE or Image is None or SCREENSHOT_FORMAT not in SCREENSHOT_EXTENSIONS:
+        return None
+    
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(None, screenshot.read_all)
+    pool = get_image_pool()
+    started_at = time.monotonic()
+    try:
+        result = await loop.run_in_executor(
+            pool, transcode_image, data, SCREENSHOT_MAX_SIZE, SCREENSHOT_FORMAT, SCREENSHOT_QUALITY
+        )
+    except concurrent.futures.process.BrokenProcessPool as e:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        screenshot_stats['failed'] += 1
+        log.warning('Image pool broke while transcoding %s, restarting it: %s', screenshot.filename, e)
+        reset_image_pool(pool)
+        return None
+    except Exception as e:
+        screenshot_stats['failed'] += 1
+        log.warning('Could not transcode screenshot %s: %s', screenshot.filename, e)
+        return None
+    metrics.observe('bug_tracker_screenshot_transcode_seconds', time.monotonic() - started_at)
+    
+    if len(result) >= screenshot.size:
+        screenshot_stats['skipped'] += 1
+        return None
+    
+    stem = os.path.splitext(screenshot.filename)[0] or 'screenshot'
+    # The caller is already holding the original, so don't wait for room while holding it
+    reserved = relay_budget.try_acquire(len(result))
+    if reserved is None:
+        screenshot_stats['skipped'] += 1
+        return None
+    transcoded = RelayedFile(f'{stem}.{SCREENSHOT_EXTENSIONS[SCREENSHOT_FORMAT]}', reserved)
+    transcoded.write(result)
+    screenshot_stats['transcoded'] += 1
+    screenshot_stats['bytes_in'] += screenshot.size
+    screenshot_stats['bytes_out'] += transcoded.size
+    log.debug('Transcoded screenshot %s from %s to %s', screenshot.filename, format_bytes(screenshot.size), format_bytes(transcoded.size))
+    return transcoded
+
+async def shrink_screenshot(screenshot):
+    """Swap a screenshot for its transcoded version when that is enabled and smaller
+    
+    Returns (screenshot for the embed, original to post in the thread or None).
+    The replaced original is closed here unless SCREENSHOT_KEEP_ORIGINAL is set.
+    """
+    transcoded = await transcode_screenshot(screenshot) if screenshot else None
+    if transcoded is None:
+        return screenshot, None
+    if SCREENSHOT_KEEP_ORIGINAL:
+        return transcoded, screenshot
+    screenshot.close()
+    return transcoded, None
+
+# ========================
+# LOG FILE ASSOCIATION
+# ========================
+
+# Log files arrive as a separate webhook message just before or after the
+# report. Both sides are keyed by webhook and ordered by Discord creation
+# time, so whichever arrives second finds its partner with a bisect.
+
+def _expire_log_entries(entries, now):
+    """Drop entries created more than LOG_PENDING_TTL ago (they are at the front)"""
+    cutoff = now - LOG_PENDING_TTL
+    expired = bisect.bisect_left(entries, (cutoff,))
+    if expired:
+        del entries[:expired]
+    return expired
+
+def add_pending_log_file(webhook_key, log_message):
+    """Hand a log file to a waiting report, or keep it until its report shows up
+    
+    Returns the thread ID of an already created report it belongs to, 0 if
+    that report was throttled (the log file should be deleted), or None.
+    """
+    created_ts = log_message.created_at.timestamp()
+    
+    # A report that is already waiting gets it immediately (closest in time wins)
+    waiters = log_file_waiters.get(webhook_key, [])
+    best = None
+    for waiter in waiters:
+        diff = abs(waiter[0] - created_ts)
+        if diff <= LOG_MATCH_WINDOW and not waiter[1].done() and (best is None or diff < best[0]):
+            best = (diff, waiter)
+    if best:
+        waiters.remove(best[1])
+        best[1][1].set_result(log_message)
+        return None
+    
+    # A report that already finished gets it as a late arrival
+    reports = recent_bug_reports.get(webhook_key, [])
+    _expire_log_entries(reports, time.time())
+    start = bisect.bisect_left(reports, (created_ts - LOG_MATCH_WINDOW,))
+    end = bisect.bisect_right(reports, (created_ts + LOG_MATCH_WINDOW, float('inf')))
+    if start < end:
+        return min(reports[start:end], key=lambda report: abs(report[0] - created_ts))[1]
+    
+    entries = pending_log_files.setdefault(webhook_key, [])
+    _expire_log_entries(entries, time.time())
+    bisect.insort(entries, (created_ts, log_message.id, log_message))
+    return None
+
+def discard_pending_log_file(webhook_key, message_id):
+    """Forget a pending message (e.g. it turned out to be a report, not a log)"""
+    entries = pending_log_files.get(webhook_key)
+    if not entries:
+        return
+    entries[:] = [entry for entry in entries if entry[1] != message_id]
+    if not entries:
+        del pending_log_files[webhook_key]
+
+def take_pending_log_files(webhook_key, created_ts):
+    """Remove and return the pending log files created within LOG_MATCH_WINDOW of a report"""
+    entries = pending_log_files.get(webhook_key)
+    if not entries:
+        return []
+    
+    _expire_log_entries(entries, time.time())
+    start = bisect.bisect_left(entries, (created_ts - LOG_MATCH_WINDOW,))
+    end = bisect.bisect_right(entries, (created_ts + LOG_MATCH_WINDOW, float('inf')))
+    matched = [entry[2] for entry in entries[start:end]]
+    del entries[start:end]
+    if not entries:
+        del pending_log_files[webhook_key]
+    return matched
+
+async def wait_for_log_file(webhook_key, created_ts, timeout):
+    """Wait up to timeout seconds for a log file matching a report"""
+    waiter = (created_ts, asyncio.get_running_loop().create_future())
+    log_file_waiters.setdefault(webhook_key, []).append(waiter)
+    try:
+        return await asyncio.wait_for(waiter[1], timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        waiters = log_file_waiters.get(webhook_key)
+        if waiters is not None:
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                del log_file_waiters[webhook_key]
+
+def remember_bug_report(webhook_key, created_ts, thread_id):
+    """Remember a finished report so log files arriving late still find its thread
+    
+    thread_id is 0 for a throttled report, whose late log files are deleted.
+    """
+    reports = recent_bug_reports.setdefault(webhook_key, [])
+    _expire_log_entries(reports, time.time())
+    bisect.insort(reports, (created_ts, thread_id))
+
+async def move_log_files_to_thread(thread, log_messages):
+    """Relay log messages' attachments into a bug thread and delete the originals"""
+    attachments = [attachment for log_message in log_messages for attachment in log_message.attachments]
+    try:
+        log.debug('Sending %s log files to thread %s', len(attachments), thread.id)
+        await relay_attachments(thread, attachments, 'Log File')
+    except Exception as e:
+        log.error('Error moving log files: %s', e)
+    
+    # Try to delete the original log messages
+    results = await asyncio.gather(*(log_message.delete() for log_message in log_messages), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            log.warning('Could not delete log message (may already be deleted): %s', result)
+
+async def move_late_log_file(thread_id, log_message):
+    """Move a log file that arrived after its report was already finished"""
+    thread = bot.get_channel(thread_id)
+    if thread is None:
+        try:
+            thread = await bot.fetch_channel(thread_id)
+        except Exception as e:
+            log.warning('Could not find thread %s for late log file: %s', thread_id, e)
+            return
+    await move_log_files_to_thread(thread, [log_message])
+
+async def delete_throttled_report(webhook_key, message):
+    """Delete a throttled report along with its log files
+    
+    Its log files would otherwise be left pending, where the next report from
+    the webhook (possibly another player's) would claim them.
+    """
+    report_ts = message.created_at.timestamp()
+    # An edited report may have been kept as a pending log file before its embed arrived
+    discard_pending_log_file(webhook_key, message.id)
+    log_messages = take_pending_log_files(webhook_key, report_ts)
+    # Log files arriving from now on are deleted as they come in
+    remember_bug_report(webhook_key, report_ts, 0)
+    
+    await message.delete()
+    results = await asyncio.gather(*(log_message.delete() for log_message in log_messages), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            log.warning('Could not delete log message (may already be deleted): %s', result)
+
+# ========================
+# REPORT THROTTLING
+# ========================
+
+def get_throttle_bucket(guild_id, kind, key, capacity, per_minute):
+    """Get (and keep alive) the bucket for one player or webhook"""
+    bucket_key = (guild_id, kind, str(key))
+    bucket = report_throttles.get(bucket_key)
+    if bucket is None:
+        bucket = TokenBucket(capacity, per_minute)
+    # Writing refreshes the entry's expiry
+    report_throttles[bucket_key] = bucket
+    return bucket
+
+def throttle_report(guild_id, webhook_id, player_id):
+    """Take a token for a new report, returning None or why it is throttled
+    
+    Both the player's and the webhook's bucket must have a token, and a
+    report that is turned away only costs the bucket that refused it.
+    """
+    buckets = []
+    if player_id and THROTTLE_PLAYER_BURST > 0:
+        buckets.append(('player', get_throttle_bucket(guild_id, 'player', player_id, THROTTLE_PLAYER_BURST, THROTTLE_PLAYER_PER_MINUTE)))
+    if THROTTLE_WEBHOOK_BURST > 0:
+        buckets.append(('webhook', get_throttle_bucket(guild_id, 'webhook', webhook_id, THROTTLE_WEBHOOK_BURST, THROTTLE_WEBHOOK_PER_MINUTE)))
+    
+    for kind, bucket in buckets:
+        if bucket.available() < 1:
+            bucket.denied += 1
+            bucket.last_denied = datetime.now()
+            return kind
+    
+    for _, bucket in buckets:
+        bucket.tokens -= 1
+        bucket.allowed += 1
+    return None
+
+def get_throttled(guild_id):
+    """Players and webhooks in a guild that had reports throttled, most throttled first"""
+    throttled = [
+        (kind, key, bucket)
+        for (gid, kind, key), bucket in zip(report_throttles.keys(), report_throttles.values())
+        if gid == guild_id and bucket.denied
+    ]
+    throttled.sort(key=lambda entry: entry[2].denied, reverse=True)
+    return throttled
+
+# ========================
+# DUPLICATE DETECTION
+# ========================
+
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4  # Bands x rows = signature length; reports ~50% alike or more become candidates
+MINHASH_BUCKET_SIZE = 32  # Newest reports kept per band bucket, bounds the cost of a lookup
+_minhash_rng = random.Random(0x5EED)  # Fixed seed, so signatures are stable across restarts
+MINHASH_MASKS = [_minhash_rng.getrandbits(64) for _ in range(MINHASH_BANDS * MINHASH_ROWS)]
+
+def parse_location(value):
+    """Get (x, y, z) from a BugItGo/Location field value, or None"""
+    if not value:
+        return None
+    numbers = re.findall(r'-?\d+(?:\.\d+)?', value)
+    if len(numbers) < 3:
+        return None
+    return tuple(float(n) for n in numbers[:3])
+
+def report_fingerprint(plugin_data, title=None):
+    """MinHash signature of a report's title and description, or None if there is too little text
+    
+    Words and word pairs are hashed once, then each signature slot keeps the
+    minimum of those hashes XORed with its own random mask.
+    """
+    words = re.findall(r'[a-z0-9]+', (plugin_data['description'] or '').lower())
+    if len(words) < DUPLICATE_MIN_WORDS:
+        return None
+    shingles = set(words)
+    shingles.update(f'{a} {b}' for a, b in zip(words, words[1:]))
+    shingles.update(f'title:{word}' for word in re.findall(r'[a-z0-9]+', (title or '').lower()))
+    if plugin_data['response_type']:
+        shingles.add(f"type:{plugin_data['response_type'].lower()}")
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little') for shingle in shingles]
+    return tuple(min(map(mask.__xor__, hashes)) for mask in MINHASH_MASKS)
+
+class MinHashIndex:
+    """LSH index of report signatures for one guild
+    
+    Signatures are split into bands; reports sharing any band (on the same
+    map) are candidates and are then compared slot by slot. Each bucket keeps
+    only its newest entries, so a lookup is at most bands x bucket size
+    comparisons however many reports are indexed.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # bug message_id -> (signature, map key, location, thread_id)
+        self.buckets = {}  # (map key, band, band hash) -> deque of bug message_ids
+    
+    def _band_keys(self, signature, map_key):
+        for band in range(MINHASH_BANDS):
+            start = band * MINHASH_ROWS
+            yield (map_key, band, hash(signature[start:start + MINHASH_ROWS]))
+    
+    def add(self, message_id, signature, map_name, location, thread_id):
+        map_key = (map_name or '').lower()
+        # A re-added report would otherwise leave its old band keys behind
+        self.remove(message_id)
+        self.entries[message_id] = (signature, map_key, location, thread_id)
+        for key in self._band_keys(signature, map_key):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = deque(maxlen=MINHASH_BUCKET_SIZE)
+            bucket.append(message_id)
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+    
+    def remove(self, message_id):
+        entry = self.entries.pop(message_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry[0], entry[1]):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                with contextlib.suppress(ValueError):
+                    bucket.remove(message_id)
+                if not bucket:
+                    del self.buckets[key]
+    
+    def query(self, signature, map_name, location):
+        """Indexed reports similar to this one, as (similarity, message_id, thread_id), best first"""
+        map_key = (map_name or '').lower()
+        candidates = set()
+        for key in self._band_keys(signature, map_key):
+            bucket = self.buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+        
+        matches = []
+        for message_id in candidates:
+            entry = self.entries.get(message_id)
+            if entry is None:
+                continue
+            other_signature, _, other_location, thread_id = entry
+            if location and other_location and math.dist(location, other_location) > DUPLICATE_LOCATION_RADIUS:
+                continue
+            similarity = sum(a == b for a, b in zip(signature, other_signature)) / len(signature)
+            matches.append((similarity, message_id, thread_id))
+        matches.sort(reverse=True)
+        return matches
+    
+    def __len__(self):
+        return len(self.entries)
+
+def find_duplicate_bug(guild_id, signature, plugin_data):
+    """Find an open bug this report most likely duplicates, returning its index entry or None"""
+    index = duplicate_indexes.get(guild_id)
+    if not index or signature is None:
+        return None
+    duplicate_stats['checked'] += 1
+    
+    location = parse_location(plugin_data['location'])
+    records = bug_index.get(guild_id, {})
+    for similarity, message_id, thread_id in index.query(signature, plugin_data['map'], location):
+        if similarity < DUPLICATE_THRESHOLD:
+            break
+        # Resolved bugs are skipped, a new report there is more likely a regression
+        record = records.get(message_id)
+        if record and record['status'] in ('Fixed', "Won't Fix"):
+            continue
+        return {'message_id': message_id, 'thread_id': thread_id, 'similarity': similarity}
+    return None
+
+def remember_report_fingerprint(guild_id, message_id, signature, plugin_data, thread_id):
+    """Index a newly posted bug so later reports can be folded into it"""
+    if signature is None:
+        return
+    index = duplicate_indexes.get(guild_id)
+    if index is None:
+        index = duplicate_indexes[guild_id] = MinHashIndex(DUPLICATE_INDEX_SIZE)
+    index.add(message_id, signature, plugin_data['map'], parse_location(plugin_data['location']), thread_id)
+
+# ========================
+# INGEST QUEUE
+# ========================
+
+def start_ingest_workers(guild_id):
+    """Create a guild's worker queues and tasks on first use"""
+    if guild_id in ingest_queues:
+        return ingest_queues[guild_id]
+    queues = [asyncio.Queue(maxsize=INGEST_QUEUE_SIZE) for _ in range(INGEST_WORKERS)]
+    ingest_queues[guild_id] = queues
+    ingest_workers[guild_id] = [asyncio.create_task(ingest_worker(queue)) for queue in queues]
+    return queues
+
+def stop_ingest_workers(guild_id):
+    """Cancel a guild's workers (queued reports stay in the channel unprocessed)"""
+    for task in ingest_workers.pop(guild_id, []):
+        task.cancel()
+    ingest_queues.pop(guild_id, None)
+
+def get_ingest_queue(guild_id, shard_key):
+    """The worker queue for reports with this shard key
+    
+    Reports are sharded by player (falling back to the webhook), so one
+    player's reports stay in order and a double submission folds into the
+    first, while different players are processed in parallel. Nothing else
+    needs ordering: log files are matched by creation time, not arrival.
+    """
+    queues = start_ingest_workers(guild_id)
+    return queues[hash(shard_key) % len(queues)]
+
+async def ingest_worker(queue):
+    """Process queued reports (webhook messages or DirectReports) one at a time, in arrival order"""
+    while True:
+        message, enqueued_at = await queue.get()
+        ingest_wait_samples.append(time.monotonic() - enqueued_at)
+        metrics.observe('bug_tracker_ingest_wait_seconds', time.monotonic() - enqueued_at)
+        try:
+            with rest_context(PRIORITY_INGEST):
+                if isinstance(message, DirectReport):
+                    await process_direct_report(message)
+                else:
+                    await process_webhook_bug_report(message)
+            ingest_stats['processed'] += 1
+        except Exception as e:
+            ingest_stats['failed'] += 1
+            log.error('Error processing bug report %s: %s', message.id, e, exc_info=e,
+                      extra={'guild_id': message.guild.id, 'message_id': message.id})
+        finally:
+            queue.task_done()
+
+async def enqueue_bug_report(message):
+    """Queue a webhook report for processing
+    
+    All reports from one player go to the same worker, so they are handled
+    in order. When that worker's queue is full, INGEST_OVERFLOW decides
+    whether the report is dropped or waits for room.
+    """
+    queue = get_ingest_queue(message.guild.id, extract_player_id(message.embeds[0]) or message.author.id)
+    item = (message, time.monotonic())
+    
+    if not queue.full():
+        queue.put_nowait(item)
+        ingest_stats['enqueued'] += 1
+        return
+    
+    ingest_stats['overflowed'] += 1
+    if INGEST_OVERFLOW == 'drop':
+        ingest_stats['dropped'] += 1
+        log.warning('Ingest queue full, dropping report %s in guild %s', message.id, message.guild.id)
+        return
+    
+    if INGEST_OVERFLOW == 'mark':
+        try:
+            await message.add_reaction('⏳')
+        except Exception as e:
+            log.warning('Could not mark report %s as queued: %s', message.id, e)
+    
+    log.warning('Ingest queue full, report %s waiting for room', message.id)
+    await queue.put(item)
+    ingest_stats['enqueued'] += 1
+
+def get_ingest_depth():
+    """Total reports waiting across all guilds"""
+    return sum(queue.qsize() for queues in ingest_queues.values() for queue in queues)
+
+def percentile(samples, fraction):
+    """Simple nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+# ========================
+# HTTP INGEST
+# ========================
+
+# The plugin can send the payload it would post to its Discord webhook
+# (payload_json plus the screenshot and log as multipart files) straight to
+# the bot. The report is built from the uploaded files, so there is no
+# download, no deleting the webhook's message and no guessing which log file
+# belongs to which report.
+
+class IngestRejected(Exception):
+    """A request the ingest endpoint turns away, with the HTTP status to answer"""
+    
+    def __init__(self, status, reason, retry_after=None):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+
+class DirectReport:
+    """A report posted to the ingest endpoint, queued like a webhook message"""
+    
+    def __init__(self, guild, channel, embed, reporter, screenshot, files, reserved):
+        self.id = f'http-{next(direct_report_ids)}'
+        self.guild = guild
+        self.channel = channel
+        self.embed = embed
+        self.reporter = reporter
+        self.screenshot = screenshot  # RelayedFile the embed image points at, or None
+        self.files = files  # Other uploaded RelayedFiles (log files), posted in the thread
+        self.reserved = reserved  # Ingest budget held for the uploads
+    
+    def close(self):
+        for relayed in ([self.screenshot] if self.screenshot else []) + self.files:
+            relayed.close()
+        if self.reserved:
+            ingest_budget.release(self.reserved)
+            self.reserved = 0
+
+async def read_ingest_request(request):
+    """Read payload_json and the uploaded files of a multipart (or plain JSON) request
+    
+    Files are streamed into RelayedFiles. Returns (payload, files).
+    """
+    if request.content_type == 'application/json':
+        return await request.json(), []
+    if not request.content_type.startswith('multipart/'):
+        raise IngestRejected(415, 'Expected multipart/form-data or application/json')
+    
+    payload = None
+    files = []
+    total = 0
+    try:
+        async for part in await request.multipart():
+            if part.filename:
+                relayed = RelayedFile(os.path.basename(part.filename), 0)
+                files.append(relayed)
+                while True:
+                    chunk = await part.read_chunk(64 * 1024)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > INGEST_MAX_BYTES or relayed.size + len(chunk) > MAX_DOWNLOAD_BYTES:
+                        raise IngestRejected(413, f'{relayed.filename} is over the upload limit')
+                    relayed.write(chunk)
+            elif part.name == 'payload_json':
+                data = await part.read()
+                total += len(data)
+                if total > INGEST_MAX_BYTES:
+                    raise IngestRejected(413, 'Request is over the upload limit')
+                payload = json.loads(data)
+        if payload is None:
+            raise IngestRejected(400, 'Missing payload_json')
+        return payload, files
+    except BaseException:
+        for relayed in files:
+            relayed.close()
+        raise
+
+def split_screenshot(embed, files):
+    """Find the upload the embed image refers to (attachment://name), returning (screenshot, other files)"""
+    url = embed.image.url if embed.image else None
+    if url and url.startswith('attachment://'):
+        name = url[len('attachment://'):]
+        for relayed in files:
+            if relayed.filename == name:
+                return relayed, [other for other in files if other is not relayed]
+    return None, files
+
+async def accept_direct_report(request, guild_id):
+    """Validate an authenticated request and queue its report, returning the report's ID"""
+    guild = bot.get_guild(guild_id)
+    channel = bot.get_channel(get_bug_channel(guild_id) or 0)
+    if guild is None or channel is None:
+        raise IngestRejected(409, 'No bug report channel is configured, run /bug_setup')
+    if (request.content_length or 0) > INGEST_MAX_BYTES:
+        raise IngestRejected(413, 'Request is over the upload limit')
+    
+    # Never wait for room: the bytes are only freed as queued reports are processed
+    reserved = ingest_budget.try_acquire(request.content_length or INGEST_MAX_BYTES)
+    if reserved is None:
+        ingest_stats['overflowed'] += 1
+        raise IngestRejected(503, 'Too many uploads waiting to be processed', retry_after=5)
+    files = []
+    queued = False
+    try:
+        payload, files = await read_ingest_request(request)
+        try:
+            embed = discord.Embed.from_dict(payload['embeds'][0])
+            reporter = str(payload.get('username') or 'Ingest Endpoint')[:80]
+        except (KeyError, IndexError, TypeError, AttributeError, ValueError):
+            raise IngestRejected(400, 'payload_json needs at least one embed')
+        
+        player_id = extract_player_id(embed)
+        if player_id and is_user_blocked(guild_id, player_id):
+            log.info('Blocked player %s attempted to submit report through the ingest endpoint', player_id)
+            raise IngestRejected(403, 'Player is blocked')
+        
+        # The endpoint counts as one webhook for the webhook limit
+        throttled = throttle_report(guild_id, 'http', player_id)
+        if throttled:
+            bucket = report_throttles.get((guild_id, throttled, str(player_id if throttled == 'player' else 'http')))
+            retry_after = math.ceil(bucket.retry_after()) if bucket else 60
+            raise IngestRejected(429, f'Too many reports ({throttled} limit)', retry_after=max(1, retry_after))
+        
+        screenshot, files = split_screenshot(embed, files)
+        report = DirectReport(guild, channel, embed, reporter, screenshot, files, reserved)
+        
+        # Same worker as the player's webhook reports, but a full queue is the client's to retry
+        queue = get_ingest_queue(guild_id, player_id or 'http')
+        if queue.full():
+            ingest_stats['overflowed'] += 1
+            raise IngestRejected(503, 'Report queue is full', retry_after=5)
+        queue.put_nowait((report, time.monotonic()))
+        ingest_stats['enqueued'] += 1
+        queued = True
+        return report.id
+    finally:
+        if not queued:
+            for relayed in files:
+                relayed.close()
+            ingest_budget.release(reserved)
+
+async def handle_ingest_report(request):
+    """POST /report, authenticated with "Authorization: Bearer <token>" from /bug_ingest_token"""
+    try:
+        guild_id = get_ingest_token_guild(request.headers.get('Authorization', ''))
+        if guild_id is None:
+            raise IngestRejected(401, 'Missing or unknown ingest token')
+        report_id = await accept_direct_report(request, guild_id)
+    except IngestRejected as e:
+        metrics.inc('bug_tracker_http_reports_total', result=str(e.status))
+        headers = {'Retry-After': str(e.retry_after)} if e.retry_after else None
+        return web.json_response({'error': str(e)}, status=e.status, headers=headers)
+    except ValueError as e:
+        # Unparseable JSON
+        metrics.inc('bug_tracker_http_reports_total', result='400')
+        return web.json_response({'error': f'Malformed request: {e}'}, status=400)
+    
+    metrics.inc('bug_tracker_http_reports_total', result='202')
+    log.debug('Queued report %s from the ingest endpoint', report_id, extra={'guild_id': guild_id})
+    return web.json_response({'status': 'queued', 'id': report_id}, status=202)
+
+async def start_ingest_server():
+    """Serve POST /report on INGEST_HOST:INGEST_PORT, returning the runner to clean up"""
+    metrics.describe('bug_tracker_http_reports_total', 'Reports posted to the ingest endpoint, by HTTP status answered')
+    app = web.Application(client_max_size=INGEST_MAX_BYTES)
+    app.router.add_post('/report', handle_ingest_report)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, INGEST_HOST, INGEST_PORT).start()
+    log.info('Accepting reports on http://%s:%s/report', INGEST_HOST, INGEST_PORT)
+    return runner
+
+# ========================
+# REPORT CAPTURE
+# ========================
+
+def capture_webhook_message(message, event):
+    """Append a webhook message to CAPTURE_FILE so the stream can be replayed later
+    
+    event is 'message' or 'edit'. Attachments are recorded by name and size only;
+    their CDN links expire, so replays stand in for the file contents.
+    """
+    if not CAPTURE_FILE:
+        return
+    entry = {
+        'event': event,
+        'received': time.time(),
+        'created': message.created_at.timestamp(),
+        'guild': message.guild.id,
+        'channel': message.channel.id,
+        'webhook': message.author.id,
+        'author': message.author.name,
+        'message': message.id,
+        'embeds': [embed.to_dict() for embed in message.embeds],
+        'attachments': [
+            {'filename': attachment.filename, 'size': attachment.size, 'content_type': attachment.content_type}
+            for attachment in message.attachments
+        ],
+    }
+    try:
+        with open(CAPTURE_FILE, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+    except Exception as e:
+        log.error('Error capturing webhook message: %s', e)
+
+# ========================
+# EVENT HANDLERS
+# ========================
+
+@bot.event
+async def on_ready():
+    log.info('Logged in as %s (ID: %s)', bot.user, bot.user.id)
+    global bug_state_loaded
+    load_guild_config()
+    load_blocked_users()
+    load_ingest_tokens()
+    
+    # Warm start the bug index, then catch up on anything newer in the background
+    if not bug_state_loaded:
+        bug_state_loaded = True
+        load_bug_state()
+        for guild_id in list(bug_index_ready):
+            asyncio.create_task(reconcile_bug_index(guild_id))
+    
+    # Sync slash commands
+    try:
+        synced = await bot.tree.sync()
+        log.info('Synced %s slash commands', len(synced))
+    except Exception as e:
+        log.error('Error syncing commands: %s', e)
+    
+    log.info('------')
+    log.info('Bug tracker bot is ready!')
+    log.info('Configured in %s guilds', len(guild_channels))
+
+@bot.event
+async def on_guild_remove(guild):
+    """Clean up data when bot is removed from a guild"""
+    log.info('Bot removed from guild: %s (ID: %s)', guild.name, guild.id)
+    
+    # Remove guild configuration
+    if guild.id in guild_channels:
+        del guild_channels[guild.id]
+        await guild_config_store.record({'op': 'remove', 'guild': str(guild.id)})
+        log.info('Removed guild config for %s', guild.id)
+    
+    # Remove blocked users for this guild
+    if guild.id in blocked_users:
+        del blocked_users[guild.id]
+        blocked_id_index.pop(guild.id, None)
+        await blocked_users_store.record({'op': 'remove', 'guild': str(guild.id)})
+        log.info('Removed blocked users for %s', guild.id)
+    
+    if await revoke_ingest_token(guild.id):
+        log.info('Revoked ingest token for %s', guild.id)
+    
+    # Clean up in-memory data
+    keys_to_remove = [k for k in recently_blocked_webhooks.keys() if k[0] == guild.id]
+    for key in keys_to_remove:
+        del recently_blocked_webhooks[key]
+    
+    keys_to_remove = [k for k in pending_log_files.keys() if k[0] == guild.id]
+    for key in keys_to_remove:
+        del pending_log_files[key]
     
     keys_to_remove = [k for k in recent_bug_reports.keys() if k[0] == guild.id]
     for key in keys_to_remove:
         del recent_bug_reports[key]
     
-    print(f'Cleanup complete for guild {guild.id}', flush=True)
+    keys_to_remove = [k for k in report_throttles.keys() if k[0] == guild.id]
+    for key in keys_to_remove:
+        del report_throttles[key]
+    
+    drop_bug_index(guild.id)
+    bug_index_locks.pop(guild.id, None)
+    duplicate_indexes.pop(guild.id, None)
+    stop_ingest_workers(guild.id)
+    
+    log.info('Cleanup complete for guild %s', guild.id)
 
 def is_in_bug_channel(message):
     """Check if a message is in the configured bug channel (or a thread/post in a forum bug channel)"""
@@ -592,6 +3242,10 @@ def is_in_bug_channel(message):
     
     return False
 
+@bot.event
+async def on_app_command_completion(interaction, command):
+    record_command_metrics(interaction, 'ok')
+
 @bot.event
 async def on_message(message):
     """Handle incoming bug reports"""
@@ -615,31 +3269,33 @@ async def on_message(message):
         return
     
     # Log only when processing messages in the bug channel
-    print(f'Bug channel activity: {message.author.name} (bot={message.author.bot}), embeds={len(message.embeds)}, attachments={len(message.attachments)}', flush=True)
+    log.debug('Bug channel activity: %s (bot=%s), embeds=%s, attachments=%s', message.author.name, message.author.bot, len(message.embeds), len(message.attachments))
     
     # Only process webhook messages - ignore regular user messages
     if not message.author.bot:
         await bot.process_commands(message)
         return
     
+    capture_webhook_message(message, 'message')
+    
     # Check if this is a log file attachment following a bug report
     # Skip if message also has embeds (that's the main bug report)
     if message.attachments and not message.embeds:
-        # Check if this webhook was recently blocked (within last 60 seconds)
+        # Check if this webhook was recently blocked (entries expire after BLOCKED_WEBHOOK_TTL)
         webhook_key = (message.guild.id, message.author.id)
         if webhook_key in recently_blocked_webhooks:
-            block_time = recently_blocked_webhooks[webhook_key]
-            if (datetime.now() - block_time).total_seconds() < 60:
-                print(f'Deleting log file from recently blocked webhook', flush=True)
-                await message.delete()
-                return
+            log.info('Deleting log file from recently blocked webhook')
+            await message.delete()
+            return
         
-        # Always store log files as pending - they'll be processed by the next report
-        print(f'Log file received, storing as pending', flush=True)
-        temp_key = (message.guild.id, message.author.id)
-        if temp_key not in pending_log_files:
-            pending_log_files[temp_key] = []
-        pending_log_files[temp_key].append((message, datetime.now()))
+        # Match the log file to its report, or keep it until the report arrives
+        thread_id = add_pending_log_file(webhook_key, message)
+        if thread_id == 0:
+            log.info('Deleting log file of a throttled report')
+            await message.delete()
+        elif thread_id:
+            log.info('Late log file received, moving to thread %s', thread_id)
+            await move_late_log_file(thread_id, message)
         return
     
     # Handle webhook messages with embeds (from Unreal Engine plugin)
@@ -649,17 +3305,28 @@ async def on_message(message):
         # Check if Player ID is blocked before processing
         player_id = extract_player_id(message.embeds[0])
         if player_id and is_user_blocked(message.guild.id, player_id):
-            print(f'Blocked player {player_id} attempted to submit report, deleting', flush=True)
+            log.info('Blocked player %s attempted to submit report, deleting', player_id)
             # Mark this webhook as recently blocked to catch follow-up log files
             recently_blocked_webhooks[webhook_key] = datetime.now()
             await message.delete()
             return
         
+        # Players (or webhooks) sending reports faster than their limit are dropped here,
+        # before the report costs any API calls beyond the delete
+        throttled = throttle_report(message.guild.id, message.author.id, player_id)
+        if throttled:
+            log.info('Throttled report %s (%s limit, player %s), deleting', message.id, throttled, player_id)
+            # Catch the follow-up log file too, unless other players share this webhook
+            if throttled == 'webhook':
+                recently_blocked_webhooks[webhook_key] = datetime.now()
+            await delete_throttled_report(webhook_key, message)
+            return
+        
         # Clear recently blocked flag since this is a valid report
         if webhook_key in recently_blocked_webhooks:
             del recently_blocked_webhooks[webhook_key]
         
-        await process_webhook_bug_report(message)
+        await enqueue_bug_report(message)
         return
     
     await bot.process_commands(message)
@@ -682,116 +3349,47 @@ async def on_message_edit(before, after):
     if not is_in_bug_channel(after):
         return
     
-    print(f'Message edited by {after.author.name}, now has {len(after.embeds)} embeds', flush=True)
+    log.debug('Message edited by %s, now has %s embeds', after.author.name, len(after.embeds))
+    capture_webhook_message(after, 'edit')
     
     # Check if Player ID is blocked before processing
     player_id = extract_player_id(after.embeds[0])
     if player_id and is_user_blocked(after.guild.id, player_id):
-        print(f'Blocked player {player_id} attempted to submit report, deleting', flush=True)
+        log.info('Blocked player %s attempted to submit report, deleting', player_id)
         # Mark this webhook as recently blocked to catch follow-up log files
         webhook_key = (after.guild.id, after.author.id)
         recently_blocked_webhooks[webhook_key] = datetime.now()
         await after.delete()
         return
     
-    # Clear recently blocked flag since this is a valid report
     webhook_key = (after.guild.id, after.author.id)
+    throttled = throttle_report(after.guild.id, after.author.id, player_id)
+    if throttled:
+        log.info('Throttled report %s (%s limit, player %s), deleting', after.id, throttled, player_id)
+        if throttled == 'webhook':
+            recently_blocked_webhooks[webhook_key] = datetime.now()
+        await delete_throttled_report(webhook_key, after)
+        return
+    
+    # Clear recently blocked flag since this is a valid report
     if webhook_key in recently_blocked_webhooks:
         del recently_blocked_webhooks[webhook_key]
     
     # Remove this message from pending log files if it was stored there
     # (This is the main bug report message, not a separate log file)
-    if webhook_key in pending_log_files:
-        pending_log_files[webhook_key] = [(msg, ts) for msg, ts in pending_log_files[webhook_key] if msg.id != after.id]
-        if not pending_log_files[webhook_key]:
-            del pending_log_files[webhook_key]
+    discard_pending_log_file(webhook_key, after.id)
     
     # Process as new bug report
-    await process_webhook_bug_report(after)
+    await enqueue_bug_report(after)
 
-async def process_webhook_bug_report(message):
-    """Process a webhook bug report with embeds"""
-    embed = message.embeds[0]
-    
-    # Double-check player isn't blocked (safety check)
-    player_id = extract_player_id(embed)
-    if player_id and is_user_blocked(message.guild.id, player_id):
-        print(f'Blocked player {player_id} caught in process_webhook_bug_report, aborting', flush=True)
-        try:
-            await message.delete()
-        except:
-            pass
-        return
-    
-    # Parse the plugin embed
-    plugin_data = parse_plugin_embed(embed)
-    
-    # Use the original embed title if available, otherwise use first line of description
-    title = embed.title if embed.title else (plugin_data['description'].split('\n')[0] if plugin_data['description'] else 'Bug Report')
-    
-    # Always use the original embed color from the plugin
-    embed_color = embed.color if embed.color else 0x95a5a6  # Gray fallback if no color
-    
-    # Create enhanced embed with parsed data
-    bug_embed = discord.Embed(
-        title=title,
-        description=plugin_data['description'],
-        color=embed_color,
-        timestamp=datetime.now()
-    )
-    
-    # Add fields from plugin
-    if plugin_data['response_type']:
-        bug_embed.add_field(name='Type', value=plugin_data['response_type'], inline=True)
-    if plugin_data['map']:
-        bug_embed.add_field(name='Map', value=plugin_data['map'], inline=True)
-    if plugin_data['user_id']:
-        bug_embed.add_field(name='Player ID', value=plugin_data['user_id'], inline=True)
-    
-    # Add status tracking fields
-    bug_embed.add_field(name='Status', value='New', inline=True)
-    bug_embed.add_field(name='Assigned to', value='Unassigned', inline=True)
-    bug_embed.add_field(name='Priority', value='Normal', inline=True)
-    
-    # Add session duration if available
-    if plugin_data['session_duration']:
-        bug_embed.add_field(name='Session Duration', value=plugin_data['session_duration'], inline=True)
-    
-    # Add location if available
-    if plugin_data['location']:
-        bug_embed.add_field(name='Location', value=plugin_data['location'], inline=False)
-    
-    # Add system info if available
-    if plugin_data['system']:
-        bug_embed.add_field(name='System', value=plugin_data['system'], inline=False)
-    
-    # Add video settings if available
-    if plugin_data['video_settings']:
-        bug_embed.add_field(name='Video Settings', value=plugin_data['video_settings'], inline=False)
-    
-    bug_embed.set_footer(text=f'Reported via {message.author.name}')
-    
-    # Download and re-upload screenshot from embed image if available
-    screenshot_file = None
-    if embed.image:
-        try:
-            # Download the image from the embed URL
-            async with aiohttp.ClientSession() as session:
-                async with session.get(embed.image.url) as resp:
-                    if resp.status == 200:
-                        image_data = await resp.read()
-                        # Extract filename from URL or use default
-                        filename = embed.image.url.split('/')[-1].split('?')[0]
-                        if not filename or '.' not in filename:
-                            filename = 'screenshot.png'
-                        screenshot_file = discord.File(io.BytesIO(image_data), filename=filename)
-                        bug_embed.set_image(url=f"attachment://{filename}")
-        except Exception as e:
-            print(f'Error downloading screenshot from embed: {e}', flush=True)
-            screenshot_file = None
+async def post_bug_report(channel, title, bug_embed, plugin_data, screenshot=None):
+    """Post the bug report embed as a forum post or a text channel message with a thread
     
+    channel is where the report arrived (the bug channel, or a forum post in it).
+    Returns (thread, bug_message, is_forum).
+    """
     # Check if we're posting to a forum channel or text channel
-    target_channel = message.channel
+    target_channel = channel
     is_forum = isinstance(target_channel, discord.ForumChannel)
     
     # If message came from a forum thread, get the parent forum channel
@@ -805,15 +3403,15 @@ async def process_webhook_bug_report(message):
         applied_tags = []
         if plugin_data['response_type']:
             response_type = plugin_data['response_type']
-            print(f'Looking for tag: "{response_type}"', flush=True)
-            print(f'Available tags: {[t.name for t in target_channel.available_tags]}', flush=True)
+            log.debug('Looking for tag: "%s"', response_type)
+            log.debug('Available tags: %s', [t.name for t in target_channel.available_tags])
             
             # Look for existing tag matching the response type
             existing_tag = None
             for tag in target_channel.available_tags:
                 if tag.name.lower() == response_type.lower():
                     existing_tag = tag
-                    print(f'Found existing tag: {tag.name} (id={tag.id})', flush=True)
+                    log.debug('Found existing tag: %s (id=%s)', tag.name, tag.id)
                     break
             
             if existing_tag:
@@ -827,38 +3425,36 @@ async def process_webhook_bug_report(message):
                         new_tags = list(target_channel.available_tags)
                         new_tag = discord.ForumTag(name=response_type[:20])  # Tag names limited to 20 chars
                         new_tags.append(new_tag)
-                        print(f'Creating new tag "{response_type[:20]}", total tags will be {len(new_tags)}', flush=True)
+                        log.debug('Creating new tag "%s", total tags will be %s', response_type[:20], len(new_tags))
                         
                         # Check bot permissions
-                        bot_permissions = target_channel.permissions_for(message.guild.me)
-                        print(f'Bot has manage_channels: {bot_permissions.manage_channels}', flush=True)
+                        bot_permissions = target_channel.permissions_for(target_channel.guild.me)
+                        log.debug('Bot has manage_channels: %s', bot_permissions.manage_channels)
                         
                         if not bot_permissions.manage_channels:
-                            print(f'Bot lacks manage_channels permission - cannot create tags', flush=True)
+                            log.warning('Bot lacks manage_channels permission - cannot create tags')
                         else:
                             await target_channel.edit(available_tags=new_tags)
-                            print(f'Tags updated successfully', flush=True)
+                            log.debug('Tags updated successfully')
                             
                             # Refetch channel to get the tag with proper ID
                             target_channel = await target_channel.guild.fetch_channel(target_channel.id)
                             for tag in target_channel.available_tags:
                                 if tag.name.lower() == response_type.lower():
                                     applied_tags.append(tag)
-                                    print(f'New tag created and found: {tag.name} (id={tag.id})', flush=True)
+                                    log.debug('New tag created and found: %s (id=%s)', tag.name, tag.id)
                                     break
                     else:
-                        print(f'Cannot create tag "{response_type}" - forum has max 20 tags', flush=True)
-                except Exception as e:
-                    print(f'Error creating forum tag: {e}', flush=True)
-                    import traceback
-                    traceback.print_exc()
+                        log.warning('Cannot create tag "%s" - forum has max 20 tags', response_type)
+                except Exception:
+                    log.exception('Error creating forum tag')
         
         # Create the forum post with tags
-        if screenshot_file:
+        if screenshot:
             thread_with_message = await target_channel.create_thread(
                 name=title[:100],  # Discord limit
                 embed=bug_embed,
-                file=screenshot_file,
+                file=screenshot.to_discord_file(),
                 applied_tags=applied_tags,
                 auto_archive_duration=1440  # 24 hours
             )
@@ -873,10 +3469,10 @@ async def process_webhook_bug_report(message):
         bug_message = thread_with_message.message
     else:
         # For text channels, send message then create thread
-        if screenshot_file:
-            bug_message = await message.channel.send(embed=bug_embed, file=screenshot_file)
+        if screenshot:
+            bug_message = await target_channel.send(embed=bug_embed, file=screenshot.to_discord_file())
         else:
-            bug_message = await message.channel.send(embed=bug_embed)
+            bug_message = await target_channel.send(embed=bug_embed)
         
         # Create thread - use title but limit length
         thread = await bug_message.create_thread(
@@ -884,78 +3480,54 @@ async def process_webhook_bug_report(message):
             auto_archive_duration=1440  # 24 hours
         )
     
-    # Track this bug report for log file association
-    report_key = (message.guild.id, message.id)
-    recent_bug_reports[report_key] = (thread.id, datetime.now(), message.author.id)
-    
+    return thread, bug_message, is_forum
+
+async def add_default_reactions(bug_message):
+    """Add the status reactions to a new bug report (in order, so they line up)"""
+    for emoji in ['🧑‍💻', '✅', '❌', '⭐']:
+        await bug_message.add_reaction(emoji)
+
+async def move_attachments_and_delete_original(thread, message):
+    """Copy the webhook message's extra files into the thread, then delete the original"""
     # If the original webhook message has attachments (additional files), send them to thread
     if message.attachments:
-        for attachment in message.attachments:
-            try:
-                await thread.send(
-                    f"**Attachment:** {attachment.filename}",
-                    file=await attachment.to_file()
-                )
-            except Exception as e:
-                print(f'Error copying attachment to thread: {e}', flush=True)
-    
-    # Wait a moment for any late-arriving log files
-    await asyncio.sleep(0.5)
-    
-    # Check for pending log files that arrived before the thread was ready
-    # Look for pending files from this webhook
-    webhook_key = (message.guild.id, message.author.id)
-    if webhook_key in pending_log_files:
-        # Get snapshot of pending files to process (in case new ones arrive during processing)
-        files_to_process = pending_log_files[webhook_key][:]
-        
-        # Only process log files that arrived within 3 seconds of this message
-        # This prevents race conditions when multiple players submit reports simultaneously
-        message_time = message.created_at
-        matched_files = []
-        
-        for log_message, log_timestamp in files_to_process:
-            time_diff = abs((message_time - log_message.created_at).total_seconds())
-            if time_diff <= 3.0:
-                matched_files.append((log_message, log_timestamp))
-            else:
-                print(f'Skipping log file (time diff {time_diff:.1f}s too large)', flush=True)
-        
-        if matched_files:
-            print(f'Processing {len(matched_files)} pending log files (out of {len(files_to_process)} total)', flush=True)
-        
-        for log_message, log_timestamp in matched_files:
-            try:
-                # Move attachments to thread
-                for attachment in log_message.attachments:
-                    print(f'Sending log file {attachment.filename} to thread {thread.id}', flush=True)
-                    await thread.send(
-                        f"**Log File:** {attachment.filename}",
-                        file=await attachment.to_file()
-                    )
-                print(f'Moved pending log file to thread {thread.id}', flush=True)
-            except Exception as e:
-                print(f'Error moving pending log file: {e}', flush=True)
-            
-            # Try to delete the original log message
-            try:
-                await log_message.delete()
-            except Exception as e:
-                print(f'Could not delete log message (may already be deleted): {e}', flush=True)
-            
-            # Remove this specific file from pending
-            if webhook_key in pending_log_files and (log_message, log_timestamp) in pending_log_files[webhook_key]:
-                pending_log_files[webhook_key].remove((log_message, log_timestamp))
-        
-        # If no more pending files, clean up the key
-        if webhook_key in pending_log_files and not pending_log_files[webhook_key]:
-            del pending_log_files[webhook_key]
+        try:
+            await relay_attachments(thread, message.attachments, 'Attachment')
+        except Exception as e:
+            log.error('Error copying attachments to thread: %s', e)
     
-    # Add default reactions to our new message
-    for emoji in ['🧑‍💻', '✅', '❌', '⭐']:
-        await bug_message.add_reaction(emoji)
+    await delete_original_report(message)
+
+async def download_embed_screenshot(embed):
+    """Download the screenshot shown in a webhook embed, or None if there is none (or it failed)"""
+    if not embed.image:
+        return None
+    try:
+        # Extract filename from URL or use default
+        filename = embed.image.url.split('/')[-1].split('?')[0]
+        if not filename or '.' not in filename:
+            filename = 'screenshot.png'
+        # Download the image from the embed URL
+        return await download_to_relay(embed.image.url, filename)
+    except Exception as e:
+        log.error('Error downloading screenshot from embed: %s', e)
+        return None
+
+async def move_duplicate_files_and_delete_original(thread, message):
+    """Copy a folded report's screenshot and attachments into the bug's thread, then delete the original"""
+    screenshot = await download_embed_screenshot(message.embeds[0])
+    if screenshot:
+        try:
+            await upload_relayed_files(thread, [screenshot], 'Screenshot')
+        except Exception as e:
+            log.error('Error copying screenshot to thread: %s', e)
+        finally:
+            screenshot.close()
     
-    # Try to delete original webhook message/thread
+    await move_attachments_and_delete_original(thread, message)
+
+async def delete_original_report(message):
+    """Delete the webhook's report message (or, in a forum, the post the webhook created)"""
     # For forum channels, the webhook creates a thread - we need to delete the entire thread
     try:
         if isinstance(message.channel, discord.Thread) and isinstance(message.channel.parent, discord.ForumChannel):
@@ -965,10 +3537,368 @@ async def process_webhook_bug_report(message):
             # Regular message - just delete it
             await message.delete()
     except Exception as e:
-        print(f'Could not delete original message/thread: {e}', flush=True)
+        log.warning('Could not delete original message/thread: %s', e)
+
+async def associate_log_files(thread, message):
+    """Move the log files belonging to a report into its thread"""
+    # Collect log files from this webhook sent within LOG_MATCH_WINDOW of the report,
+    # waiting briefly (but no longer than needed) if none has arrived yet
+    webhook_key = (message.guild.id, message.author.id)
+    report_ts = message.created_at.timestamp()
+    log_messages = take_pending_log_files(webhook_key, report_ts)
+    if not log_messages and LOG_WAIT_SECONDS > 0:
+        log_message = await wait_for_log_file(webhook_key, report_ts, LOG_WAIT_SECONDS)
+        if log_message:
+            # Any further log files that arrived alongside it are pending by now
+            log_messages = [log_message] + take_pending_log_files(webhook_key, report_ts)
+    
+    # Anything arriving from now on is routed straight to this thread
+    remember_bug_report(webhook_key, report_ts, thread.id)
+    
+    if log_messages:
+        log.debug('Processing %s log files for thread %s', len(log_messages), thread.id)
+        await move_log_files_to_thread(thread, log_messages)
+
+async def fold_duplicate_report(guild_id, plugin_data, duplicate):
+    """Add a report to the thread of the bug it duplicates as a short "+1" message
+    
+    Returns that thread for the report's files, or None if it is gone, so the
+    report gets its own thread.
+    """
+    thread = bot.get_channel(duplicate['thread_id'])
+    if thread is None:
+        try:
+            thread = await bot.fetch_channel(duplicate['thread_id'])
+        except (discord.NotFound, discord.Forbidden):
+            duplicate_indexes[guild_id].remove(duplicate['message_id'])
+            return None
+    
+    lines = [f"➕ **Duplicate report** ({duplicate['similarity']:.0%} similar)"]
+    if plugin_data['user_id']:
+        lines.append(f"**Player ID:** {plugin_data['user_id']}")
+    if plugin_data['location']:
+        lines.append(f"**Location:** `{plugin_data['location'].strip('`').strip()}`")
+    if plugin_data['session_duration']:
+        lines.append(f"**Session Duration:** {plugin_data['session_duration']}")
+    first_line = plugin_data['description'].split('\n')[0][:200]
+    lines.append(f'> {first_line}')
+    
+    try:
+        await thread.send('\n'.join(lines))
+    except (discord.NotFound, discord.Forbidden) as e:
+        log.warning('Could not post duplicate into thread %s: %s', thread.id, e)
+        duplicate_indexes[guild_id].remove(duplicate['message_id'])
+        return None
+    
+    # One counter on the original bug instead of a new thread
+    record = bug_index.get(guild_id, {}).get(duplicate['message_id'])
+    if record:
+        index_bug_record(guild_id, {**record, 'duplicates': record.get('duplicates', 0) + 1})
+    duplicate_stats['folded'] += 1
+    log.info('Folded report into bug thread %s (%.0f%% similar)', thread.id, duplicate['similarity'] * 100,
+             extra={'guild_id': guild_id, 'thread_id': thread.id})
+    return thread
+
+def build_bug_embed(embed, plugin_data, reporter):
+    """The bot's bug embed for a plugin report, returned as (title, bug_embed)"""
+    # Use the original embed title if available, otherwise use first line of description
+    title = embed.title if embed.title else (plugin_data['description'].split('\n')[0] if plugin_data['description'] else 'Bug Report')
+    
+    # Always use the original embed color from the plugin
+    embed_color = embed.color if embed.color else 0x95a5a6  # Gray fallback if no color
+    
+    # Create enhanced embed with parsed data
+    bug_embed = discord.Embed(
+        title=title,
+        description=plugin_data['description'],
+        color=embed_color,
+        timestamp=datetime.now()
+    )
+    
+    # Add fields from plugin
+    if plugin_data['response_type']:
+        bug_embed.add_field(name='Type', value=plugin_data['response_type'], inline=True)
+    if plugin_data['map']:
+        bug_embed.add_field(name='Map', value=plugin_data['map'], inline=True)
+    if plugin_data['user_id']:
+        bug_embed.add_field(name='Player ID', value=plugin_data['user_id'], inline=True)
+    
+    # Add status tracking fields
+    bug_embed.add_field(name='Status', value='New', inline=True)
+    bug_embed.add_field(name='Assigned to', value='Unassigned', inline=True)
+    bug_embed.add_field(name='Priority', value='Normal', inline=True)
+    
+    # Add session duration if available
+    if plugin_data['session_duration']:
+        bug_embed.add_field(name='Session Duration', value=plugin_data['session_duration'], inline=True)
+    
+    # Add location if available
+    if plugin_data['location']:
+        bug_embed.add_field(name='Location', value=plugin_data['location'], inline=False)
+    
+    # Add system info if available
+    if plugin_data['system']:
+        bug_embed.add_field(name='System', value=plugin_data['system'], inline=False)
+    
+    # Add video settings if available
+    if plugin_data['video_settings']:
+        bug_embed.add_field(name='Video Settings', value=plugin_data['video_settings'], inline=False)
+    
+    bug_embed.set_footer(text=f'Reported via {reporter}')
+    return title, bug_embed
+
+async def create_bug_report(channel, title, bug_embed, plugin_data, signature, screenshot=None):
+    """Post a new bug report and add it to the indexes, returning (thread, bug_message, is_forum)"""
+    thread, bug_message, is_forum = await post_bug_report(channel, title, bug_embed, plugin_data, screenshot)
+    
+    # Add the new report to the bug index so /bug_stats stays current
+    index_bug_message(bug_message)
+    remember_report_fingerprint(channel.guild.id, bug_message.id, signature, plugin_data, thread.id)
+    set_bug_details_id(bug_message, 0)  # Details are only posted when the bug is resolved
+    message_cache_put(bug_message.id, True, get_render_state(bug_message))
+    return thread, bug_message, is_forum
+
+@timed_handler('process_webhook_bug_report')
+async def process_webhook_bug_report(message):
+    """Process a webhook bug report with embeds"""
+    embed = message.embeds[0]
+    
+    # Double-check player isn't blocked (safety check)
+    player_id = extract_player_id(embed)
+    if player_id and is_user_blocked(message.guild.id, player_id):
+        log.info('Blocked player %s caught in process_webhook_bug_report, aborting', player_id)
+        try:
+            await message.delete()
+        except:
+            pass
+        return
+    
+    # Parse the plugin embed
+    plugin_data = parse_plugin_embed(embed)
+    
+    # Reports that repeat an open bug go into its thread instead of a new one
+    signature = report_fingerprint(plugin_data, embed.title) if DUPLICATE_THRESHOLD > 0 else None
+    duplicate = find_duplicate_bug(message.guild.id, signature, plugin_data)
+    thread = await fold_duplicate_report(message.guild.id, plugin_data, duplicate) if duplicate else None
+    if thread:
+        results = await asyncio.gather(
+            move_duplicate_files_and_delete_original(thread, message),
+            associate_log_files(thread, message),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                log.error('Error folding duplicate report: %s', result)
+        return
+    
+    title, bug_embed = build_bug_embed(embed, plugin_data, message.author.name)
+    
+    # Download and re-upload screenshot from embed image if available
+    screenshot = await download_embed_screenshot(embed)
+    
+    # Smaller re-encoded copy for the embed, when enabled
+    screenshot, original = await shrink_screenshot(screenshot)
+    if screenshot:
+        bug_embed.set_image(url=f"attachment://{screenshot.filename}")
+    
+    try:
+        thread, bug_message, is_forum = await create_bug_report(message.channel, title, bug_embed, plugin_data, signature, screenshot)
+        
+        # The remaining steps don't depend on each other, so run them concurrently
+        steps = [
+            add_default_reactions(bug_message),
+            move_attachments_and_delete_original(thread, message),
+            associate_log_files(thread, message),
+        ]
+        if original:
+            steps.append(upload_relayed_files(thread, [original], 'Original Screenshot'))
+        results = await asyncio.gather(*steps, return_exceptions=True)
+    finally:
+        for relayed in (screenshot, original):
+            if relayed:
+                relayed.close()
+    for result in results:
+        if isinstance(result, Exception):
+            log.error('Error finishing bug report: %s', result)
+    
+    channel_type = 'forum' if is_forum else 'text channel'
+    log.info('Created bug report from webhook in guild %s (%s)', message.guild.id, channel_type,
+             extra={'guild_id': message.guild.id, 'thread_id': thread.id})
+
+@timed_handler('process_direct_report')
+async def process_direct_report(report):
+    """Create a bug report from a DirectReport, posting its uploads as they are"""
+    original = None
+    try:
+        # Checked again in case the player was blocked while the report was queued
+        player_id = extract_player_id(report.embed)
+        if player_id and is_user_blocked(report.guild.id, player_id):
+            log.info('Blocked player %s caught in process_direct_report, aborting', player_id)
+            return
+        
+        plugin_data = parse_plugin_embed(report.embed)
+        log_files = [f for f in report.files if f.filename.lower().endswith(TRUNCATABLE_EXTENSIONS)]
+        other_files = [f for f in report.files if f not in log_files]
+        
+        signature = report_fingerprint(plugin_data, report.embed.title) if DUPLICATE_THRESHOLD > 0 else None
+        duplicate = find_duplicate_bug(report.guild.id, signature, plugin_data)
+        thread = await fold_duplicate_report(report.guild.id, plugin_data, duplicate) if duplicate else None
+        if thread:
+            screenshots = [report.screenshot] if report.screenshot else []
+            for files, label in ((screenshots, 'Screenshot'), (log_files, 'Log File'), (other_files, 'Attachment')):
+                if files:
+                    await upload_relayed_files(thread, files, label)
+            return
+        
+        title, bug_embed = build_bug_embed(report.embed, plugin_data, report.reporter)
+        report.screenshot, original = await shrink_screenshot(report.screenshot)
+        if report.screenshot:
+            bug_embed.set_image(url=f'attachment://{report.screenshot.filename}')
+        thread, bug_message, is_forum = await create_bug_report(
+            report.channel, title, bug_embed, plugin_data, signature, report.screenshot
+        )
+        
+        steps = [add_default_reactions(bug_message)]
+        if log_files:
+            steps.append(upload_relayed_files(thread, log_files, 'Log File'))
+        if other_files:
+            steps.append(upload_relayed_files(thread, other_files, 'Attachment'))
+        if original:
+            steps.append(upload_relayed_files(thread, [original], 'Original Screenshot'))
+        results = await asyncio.gather(*steps, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                log.error('Error finishing bug report: %s', result)
+        
+        channel_type = 'forum' if is_forum else 'text channel'
+        log.info('Created bug report %s from the ingest endpoint in guild %s (%s)', report.id, report.guild.id, channel_type,
+                 extra={'guild_id': report.guild.id, 'thread_id': thread.id})
+    finally:
+        report.close()
+        if original:
+            original.close()
+
+def message_cache_get(message_id):
+    """Look up a message in the LRU, counting hits and misses"""
+    entry = message_cache.get(message_id)
+    if entry is None:
+        message_cache_stats['misses'] += 1
+        return None
+    message_cache.move_to_end(message_id)
+    message_cache_stats['hits'] += 1
+    return entry
+
+def message_cache_put(message_id, is_bug, state=None):
+    """Remember whether a message is a bug (and how it was last rendered)"""
+    message_cache[message_id] = {'is_bug': is_bug, 'state': state}
+    message_cache.move_to_end(message_id)
+    while len(message_cache) > MESSAGE_CACHE_SIZE:
+        message_cache.popitem(last=False)
+        message_cache_stats['evictions'] += 1
+
+def get_render_state(message):
+    """Summarize everything a re-render depends on, to skip edits that would change nothing"""
+    record = bug_index.get(message.guild.id, {}).get(message.id) if message.guild else None
+    if record is not None and record.get('assignees') is not None:
+        assignees = tuple(record['assignees'])
+    else:
+        assignees = sum(r.count for r in message.reactions if str(r.emoji) == '🧑‍💻')
+    return (get_current_status_from_reactions(message), is_high_priority(message), assignees)
+
+def is_possible_bug_reaction(payload):
+    """Cheaply decide if a reaction could be on a bug report (no API calls)
+    
+    Returns False for reactions outside the bug channel, on messages the warm
+    bug index doesn't know, or on messages already seen not to be bugs. A
+    channel missing from the cache (e.g. an archived forum post) may still be
+    one of the bug channel's threads, so those are left to the checks below.
+    """
+    if not payload.guild_id:
+        return False
+    
+    bug_channel_id = get_bug_channel(payload.guild_id)
+    if not bug_channel_id:
+        return False
+    
+    # Reaction must be in the bug channel or in one of its threads (forum posts)
+    if payload.channel_id != bug_channel_id:
+        channel = bot.get_channel(payload.channel_id)
+        if channel is not None and (not isinstance(channel, discord.Thread) or channel.parent_id != bug_channel_id):
+            return False
+    
+    cached = message_cache_get(payload.message_id)
+    if cached is not None:
+        return cached['is_bug']
+    
+    # A warm index knows every bug report, so anything else can be rejected
+    if payload.guild_id in bug_index_ready:
+        is_bug = payload.message_id in bug_index.get(payload.guild_id, {})
+        message_cache_put(payload.message_id, is_bug)
+        return is_bug
+    
+    # Unknown, let the render fetch it and record the verdict
+    return True
+
+def schedule_embed_update(channel_id, message_id):
+    """Schedule a re-render of a bug embed, coalescing bursts of reactions
+    
+    Reactions within REACTION_DEBOUNCE_SECONDS of each other share one fetch
+    and one edit, and each message has at most one render in flight. A
+    reaction that lands while a render is running triggers one more pass.
+    """
+    reaction_stats['events'] += 1
+    if message_id in pending_embed_updates:
+        dirty_embed_updates.add(message_id)
+        return
+    pending_embed_updates[message_id] = asyncio.create_task(run_embed_update(channel_id, message_id))
+
+async def run_embed_update(channel_id, message_id):
+    """Debounced render loop for one bug message"""
+    try:
+        while True:
+            await asyncio.sleep(REACTION_DEBOUNCE_SECONDS)
+            dirty_embed_updates.discard(message_id)
+            with rest_context(PRIORITY_RENDER):
+                await refresh_bug_message(channel_id, message_id)
+            if message_id not in dirty_embed_updates:
+                break
+    finally:
+        pending_embed_updates.pop(message_id, None)
+        dirty_embed_updates.discard(message_id)
+
+async def refresh_bug_message(channel_id, message_id):
+    """Fetch a message and, if it is a bug report, re-render it from its reactions"""
+    # Fetch the channel and message
+    channel = bot.get_channel(channel_id)
+    try:
+        if channel is None:
+            # Archived forum posts drop out of the cache
+            channel = await bot.fetch_channel(channel_id)
+        message = await channel.fetch_message(message_id)
+    except Exception:
+        return
+    
+    # Only process reactions on bot messages with embeds
+    if not message.embeds or message.author != bot.user:
+        message_cache_put(message_id, False)
+        return
     
-    channel_type = 'forum' if is_forum else 'text channel'
-    print(f'Created bug report from webhook in guild {message.guild.id} ({channel_type})', flush=True)
+    # Skip the edit if nothing the embed shows has changed since the last render
+    state = get_render_state(message)
+    cached = message_cache.get(message_id)
+    if cached is not None and cached['state'] == state:
+        reaction_stats['skipped'] += 1
+        return
+    
+    # Update embed
+    reaction_stats['renders'] += 1
+    try:
+        message = await update_embed_from_reactions(message)
+    except Exception as e:
+        log.error('Error updating embed for message %s: %s', message_id, e)
+        return
+    index_bug_message(message)
+    message_cache_put(message_id, True, state)
 
 @bot.event
 async def on_raw_reaction_add(payload):
@@ -977,25 +3907,16 @@ async def on_raw_reaction_add(payload):
     if payload.user_id == bot.user.id:
         return
     
-    # Fetch the channel and message
-    channel = bot.get_channel(payload.channel_id)
-    if not channel:
-        return
-    
-    try:
-        message = await channel.fetch_message(payload.message_id)
-    except:
-        return
+    # Keep the assignee index current straight from the payload
+    if payload.guild_id and str(payload.emoji) == '🧑‍💻':
+        set_bug_assignee(payload.guild_id, payload.message_id, payload.user_id, True)
     
-    # Only process reactions on bot messages with embeds
-    if not message.embeds or message.author != bot.user:
+    # Ignore reactions that can't be on a bug report without touching the API
+    if not is_possible_bug_reaction(payload):
         return
     
-    # Get the emoji
-    emoji = str(payload.emoji)
-    
-    # Update embed
-    await update_embed_from_reactions(message)
+    # Re-render the embed once the burst of reactions settles
+    schedule_embed_update(payload.channel_id, payload.message_id)
 
 @bot.event
 async def on_raw_reaction_remove(payload):
@@ -1004,22 +3925,16 @@ async def on_raw_reaction_remove(payload):
     if payload.user_id == bot.user.id:
         return
     
-    # Fetch the channel and message
-    channel = bot.get_channel(payload.channel_id)
-    if not channel:
-        return
-    
-    try:
-        message = await channel.fetch_message(payload.message_id)
-    except:
-        return
+    # Keep the assignee index current straight from the payload
+    if payload.guild_id and str(payload.emoji) == '🧑‍💻':
+        set_bug_assignee(payload.guild_id, payload.message_id, payload.user_id, False)
     
-    # Only process reactions on bot messages with embeds
-    if not message.embeds or message.author != bot.user:
+    # Ignore reactions that can't be on a bug report without touching the API
+    if not is_possible_bug_reaction(payload):
         return
     
-    # Update embed
-    await update_embed_from_reactions(message)
+    # Re-render the embed once the burst of reactions settles
+    schedule_embed_update(payload.channel_id, payload.message_id)
 
 # ========================
 # SLASH COMMANDS
@@ -1083,7 +3998,7 @@ async def bug_setup(interaction: discord.Interaction, channel: discord.abc.Guild
         return
     
     # Save configuration
-    set_bug_channel(interaction.guild.id, channel.id)
+    await set_bug_channel(interaction.guild.id, channel.id)
     
     # Send confirmation
     is_forum = isinstance(channel, discord.ForumChannel)
@@ -1156,9 +4071,9 @@ async def bug_block_reporter(interaction: discord.Interaction, user_id: str):
         await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
         return
     
-    block_user(interaction.guild.id, user_id)
+    await block_user(interaction.guild.id, user_id)
     await interaction.response.send_message(f'User/Player `{user_id}` has been blocked in this server.')
-    print(f'User/Player {user_id} blocked via command in guild {interaction.guild.id}', flush=True)
+    log.info('User/Player %s blocked via command in guild %s', user_id, interaction.guild.id)
 
 async def blocked_id_autocomplete(
     interaction: discord.Interaction,
@@ -1172,17 +4087,11 @@ async def blocked_id_autocomplete(
     if guild_id not in blocked_users or not blocked_users[guild_id]:
         return [app_commands.Choice(name='No blocked users', value='none')]
     
-    # Get all blocked IDs for this guild
-    blocked_ids = list(blocked_users[guild_id])
-    
-    # Filter based on what user is typing
-    if current:
-        blocked_ids = [bid for bid in blocked_ids if current.lower() in bid.lower()]
-    
+    # Prefix search on the sorted index, so large blocklists stay fast
     # Return up to 25 choices (Discord limit)
     return [
         app_commands.Choice(name=f'{bid}', value=bid)
-        for bid in blocked_ids[:25]
+        for bid in search_blocked_ids(guild_id, current, limit=25)
     ]
 
 @bot.tree.command(name='bug_unblock', description='Unblock a user (admin only)')
@@ -1203,11 +4112,166 @@ async def bug_unblock(interaction: discord.Interaction, user_id: str):
         await interaction.response.send_message('No blocked users to unblock.', ephemeral=True)
         return
     
-    unblock_user(interaction.guild.id, user_id)
+    await unblock_user(interaction.guild.id, user_id)
     await interaction.response.send_message(f'User/Player `{user_id}` has been unblocked in this server.')
 
+@bot.tree.command(name='bug_block_import', description='Block every ID in a text file (admin only)')
+@app_commands.describe(file='Text file with one user/player ID per line (commas also work)')
+async def bug_block_import(interaction: discord.Interaction, file: discord.Attachment):
+    """Block a list of IDs in this server in one go"""
+    # Check if user has permission
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message('You need administrator permissions.', ephemeral=True)
+        return
+    
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    if file.size > MAX_BLOCKLIST_IMPORT_BYTES:
+        await interaction.response.send_message(
+            f'File is too large ({file.size // 1024} KB, max {MAX_BLOCKLIST_IMPORT_BYTES // 1024} KB).',
+            ephemeral=True
+        )
+        return
+    
+    await interaction.response.defer()
+    
+    try:
+        text = (await file.read()).decode('utf-8-sig', errors='replace')
+    except Exception as e:
+        await interaction.followup.send(f'Could not read `{file.filename}`: {e}')
+        return
+    
+    # One ID per line or comma separated, lines starting with # are comments
+    user_ids = set()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        user_ids.update(part.strip() for part in line.split(',') if part.strip())
+    
+    if not user_ids:
+        await interaction.followup.send(f'No IDs found in `{file.filename}`.')
+        return
+    
+    added = await block_users(interaction.guild.id, user_ids)
+    await interaction.followup.send(
+        f'Blocked {added} new user/player IDs from `{file.filename}` '
+        f'({len(user_ids) - added} were already blocked).'
+    )
+    log.info('Imported %s blocked IDs via command in guild %s', added, interaction.guild.id)
+
+@bot.tree.command(name='bug_block_export', description='Download the blocked IDs as a text file (admin only)')
+async def bug_block_export(interaction: discord.Interaction):
+    """Export the blocklist for this server"""
+    # Check if user has permission
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message('You need administrator permissions.', ephemeral=True)
+        return
+    
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    blocked_ids = [bid for _, bid in get_blocked_id_index(interaction.guild.id)]
+    if not blocked_ids:
+        await interaction.response.send_message('No blocked users in this server.', ephemeral=True)
+        return
+    
+    # Same format /bug_block_import reads
+    data = ('\n'.join(blocked_ids) + '\n').encode('utf-8')
+    await interaction.response.send_message(
+        f'{len(blocked_ids)} blocked user/player IDs.',
+        file=discord.File(io.BytesIO(data), filename=f'blocked_ids_{interaction.guild.id}.txt'),
+        ephemeral=True
+    )
+
+@bot.tree.command(name='bug_ingest_token', description='Create a token for posting reports to the bot directly (admin only)')
+@app_commands.describe(revoke='Only revoke the current token instead of creating a new one')
+async def bug_ingest_token(interaction: discord.Interaction, revoke: bool = False):
+    """Create (or revoke) this server's token for the HTTP ingest endpoint"""
+    # Check if user has permission
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message('You need administrator permissions.', ephemeral=True)
+        return
+    
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    if revoke:
+        if await revoke_ingest_token(interaction.guild.id):
+            await interaction.response.send_message('✅ Ingest token revoked.', ephemeral=True)
+        else:
+            await interaction.response.send_message('This server has no ingest token.', ephemeral=True)
+        return
+    
+    token = await create_ingest_token(interaction.guild.id)
+    lines = [
+        '🔑 **Ingest token** (shown only once, any previous token no longer works):',
+        f'||`{token}`||',
+        '',
+        'Have the plugin POST its webhook payload (payload_json plus files) to '
+        f'`/report` on port {INGEST_PORT or "INGEST_PORT"} with the header `Authorization: Bearer <token>`.',
+    ]
+    if not INGEST_PORT:
+        lines.append('⚠️ The ingest endpoint is disabled, set `INGEST_PORT` in the bot\'s .env to enable it.')
+    if not get_bug_channel(interaction.guild.id):
+        lines.append('⚠️ No bug report channel is configured yet, run `/bug_setup` first.')
+    await interaction.response.send_message('\n'.join(lines), ephemeral=True)
+    log.info('Ingest token created for guild %s', interaction.guild.id)
+
+@bot.tree.command(name='bug_throttled', description='Show players and webhooks whose reports are being throttled (admin only)')
+async def bug_throttled(interaction: discord.Interaction):
+    """List who has had reports throttled recently in this server"""
+    # Check if user has permission
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message('You need administrator permissions.', ephemeral=True)
+        return
+    
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    throttled = get_throttled(interaction.guild.id)
+    
+    embed = discord.Embed(
+        title='Throttled Reporters',
+        description=(
+            f'Players: {THROTTLE_PLAYER_BURST} reports, then {THROTTLE_PLAYER_PER_MINUTE:g}/min'
+            if THROTTLE_PLAYER_BURST > 0 else 'Players: no limit'
+        ) + ' • ' + (
+            f'Webhooks: {THROTTLE_WEBHOOK_BURST} reports, then {THROTTLE_WEBHOOK_PER_MINUTE:g}/min'
+            if THROTTLE_WEBHOOK_BURST > 0 else 'Webhooks: no limit'
+        ),
+        color=0xe67e22,
+        timestamp=datetime.now()
+    )
+    
+    if not throttled:
+        embed.add_field(name='Nobody throttled', value='No reports were throttled in the last hour.', inline=False)
+    
+    for kind, key, bucket in throttled[:25]:
+        wait = bucket.retry_after() if bucket.available() < 1 else 0
+        status = f'limited for {wait:.0f}s more' if wait else 'allowed again'
+        embed.add_field(
+            name=f"{'Player' if kind == 'player' else 'Webhook'} {key}",
+            value=(
+                f'**Throttled:** {bucket.denied} • **Accepted:** {bucket.allowed}\n'
+                f"**Last throttled:** {bucket.last_denied.strftime('%H:%M:%S')} ({status})"
+            ),
+            inline=False
+        )
+    
+    if len(throttled) > 25:
+        embed.set_footer(text=f'Showing 25 of {len(throttled)}')
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name='bug_stats', description='Show bug statistics')
-async def bug_stats(interaction: discord.Interaction):
+@app_commands.describe(rebuild='Rescan the whole channel, e.g. to pick up reactions changed while the bot was offline')
+async def bug_stats(interaction: discord.Interaction, rebuild: bool = False):
     """Show statistics about bugs in the configured channel"""
     if not interaction.guild:
         await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
@@ -1224,83 +4288,13 @@ async def bug_stats(interaction: discord.Interaction):
         await interaction.response.send_message('Configured bug channel not found.', ephemeral=True)
         return
     
-    # Defer response since this might take a while
-    await interaction.response.defer()
-    
-    # Count bugs by status
-    stats = {
-        'total': 0,
-        'new': 0,
-        'in_progress': 0,
-        'fixed': 0,
-        'wont_fix': 0,
-        'blocked': 0,
-        'high_priority': 0
-    }
-    
-    # Check if this is a forum channel or text channel
-    is_forum = isinstance(channel, discord.ForumChannel)
+    # Only a cold index (or an explicit rebuild) needs a channel scan
+    needs_scan = rebuild or interaction.guild.id not in bug_index_ready
+    if needs_scan:
+        # Defer response since the scan might take a while
+        await interaction.response.defer()
     
-    if is_forum:
-        # For forum channels, iterate through threads
-        # Get all threads (archived and active)
-        threads = channel.threads
-        
-        # Also fetch archived threads
-        async for thread in channel.archived_threads(limit=None):
-            threads.append(thread)
-        
-        for thread in threads:
-            # Get the starter message (first message in thread)
-            try:
-                starter_message = await thread.fetch_message(thread.id)
-                if starter_message.author == bot.user and starter_message.embeds:
-                    stats['total'] += 1
-                    
-                    # Check status from reactions
-                    status_emoji = get_current_status_from_reactions(starter_message)
-                    
-                    if status_emoji == '🧑‍💻':
-                        stats['in_progress'] += 1
-                    elif status_emoji == '✅':
-                        stats['fixed'] += 1
-                    elif status_emoji == '❌':
-                        stats['wont_fix'] += 1
-                    else:
-                        stats['new'] += 1
-                    
-                    # Check for high priority
-                    has_star = any(str(r.emoji) == '⭐' and r.count > 1 for r in starter_message.reactions)
-                    if has_star:
-                        stats['high_priority'] += 1
-            except Exception as e:
-                print(f'Error fetching thread starter: {e}', flush=True)
-                continue
-    else:
-        # For text channels, scan channel history
-        async for message in channel.history(limit=None):
-            # Only count bot messages with embeds (bug reports)
-            if message.author != bot.user or not message.embeds:
-                continue
-            
-            stats['total'] += 1
-            
-            # Check status from reactions
-            status_emoji = get_current_status_from_reactions(message)
-            
-            if status_emoji == '🧑‍💻':
-                stats['in_progress'] += 1
-            elif status_emoji == '✅':
-                stats['fixed'] += 1
-            elif status_emoji == '❌':
-                stats['wont_fix'] += 1
-            else:
-                stats['new'] += 1
-            
-            # Check for high priority
-            has_star = any(str(r.emoji) == '⭐' and r.count > 1 for r in message.reactions)
-            if has_star:
-                stats['high_priority'] += 1
+    stats = await ensure_bug_index(interaction.guild.id, channel, rebuild=rebuild)
     
     # Build embed
     embed = discord.Embed(
@@ -1355,9 +4349,12 @@ async def bug_stats(interaction: discord.Interaction):
             inline=True
         )
     
-    embed.set_footer(text=f'Scanned all messages in #{channel.name}')
-    
-    await interaction.followup.send(embed=embed)
+    if needs_scan:
+        embed.set_footer(text=f'Scanned all messages in #{channel.name}')
+        await interaction.followup.send(embed=embed)
+    else:
+        embed.set_footer(text=f'From bug index for #{channel.name} • use rebuild to rescan')
+        await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name='bug_my_bugs', description='Show bugs assigned to you')
 async def bug_my_bugs(interaction: discord.Interaction):
@@ -1377,62 +4374,28 @@ async def bug_my_bugs(interaction: discord.Interaction):
         await interaction.response.send_message('Configured bug channel not found.', ephemeral=True)
         return
     
-    # Defer response since this might take a while (ephemeral)
-    await interaction.response.defer(ephemeral=True)
+    # Only a cold index needs a channel scan, otherwise answer straight from memory
+    needs_scan = interaction.guild.id not in bug_index_ready
+    if needs_scan:
+        # Defer response since the scan might take a while (ephemeral)
+        await interaction.response.defer(ephemeral=True)
+    
+    await ensure_bug_index(interaction.guild.id, channel)
     
     # Find all bugs assigned to this user
+    bugs = bug_index.get(interaction.guild.id, {})
+    assigned_ids = bug_assignees.get(interaction.guild.id, {}).get(interaction.user.id, set())
     assigned_bugs = []
-    
-    # Check if this is a forum channel or text channel
-    is_forum = isinstance(channel, discord.ForumChannel)
-    
-    async def check_message_for_assignment(message, thread_url):
-        """Helper to check if user is assigned to a bug message"""
-        if message.author != bot.user or not message.embeds:
-            return None
-        
-        # Check if user reacted with 🧑‍💻
-        for reaction in message.reactions:
-            if str(reaction.emoji) == '🧑‍💻':
-                users = [user async for user in reaction.users() if user.id == interaction.user.id]
-                if users:
-                    # Get the status from reactions
-                    status_emoji = get_current_status_from_reactions(message)
-                    status_text = REACTIONS.get(status_emoji, {}).get('status', 'New') if status_emoji else 'New'
-                    
-                    return {
-                        'title': message.embeds[0].title,
-                        'status': status_text,
-                        'url': thread_url,
-                        'high_priority': any(str(r.emoji) == '⭐' and r.count > 1 for r in message.reactions)
-                    }
-        return None
-    
-    if is_forum:
-        # For forum channels, iterate through threads
-        threads = list(channel.threads)
-        
-        # Also fetch archived threads
-        async for thread in channel.archived_threads(limit=None):
-            threads.append(thread)
-        
-        for thread in threads:
-            try:
-                starter_message = await thread.fetch_message(thread.id)
-                thread_url = f"https://discord.com/channels/{interaction.guild.id}/{thread.id}"
-                result = await check_message_for_assignment(starter_message, thread_url)
-                if result:
-                    assigned_bugs.append(result)
-            except Exception as e:
-                print(f'Error fetching thread starter: {e}', flush=True)
-                continue
-    else:
-        # For text channels, scan channel history
-        async for message in channel.history(limit=None):
-            thread_url = f"https://discord.com/channels/{interaction.guild.id}/{message.id}"
-            result = await check_message_for_assignment(message, thread_url)
-            if result:
-                assigned_bugs.append(result)
+    for message_id in sorted(assigned_ids, reverse=True):
+        record = bugs.get(message_id)
+        if not record:
+            continue
+        assigned_bugs.append({
+            'title': record['title'] or 'Bug Report',
+            'status': record['status'],
+            'url': f"https://discord.com/channels/{interaction.guild.id}/{record['thread_id']}",
+            'high_priority': record['high_priority']
+        })
     
     # Build response embed
     if not assigned_bugs:
@@ -1450,7 +4413,7 @@ async def bug_my_bugs(interaction: discord.Interaction):
         )
         
         # Group by status
-        for bug in assigned_bugs:
+        for bug in assigned_bugs[:25]:  # Discord embed field limit
             priority_marker = '⭐ ' if bug['high_priority'] else ''
             embed.add_field(
                 name=f"{priority_marker}{bug['title'][:80]}",
@@ -1458,12 +4421,210 @@ async def bug_my_bugs(interaction: discord.Interaction):
                 inline=False
             )
     
-    embed.set_footer(text=f'Scanned all messages in #{channel.name}')
+    if needs_scan:
+        embed.set_footer(text=f'Scanned all messages in #{channel.name}')
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        embed.set_footer(text=f'From bug index for #{channel.name}')
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def located_map_autocomplete(
+    interaction: discord.Interaction,
+    current: str
+) -> list[app_commands.Choice[str]]:
+    """Autocomplete function to show maps that have bugs with a location"""
+    if not interaction.guild:
+        return []
+    
+    records = bug_index.get(interaction.guild.id, {})
+    choices = []
+    for map_key, cells in bug_locations.get(interaction.guild.id, {}).items():
+        if current.lower() not in map_key:
+            continue
+        # Show the map name as the plugin reported it
+        message_id = next(iter(next(iter(cells.values()))))
+        name = (records.get(message_id) or {}).get('map') or map_key
+        choices.append(app_commands.Choice(name=name[:100], value=name[:100]))
+    
+    # Return up to 25 choices (Discord limit)
+    return sorted(choices, key=lambda choice: choice.name.lower())[:25]
+
+@bot.tree.command(name='bug_nearby', description='Show open bugs near a location on a map')
+@app_commands.describe(
+    map_name='Map name, as shown on bug reports',
+    x='X coordinate (first BugItGo value)',
+    y='Y coordinate (second BugItGo value)',
+    z='Z coordinate (third BugItGo value)',
+    radius='Search radius in Unreal units (default 2000)'
+)
+@app_commands.rename(map_name='map')
+@app_commands.autocomplete(map_name=located_map_autocomplete)
+async def bug_nearby(interaction: discord.Interaction, map_name: str, x: float, y: float, z: float, radius: float = 2000.0):
+    """Show open bugs reported close to a point"""
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    # Get the configured bug channel
+    channel_id = get_bug_channel(interaction.guild.id)
+    if not channel_id:
+        await interaction.response.send_message('Bug tracker is not configured. Use `/bug_setup` first.', ephemeral=True)
+        return
+    
+    channel = interaction.guild.get_channel(channel_id)
+    if not channel:
+        await interaction.response.send_message('Configured bug channel not found.', ephemeral=True)
+        return
+    
+    if radius <= 0:
+        await interaction.response.send_message('Radius must be greater than 0.', ephemeral=True)
+        return
+    
+    # Only a cold index needs a channel scan, otherwise answer straight from memory
+    needs_scan = interaction.guild.id not in bug_index_ready
+    if needs_scan:
+        await interaction.response.defer(ephemeral=True)
+    
+    await ensure_bug_index(interaction.guild.id, channel)
+    
+    nearby = find_nearby_bugs(interaction.guild.id, map_name, (x, y, z), radius)
+    
+    embed = discord.Embed(
+        title=f'Open Bugs Near {x:.0f} {y:.0f} {z:.0f} on {map_name}' if nearby else 'No Open Bugs Nearby',
+        description=None if nearby else f'No open bugs on {map_name} within {radius:.0f} units.',
+        color=0x3498db if nearby else 0x95a5a6,
+        timestamp=datetime.now()
+    )
+    
+    for distance, record in nearby[:25]:  # Discord embed field limit
+        priority_marker = '⭐ ' if record['high_priority'] else ''
+        url = f"https://discord.com/channels/{interaction.guild.id}/{record['thread_id']}"
+        embed.add_field(
+            name=f"{priority_marker}{(record['title'] or 'Bug Report')[:80]}",
+            value=f"**{distance:.0f} units away** • **Status:** {record['status']} • [View Thread]({url})",
+            inline=False
+        )
+    
+    if len(nearby) > 25:
+        embed.set_footer(text=f'Showing the closest 25 of {len(nearby)} bugs within {radius:.0f} units')
+    
+    if needs_scan:
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    else:
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name='bug_diagnostics', description='Show bot cache and queue statistics (admin only)')
+async def bug_diagnostics(interaction: discord.Interaction):
+    """Show internal counters, for sizing caches and spotting backlogs"""
+    if not interaction.guild:
+        await interaction.response.send_message('This command must be used in a server.', ephemeral=True)
+        return
+    
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message('You need administrator permissions.', ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title='Bug Tracker Diagnostics',
+        color=0x3498db,
+        timestamp=datetime.now()
+    )
+    
+    lookups = message_cache_stats['hits'] + message_cache_stats['misses']
+    hit_rate = (message_cache_stats['hits'] / lookups * 100) if lookups else 0.0
+    embed.add_field(
+        name='Message Cache',
+        value=(
+            f"**Size:** {len(message_cache)} / {MESSAGE_CACHE_SIZE}\n"
+            f"**Hits:** {message_cache_stats['hits']} • **Misses:** {message_cache_stats['misses']} ({hit_rate:.1f}% hit rate)\n"
+            f"**Evictions:** {message_cache_stats['evictions']}"
+        ),
+        inline=False
+    )
+    
+    embed.add_field(
+        name='Reactions',
+        value=(
+            f"**Events:** {reaction_stats['events']}\n"
+            f"**Renders:** {reaction_stats['renders']} • **Skipped (no change):** {reaction_stats['skipped']}\n"
+            f"**Pending renders:** {len(pending_embed_updates)}"
+        ),
+        inline=False
+    )
+    
+    embed.add_field(
+        name='Short-lived Maps',
+        value=(
+            f"**Recent reports:** {len(recent_bug_reports)} webhooks • {sum(len(reports) for reports in recent_bug_reports.values())} reports\n"
+            f"**Pending log files:** {len(pending_log_files)} webhooks • {sum(len(entries) for entries in pending_log_files.values())} files\n"
+            f"**Blocked webhooks:** {len(recently_blocked_webhooks)} • **Throttle buckets:** {len(report_throttles)}\n"
+            f"**Evictions:** {recent_bug_reports.evictions + pending_log_files.evictions + recently_blocked_webhooks.evictions + report_throttles.evictions}"
+        ),
+        inline=False
+    )
+    
+    waits = list(ingest_wait_samples)
+    embed.add_field(
+        name='Ingest Queue',
+        value=(
+            f"**Depth:** {get_ingest_depth()} (this server: {sum(q.qsize() for q in ingest_queues.get(interaction.guild.id, []))})\n"
+            f"**Processed:** {ingest_stats['processed']} • **Failed:** {ingest_stats['failed']}\n"
+            f"**Overflowed:** {ingest_stats['overflowed']} • **Dropped:** {ingest_stats['dropped']} ({INGEST_OVERFLOW} mode)\n"
+            f"**Wait:** p50 {percentile(waits, 0.5):.2f}s • p99 {percentile(waits, 0.99):.2f}s • max {max(waits, default=0):.2f}s"
+        ),
+        inline=False
+    )
+    
+    rest_lines = [f"**In flight:** {rest_scheduler.active} / {rest_scheduler.concurrency} • **Queued:** {rest_scheduler.queued()}"]
+    for priority, name in PRIORITY_NAMES.items():
+        class_stats = rest_scheduler.stats[priority]
+        waits = list(class_stats['waits'])
+        durations = list(class_stats['durations'])
+        rest_lines.append(
+            f"**{name}:** {class_stats['calls']} calls • wait p50 {percentile(waits, 0.5) * 1000:.0f}ms "
+            f"p99 {percentile(waits, 0.99) * 1000:.0f}ms • call p50 {percentile(durations, 0.5) * 1000:.0f}ms • "
+            f"{class_stats['dropped']} superseded"
+        )
+    embed.add_field(name='REST Scheduler', value='\n'.join(rest_lines), inline=False)
+    
+    embed.add_field(
+        name='Duplicate Folding',
+        value=(
+            f"**Fingerprints:** {len(duplicate_indexes.get(interaction.guild.id, ()))} (this server)\n"
+            f"**Checked:** {duplicate_stats['checked']} • **Folded:** {duplicate_stats['folded']}"
+        ),
+        inline=False
+    )
+    
+    if SCREENSHOT_MAX_SIZE:
+        saved = screenshot_stats['bytes_in'] - screenshot_stats['bytes_out']
+        ratio = screenshot_stats['bytes_out'] / screenshot_stats['bytes_in'] if screenshot_stats['bytes_in'] else 1.0
+        embed.add_field(
+            name='Screenshot Transcoding',
+            value=(
+                f"**Transcoded:** {screenshot_stats['transcoded']} • **Kept as is:** {screenshot_stats['skipped']} • "
+                f"**Failed:** {screenshot_stats['failed']}\n"
+                f"**Saved:** {format_bytes(saved)} ({1 - ratio:.0%} of transcoded screenshots)"
+                + ('' if Image is not None else '\n⚠️ Pillow is not installed, transcoding is off')
+            ),
+            inline=False
+        )
+    
+    guild_bugs = len(bug_index.get(interaction.guild.id, {}))
+    index_state = 'warm' if interaction.guild.id in bug_index_ready else 'cold'
+    embed.add_field(
+        name='Bug Index',
+        value=f"**Bugs indexed:** {guild_bugs} ({index_state})",
+        inline=False
+    )
     
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # ========================
 # RUN BOT
 # ========================
 
-bot.run(os.getenv('DISCORD_TOKEN'))
\ No newline at end of file
+if __name__ == '__main__':
+    setup_logging()
+    # discord.py logs through the handlers set up above instead of its own
+    bot.run(os.getenv('DISCORD_TOKEN'), log_handler=None)
\ No newline at end of file